@@ -0,0 +1,182 @@
+# BENCHMARK SUITE-----
+# Times every pipeline stage on synthetic sales files (utils/data_generator.py)
+# and writes the numbers to a JSON results file so runs can be compared.
+#
+#   python benchmark.py --scales 10k,1m,10m [--memory] [--compare bench_results/<old>.json]
+#
+# For each stage we record wall time, rows/sec, MB/sec of input, the process
+# peak RSS after the stage and, with --memory, the tracemalloc peak of the stage
+# itself (tracemalloc slows everything down, so it is opt-in).
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from utils import (file_handler, data_processor, aggregator, api_handler,
+                   enriched_writer, generate_sales_report, data_generator, approx_aggregator,
+                   timeseries)
+
+DATA_DIR= "bench_data"
+RESULTS_DIR= "bench_results"
+FILE_ENCODER= "utf-8"
+
+def parse_scale(text):
+    text= text.strip().lower()
+    multiplier= {"k": 1000, "m": 1000000}.get(text[-1], 1)
+    return int(float(text.rstrip("km")) * multiplier)
+
+def peak_rss_mb():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak= resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def fake_product_mapping():
+    # no network in benchmarks--- a catalog covering half the sample product ids
+    return api_handler.create_product_mapping([
+        {"id": i, "title": f"Product {i}", "category": "electronics", "brand": "Brand", "rating": 4.5}
+        for i in range(1, 106)
+    ])
+
+# runs one stage, prints nothing from inside it, returns (result, record)
+def run_stage(name, func, rows, file_mb, trace_memory):
+    if trace_memory:
+        tracemalloc.reset_peak()
+    with contextlib.redirect_stdout(io.StringIO()):
+        start= time.perf_counter()
+        result= func()
+        seconds= time.perf_counter() - start
+    record= {
+        "stage": name,
+        "rows": rows,
+        "seconds": round(seconds, 6),
+        "rows_per_sec": round(rows / seconds, 1) if seconds > 0 else None,
+        "mb_per_sec": round(file_mb / seconds, 3) if seconds > 0 else None,
+        "peak_rss_mb": round(peak_rss_mb(), 1)
+    }
+    if trace_memory:
+        record["peak_traced_mb"]= round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+    print(f"  {name:<36} {seconds:9.3f}s  {record['rows_per_sec'] or 0:>14,.0f} rows/s")
+    return result, record
+
+def benchmark_scale(rows, seed, trace_memory):
+    os.makedirs(DATA_DIR, exist_ok= True)
+    filename= os.path.join(DATA_DIR, f"sales_{rows}_{seed}.txt")
+    if not os.path.exists(filename):
+        print(f"Generating {filename} ...")
+        data_generator.generate_sales_file(filename, rows, seed= seed)
+    file_mb= os.path.getsize(filename) / (1024 * 1024)
+    print(f"\n{rows:,} rows ({file_mb:.1f} MB)")
+    records= []
+
+    def stage(name, func, stage_rows= rows):
+        result, record= run_stage(name, func, stage_rows, file_mb, trace_memory)
+        record["scale"]= rows
+        records.append(record)
+        return result
+
+    raw_lines= stage("read", lambda: file_handler.read_sales_data(filename, FILE_ENCODER))
+    parsed= stage("parse", lambda: file_handler.parse_transactions(raw_lines))
+    valid, _= stage("validate_filter", lambda: file_handler.validate_and_filter(parsed))
+    del raw_lines
+    n_valid= len(valid)
+
+    aggregates= stage("aggregate", lambda: aggregator.aggregate_transactions(valid), n_valid)
+    stage("approx_aggregate", lambda: approx_aggregator.aggregate_transactions(valid, error= 0.01), n_valid)
+    cube= stage("timeseries_cube", lambda: timeseries.cube_from_transactions(valid), n_valid)
+    stage("timeseries.last_7_days_region", lambda: cube.last_days(7, region= "North"), n_valid)
+    analytics= [
+        ("calculate_total_revenue", lambda: data_processor.calculate_total_revenue(valid)),
+        ("region_wise_sales", lambda: data_processor.region_wise_sales(valid)),
+        ("top_selling_products", lambda: data_processor.top_selling_products(valid, top_n= 5)),
+        ("customer_analysis", lambda: data_processor.customer_analysis(valid)),
+        ("daily_sales_trend", lambda: data_processor.daily_sales_trend(valid)),
+        ("find_peak_sales_day", lambda: data_processor.find_peak_sales_day(valid)),
+        ("low_performing_products", lambda: data_processor.low_performing_products(valid, threshold= 100.0))
+    ]
+    for name, func in analytics:
+        stage("analytics." + name, func, n_valid)
+
+    mapping= fake_product_mapping()
+    enriched= stage("enrich", lambda: api_handler.enrich_sales_data(valid, mapping, output_file= None), n_valid)
+    stage("enrich.matched_count", enriched.matched_count, n_valid)
+    with tempfile.TemporaryDirectory() as tmp:
+        stage("write_enriched", lambda: enriched_writer.write_enriched_data(enriched, os.path.join(tmp, "enriched.txt")), n_valid)
+        stage("report", lambda: generate_sales_report.generate_sales_report(
+            valid, enriched, output_file= os.path.join(tmp, "report.txt"),
+            aggregates= aggregates, enriched_count= None), n_valid)
+    del enriched, valid, aggregates
+
+    # alternative ingest paths that need numpy
+    try:
+        from utils import mmap_reader, filter_index
+    except ImportError:
+        print("  (numpy not installed, skipping mmap/columnar stages)")
+        return records
+    table, _= stage("mmap_read_validate", lambda: mmap_reader.read_sales_table(filename, FILE_ENCODER))
+    stage("columnar_aggregate", lambda: aggregator.aggregate_transactions(table), len(table))
+    del table
+
+    # parsed rows are already validated (normalised) above, which the index accepts as is
+    index= stage("filter_index.build", lambda: filter_index.FilterIndex(parsed))
+    del parsed
+    stage("filter_index.region_amount", lambda: index.row_ids(region= "North", min_amount= 1000), len(index))
+    stage("filter_index.amount_date", lambda: index.row_ids(max_amount= 5000, start_date= "2024-12-10", end_date= "2024-12-20"), len(index))
+    return records
+
+# per stage time ratio against an earlier results file
+def compare(results, previous_file, trace_memory):
+    with open(previous_file, mode= "r", encoding= "utf-8") as file:
+        previous= json.load(file)
+    old= {(r["scale"], r["stage"]): r for r in previous["results"]}
+    print(f"\nComparison with {previous_file} (new/old time, >1 is slower):")
+    if previous.get("trace_memory") != trace_memory:
+        print("  note: --memory differs between the two runs, tracemalloc inflates timings")
+    for record in results:
+        before= old.get((record["scale"], record["stage"]))
+        if before and before["seconds"]:
+            ratio= record["seconds"] / before["seconds"]
+            flag= "  <-- regression" if ratio > 1.2 else ""
+            print(f"  {record['scale']:>10,} {record['stage']:<36} {ratio:6.2f}x{flag}")
+
+def main():
+    parser= argparse.ArgumentParser(description= "Benchmark every sales pipeline stage on synthetic data.")
+    parser.add_argument("--scales", default= "10k,1m", help= "comma separated row counts, e.g. 10k,1m,10m")
+    parser.add_argument("--seed", type= int, default= 42)
+    parser.add_argument("--memory", action= "store_true", help= "record tracemalloc peak per stage (slower)")
+    parser.add_argument("--output", default= None, help= "results file (default bench_results/<timestamp>.json)")
+    parser.add_argument("--compare", default= None, help= "earlier results file to compare against")
+    args= parser.parse_args()
+
+    if args.memory:
+        tracemalloc.start()
+    results= []
+    for scale in args.scales.split(","):
+        results.extend(benchmark_scale(parse_scale(scale), args.seed, args.memory))
+
+    output= args.output or os.path.join(RESULTS_DIR, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    if os.path.dirname(output):
+        os.makedirs(os.path.dirname(output), exist_ok= True)
+    with open(output, mode= "w", encoding= "utf-8") as file:
+        json.dump({
+            "timestamp": datetime.now().isoformat(timespec= "seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "trace_memory": args.memory,
+            "results": results
+        }, file, indent= 1)
+    print(f"\nResults written to {output}")
+    if args.compare:
+        compare(results, args.compare, args.memory)
+
+if __name__ == "__main__":
+    main()
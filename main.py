@@ -1,7 +1,69 @@
-import os
-from utils import file_handler, data_processor, api_handler, generate_sales_report
-def main():
-    # main execution function----
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from utils import file_handler, data_processor, api_handler, generate_sales_report, aggregator, parallel_ingest, enriched_writer, filter_index, approx_aggregator, timeseries, product_names, dedup, report_renderer
+from utils.metrics import PipelineMetrics, timed
+def ask_filter_options():
+    # asks for region/min/max filters, returns None on invalid input
+    choice= input("\n Do you want to apply filters? (y/n): ").strip().lower()
+    regions= None
+    min_amount_data= None    
+    max_amount_data= None
+    if choice== 'y':
+        region_input= input(" Enter Region to filter (leave blank for no region filter): ").strip()
+        if region_input:
+            regions= region_input
+        min_amount_input= input(" Enter Minimum Amount to filter (leave blank for no min amount filter): ").strip()
+        if min_amount_input:
+            try:
+                min_amount_data= float(min_amount_input)
+            except ValueError:
+                print(" Invalid minimum amount input.")
+                return None
+        max_amount_input= input(" Enter Maximum Amount to filter (leave blank for no max amount filter): ").strip()
+        if max_amount_input:
+            try:
+                max_amount_data= float(max_amount_input)
+            except ValueError:
+                print(" Invalid maximum amount input.") 
+                return None
+    return regions, min_amount_data, max_amount_data
+
+# calendar rollup and 7-day window over the daily rollup--- every engine fills it, so the
+# in-memory and streaming flows print the same trend lines
+def print_trends(aggregates):
+    cube= timeseries.cube_from_daily(aggregates["daily"])
+    weekly= [(week, round(revenue, 2)) for week, revenue in cube.rollup("week")]
+    print(f" Weekly Revenue: {weekly}")
+    if cube.n_days:
+        print(f" 7-day Moving Average Revenue (last day): ₹{cube.moving_average(7)[-1]:,.2f}")
+        print(f" Revenue, last 7 days: ₹{cube.last_days(7):,.2f}")
+
+# main execution function---- `filters` is (region, min, max) for batch runs, None asks interactively.
+# Returns True when the run completed.
+def main(filenames= None, filters= None, stream= False, columnar= False, workers= 1, use_mmap= False, use_cache= False,
+         incremental_mode= False, enriched_format= "text", compression= None, metrics= None, file_encoder= "utf-8",
+         enriched_file= "data/enriched_sales_data.txt", report_file= "output/sales_report.txt", approx_error= None, top_k= 100,
+         report_formats= ("text",), overlap= False, rules_file= None, quarantine_file= None, canonical_names= False,
+         dedup_policy= None, cms_epsilon= None, cms_delta= approx_aggregator.CMS_DELTA):
+    # per-stage timings/rows/memory are recorded in `metrics` (utils/metrics.py)
+    # approx_error switches the rollups to fixed-memory sketches (utils/approx_aggregator.py),
+    # cms_epsilon/cms_delta size their Count-Min sketches (epsilon None: derived from approx_error)
+    # canonical_names folds product name variants into one name per product (utils/product_names.py)
+    # dedup_policy ("first"/"last") keeps one row per TransactionID (utils/dedup.py)
+    metrics= metrics or PipelineMetrics()
+    filenames= filenames or ["data/sales_data.txt"]
+    if stream or workers > 1 or use_mmap or use_cache or incremental_mode or rules_file:
+        return main_streaming(filenames= filenames, filters= filters, workers= workers, use_mmap= use_mmap, use_cache= use_cache,
+                              incremental_mode= incremental_mode, enriched_format= enriched_format, compression= compression,
+                              metrics= metrics, file_encoder= file_encoder, enriched_file= enriched_file, report_file= report_file,
+                              approx_error= approx_error, top_k= top_k, report_formats= report_formats, overlap= overlap,
+                              rules_file= rules_file, quarantine_file= quarantine_file, canonical_names= canonical_names,
+                              dedup_policy= dedup_policy, cms_epsilon= cms_epsilon, cms_delta= cms_delta)
+    # overlap runs the API fetch on a background thread from the start of the run (steps 1-5 do
+    # not need it) and writes the enriched file while the report is generated
+    background= ThreadPoolExecutor(max_workers= 1, thread_name_prefix= "overlap") if overlap else None
+    fetch_job= background.submit(timed, api_handler.fetch_all_products) if background else None
     try:
         print("="*40)
         print("SALES ANALYTICS SYSTEM")
@@ -10,9 +72,13 @@ def main():
     
     #-------------- (1/10) Read Sales data----------
         print("\n(1/10) Reading Sales data from file...")
-        filename= "data/sales_data.txt"
-        file_encoder= "utf-8"
-        raw_lines= file_handler.read_sales_data(filename, file_encoder)
+        metrics.start("read")
+        raw_lines= []
+        for filename in filenames:
+            raw_lines.extend(file_handler.read_sales_data(filename, file_encoder))
+        metrics.end(rows_out= len(raw_lines))
+        if len(filenames) > 1:
+            print(f"Read {len(filenames)} files.")
         print(f"Successfully read {len(raw_lines)} transactions.")
         if len(raw_lines) == 0:
             print("No data found.")
@@ -21,7 +87,9 @@ def main():
 
     #-------------- (2/10) Parse and clean data----------
         print("\n(2/10) Parsing and cleaning sales data...")
+        metrics.start("parse", rows_in= len(raw_lines))
         parsed_transactions= file_handler.parse_transactions(raw_lines)
+        metrics.end(rows_out= len(parsed_transactions))
         print(f"Parsed {len(parsed_transactions)} records.")
         if len(parsed_transactions) == 0:
             print("No valid transactions found")
@@ -52,66 +120,83 @@ def main():
             return
         print() 
         # Get user filter inputs    
-        choice= input("\n Do you want to apply filters? (y/n): ").strip().lower()
-        regions= None
-        min_amount_data= None    
-        max_amount_data= None
-        if choice== 'y':
-            region_input= input(" Enter Region to filter (leave blank for no region filter): ").strip()
-            if region_input:
-                regions= region_input
-            min_amount_input= input(" Enter Minimum Amount to filter (leave blank for no min amount filter): ").strip()
-            if min_amount_input:
-                try:
-                    min_amount_data= float(min_amount_input)
-                except ValueError:
-                    print(" Invalid minimum amount input.")
-                    return
-            max_amount_input= input(" Enter Maximum Amount to filter (leave blank for no max amount filter): ").strip()
-            if max_amount_input:
-                try:
-                    max_amount_data= float(max_amount_input)
-                except ValueError:
-                    print(" Invalid maximum amount input.") 
-                    return
+        filter_options= filters if filters is not None else ask_filter_options()
+        if filter_options is None:
+            return
+        regions, min_amount_data, max_amount_data= filter_options
+        if filters is not None:
+            print(f" Filters: region={regions}, min amount={min_amount_data}, max amount={max_amount_data}")
         print()
 
     #-------------- (4/10) validate & filter ----------
         print("\n(4/10) Validating and filtering transactions...")  
-        valid_transactions, filter_summary= file_handler.validate_and_filter(
-            parsed_transactions,
+        metrics.start("validate_filter", rows_in= len(parsed_transactions))
+        # validation (and duplicate removal) happens once when the index is built, filters are index lookups
+        index= filter_index.FilterIndex(parsed_transactions, dedup_policy= dedup_policy)
+        print(f"After validation: {len(index)} records (Invalid: {index.invalid})")
+        if dedup_policy:
+            print(f"Duplicate TransactionIDs removed: {index.duplicates} (keeping the {dedup_policy} copy)")
+        valid_transactions, filter_summary= index.query(
             region= regions,
             min_amount= min_amount_data,
             max_amount= max_amount_data)
+        metrics.end(rows_out= len(valid_transactions))
         print(f"|'Filter Summary:': {filter_summary}")
         if len(valid_transactions) == 0:
             print("No valid transactions after filtering. Exiting.")
             return
+        if canonical_names:
+            # the index sees every parsed row, so the base name of a product does not depend on the filters
+            metrics.start("canonical_names", rows_in= len(valid_transactions))
+            name_index= product_names.build_index(parsed_transactions)
+            renamed= product_names.canonicalize_transactions(valid_transactions, name_index)
+            metrics.end(rows_out= renamed)
+            print(f"Canonical product names: {renamed} rows renamed, variants {name_index.variant_groups()}")
         print()        
 
     #--------------(5/10) Analysing Sales data----------------
      
         print("\n (5/10) Analyzing sales data...")
-        total_revenue= data_processor.calculate_total_revenue(valid_transactions)
+        metrics.start("analyze", rows_in= len(valid_transactions))
+        # one pass over the transactions builds every rollup used below and in the report
+        if approx_error is not None:
+            aggregates= approx_aggregator.aggregate_transactions(valid_transactions, error= approx_error, top_k= top_k,
+                                                                 cms_epsilon= cms_epsilon, cms_delta= cms_delta)
+        elif columnar:
+            # NumPy columns + vectorized group-bys instead of per-dict loops
+            from utils import columnar as columnar_store
+            table= columnar_store.table_from_transactions(valid_transactions)
+            aggregates= aggregator.aggregate_transactions(table)
+        else:
+            aggregates= aggregator.aggregate_transactions(valid_transactions)
+        total_revenue= data_processor.calculate_total_revenue(valid_transactions, aggregates= aggregates)
         print(f" Total Revenue Calculated: ₹{total_revenue:,.2f}")
-        region_performance= data_processor.region_wise_sales(valid_transactions)
+        region_performance= data_processor.region_wise_sales(valid_transactions, aggregates= aggregates)
         print(f"region_performance: {region_performance}")
-        top_products= data_processor.top_selling_products(valid_transactions, top_n=5)
+        top_products= data_processor.top_selling_products(valid_transactions, top_n=5, aggregates= aggregates)
         print(f" Top 5 Selling Products: {top_products}")
-        customer_insights= data_processor.customer_analysis(valid_transactions)
+        customer_insights= data_processor.customer_analysis(valid_transactions, aggregates= aggregates)
         print(f" Customer Insights: {customer_insights}")
-        daily_trends= data_processor.daily_sales_trend(valid_transactions)
+        daily_trends= data_processor.daily_sales_trend(valid_transactions, aggregates= aggregates)
         print(f" Daily Sales Trends: {daily_trends}")
-        peak_revenue_days= data_processor.find_peak_sales_day(valid_transactions)
+        peak_revenue_days= data_processor.find_peak_sales_day(valid_transactions, aggregates= aggregates)
         print(f" Peak Revenue Days: {peak_revenue_days[:3]}")
-        low_products= data_processor.low_performing_products(valid_transactions, threshold= 100.0)
+        low_products= data_processor.low_performing_products(valid_transactions, threshold= 100.0, aggregates= aggregates)
         print(f" Low Performing Products: {low_products}")
+        print_trends(aggregates)
+        metrics.end()
         print()
 
                 
     #---------------(6/10) Fetch API products-------
         print("\n(6/10) Fetching product details from API...")
-        api_products= api_handler.fetch_all_products()
+        # overlapped: the stage only measures the wait for what is left of the background fetch
+        metrics.start("fetch_api", overlapped= fetch_job is not None)
+        if fetch_job is not None:
+            api_products, fetch_seconds= fetch_job.result()
+        else:
+            api_products, fetch_seconds= api_handler.fetch_all_products(), None
+        metrics.end(rows_out= len(api_products), background_seconds= fetch_seconds)
         print(f"Fetched {len(api_products)} products from API.")
         if len(api_products) == 0:
             print("No products fetched from API. Exiting.")
@@ -119,11 +204,13 @@ def main():
         print()
 
     #---------------(7/10) Enrich Sales data--------
+        metrics.start("enrich", rows_in= len(valid_transactions))
         product_mapping = api_handler.create_product_mapping(api_products)
-        enriched_transactions = api_handler.enrich_sales_data(valid_transactions, product_mapping)
+        # written in step 8 by the shared writer
+        enriched_transactions = api_handler.enrich_sales_data(valid_transactions, product_mapping, output_file= None)
         print(f"Enriched {len(enriched_transactions)} transactions with product details.")
-        enriched_success = sum(
-        1 for t in enriched_transactions if t.get("api_match") is True)
+        enriched_success = enriched_transactions.matched_count()
+        metrics.end(rows_out= len(enriched_transactions))
         total_to_enrich = len(enriched_transactions)
         enriched_rate = (
         enriched_success / total_to_enrich * 100 if total_to_enrich > 0 else 0)
@@ -132,22 +219,295 @@ def main():
         f" - Successfully enriched: "
         f"{enriched_success}/{total_to_enrich} "
         f"transactions ({enriched_rate:.2f}%)")
+        if canonical_names:
+            # closest API catalog title per canonical product name, cached across runs
+            match_cache= product_names.MatchCache()
+            catalog_matches= product_names.CatalogMatcher(product_mapping, match_cache).match_all(
+                sorted(aggregates["products"]))
+            match_cache.save()
+            matched= {name: match["title"] for name, match in catalog_matches.items() if match}
+            print(f" - Catalog title matches: {len(matched)}/{len(catalog_matches)} {matched}")
         print()
 
 
     #--------------(8/10) Save enriched data to file--------
-        print("\n(8/10) Saving enriched sales data to file...")
-        enriched_file= "data/enriched_sales_data.txt"
-        if os.path.exists(enriched_file):
-            print(f" File already exists at {enriched_file}, skipping write.")
-        else:           #...file already exists, skip writing
-            print(f"(Enriched file {enriched_file} saved.)")
+        def save_enriched():
+            return enriched_writer.write_enriched_data(
+                enriched_transactions, enriched_file,
+                fmt= enriched_format, compression= compression)
+
+        def write_report():
+            return generate_sales_report.generate_sales_report(valid_transactions, enriched_transactions, output_file= report_file, aggregates= aggregates, enriched_count= enriched_success,
+                                                        formats= report_formats)
+
+        if background is not None:
+            # both only read the enriched rows / aggregates--- the file is written on the
+            # background thread while the report is rendered here
+            print("\n(8-9/10) Saving enriched sales data and generating sales report...")
+            save_job= background.submit(timed, save_enriched)
+            metrics.start("report", rows_in= len(valid_transactions))
+            report_paths= write_report()
+            metrics.end()
+            metrics.start("save_enriched", rows_in= len(enriched_transactions), overlapped= True)
+            write_stats, save_seconds= save_job.result()
+            metrics.end(rows_out= write_stats["rows"] if write_stats else 0, background_seconds= save_seconds)
+        else:
+            print("\n(8/10) Saving enriched sales data to file...")
+            metrics.start("save_enriched", rows_in= len(enriched_transactions))
+            write_stats= save_enriched()
+            metrics.end(rows_out= write_stats["rows"] if write_stats else 0)
+        if write_stats is None:
+            return
+        enriched_file= write_stats["path"]
+        print()
+
+    #-------------(9/10) Generate Report--------
+        if background is None:
+            print(f"\n (9/10) Generating sales report...")
+            metrics.start("report", rows_in= len(valid_transactions))
+            report_paths= write_report()
+            metrics.end()
+        report_file= ", ".join(report_paths.values())
+        print(f"Sales report generated at {report_file}.")
+        print()
+
+    #-------------(10/10) Completion Message--------
+        print(f"\n (10/10) Process Complete!")
+        print("="*40)
+        print(f"Enriched data: {enriched_file}")
+        print(f"Sales Report: {report_file}")
+        print("="*40)
+        return True
+    except Exception as e:
+        print(f"\n Something went wrong but the program did not crash")
+        print(f" Error: {e}")
+    finally:
+        if background is not None:
+            background.shutdown(wait= False, cancel_futures= True)
+
+# Streaming mode----- read -> parse -> validate -> filter -> aggregate as generators,
+# so memory stays bounded by the number of distinct regions/products/customers/days
+# instead of the number of rows. The file is streamed a second time for enrichment.
+# With workers > 1 the aggregation pass runs on a process pool over byte ranges,
+# with use_mmap it runs on the memory-mapped columnar reader and with use_cache
+# the parsed columns are reused from the on-disk cache when the file is unchanged.
+# incremental_mode only parses the bytes appended since the previous run.
+# rules_file checks the rows with the declarative rules engine (utils/rules_engine.py),
+# optionally writing the rejected rows to quarantine_file.
+# Several input files are streamed one after the other into the same aggregates.
+def main_streaming(filenames= None, filters= None, workers= 1, use_mmap= False, use_cache= False, incremental_mode= False,
+                   enriched_format= "text", compression= None, metrics= None, file_encoder= "utf-8",
+                   enriched_file= "data/enriched_sales_data.txt", report_file= "output/sales_report.txt",
+                   approx_error= None, top_k= 100, report_formats= ("text",), overlap= False, rules_file= None,
+                   quarantine_file= None, canonical_names= False, dedup_policy= None, cms_epsilon= None,
+                   cms_delta= approx_aggregator.CMS_DELTA):
+    metrics= metrics or PipelineMetrics()
+    filenames= filenames or ["data/sales_data.txt"]
+    if canonical_names:
+        # the report would mix the name variants of a product, so the run stops instead
+        print("Canonical product names need every row in memory, run without --stream/--workers/--mmap/--cache/--incremental/--rules")
+        return
+    background= ThreadPoolExecutor(max_workers= 1, thread_name_prefix= "overlap") if overlap else None
+    try:
+        print("="*40)
+        print("SALES ANALYTICS SYSTEM (streaming mode)")
+        print("="*40)
+        print()
+        if len(filenames) > 1:
+            print(f"{len(filenames)} input files")
+
+    #---------------(1-3/10) Filter options----------
+        print("\n(1-3/10) Filter options (data is streamed, no preview available):")
+        filter_options= filters if filters is not None else ask_filter_options()
+        if filter_options is None:
+            return
+        regions, min_amount_data, max_amount_data= filter_options
+        if filters is not None:
+            print(f" Filters: region={regions}, min amount={min_amount_data}, max amount={max_amount_data}")
+        print()
+
+        def all_rows():
+            for filename in filenames:
+                yield from file_handler.iter_sales_data(filename, file_encoder)
+
+        def validated_transactions(filter_summary):
+            return file_handler.iter_validate(file_handler.iter_parse_transactions(all_rows()), filter_summary)
+
+        def filtered_transactions(filter_summary):
+            if dedup_policy:
+                # one row per TransactionID before the filters (bloom filter + on-disk ID set, see utils/dedup.py)
+                valid= dedup.iter_dedupe(validated_transactions, filter_summary, policy= dedup_policy)
+            else:
+                valid= validated_transactions(filter_summary)
+            return file_handler.iter_filter(
+                valid, filter_summary,
+                region= regions,
+                min_amount= min_amount_data,
+                max_amount= max_amount_data)
+
+        enrich_counts= {"total": 0, "matched": 0}
+
+        def counted(enriched):
+            for t in enriched:
+                enrich_counts["total"] += 1
+                if t.get("API_match") is True:
+                    enrich_counts["matched"] += 1
+                yield t
+
+        # second pass over the files: enrich with the API catalog and write, independent of the aggregates
+        def enrich_and_save(api_products):
+            product_mapping = api_handler.create_product_mapping(api_products)
+            enriched= api_handler.iter_enrich_sales_data(filtered_transactions(file_handler.new_filter_summary()), product_mapping)
+            return enriched_writer.write_enriched_data(
+                counted(enriched), enriched_file,
+                fmt= enriched_format, compression= compression)
+
+        def enrich_and_save_fetched():
+            api_products= fetch_job.result()[0]
+            return enrich_and_save(api_products) if len(api_products) else None
+
+        # overlap: fetch -> enrich -> save runs on a background thread during steps 4-5 (one
+        # worker, so the two jobs run in order), only the report (which needs both sides) waits for it
+        fetch_job= background.submit(timed, api_handler.fetch_all_products) if background else None
+        save_job= background.submit(timed, enrich_and_save_fetched) if background else None
+
+    #-------------- (4/10) read, parse, validate & filter ----------
+        print("\n(4/10) Streaming, validating and aggregating transactions...")
+        # read, parse, validate, filter and aggregate are fused into one stage here
+        metrics.start("ingest")
+        if approx_error is not None and (incremental_mode or use_mmap or use_cache or workers > 1 or rules_file):
+            print(" Approximate mode only applies to the single process row pipeline, using exact rollups")
+        if dedup_policy and workers > 1 and not (incremental_mode or use_mmap or use_cache or rules_file):
+            print(" Duplicate removal needs one ID set for all rows, aggregating with one process")
+            workers= 1
+        if incremental_mode:
+            from utils import incremental
+            # saved state per file (per input set with --dedup, one ID set for all files), merged for this run
+            aggregates, filter_summary= incremental.update(
+                filenames, file_encoder,
+                region= regions,
+                min_amount= min_amount_data,
+                max_amount= max_amount_data,
+                dedup_policy= dedup_policy)
+        elif rules_file:
+            from utils import rules_engine, columnar as columnar_store
+            print(f" Validation rules: {rules_file}")
+            table, filter_summary= rules_engine.read_sales_tables(
+                filenames, file_encoder, rules_engine.load_rules(rules_file), quarantine_file)
+            if dedup_policy:
+                table= dedup.dedupe_table(table, filter_summary, policy= dedup_policy)
+            table= columnar_store.filter_table(
+                table, filter_summary,
+                region= regions,
+                min_amount= min_amount_data,
+                max_amount= max_amount_data)
+            aggregates= aggregator.aggregate_transactions(table)
+            if quarantine_file:
+                print(f" Rejected rows written to {quarantine_file}")
+        elif use_mmap or use_cache:
+            from utils import mmap_reader, parse_cache, columnar as columnar_store
+            tables= []
+            filter_summary= file_handler.new_filter_summary()
+            for filename in filenames:
+                if use_cache:
+                    table, file_summary= parse_cache.load_table(filename, file_encoder)
+                else:
+                    table, file_summary= mmap_reader.read_sales_table(filename, file_encoder)
+                tables.append(table)
+                file_handler.merge_filter_summary(filter_summary, file_summary)
+            table= columnar_store.concat_tables(tables)
+            if dedup_policy:
+                table= dedup.dedupe_table(table, filter_summary, policy= dedup_policy)
+            table= columnar_store.filter_table(
+                table, filter_summary,
+                region= regions,
+                min_amount= min_amount_data,
+                max_amount= max_amount_data)
+            aggregates= aggregator.aggregate_transactions(table)
+        elif workers > 1:
+            print(f" Using {workers} worker processes")
+            aggregates, filter_summary= parallel_ingest.parallel_aggregate(
+                filenames, file_encoder, workers,
+                region= regions,
+                min_amount= min_amount_data,
+                max_amount= max_amount_data)
+        elif approx_error is not None:
+            filter_summary= file_handler.new_filter_summary()
+            aggregates= approx_aggregator.aggregate_transactions(filtered_transactions(filter_summary), error= approx_error, top_k= top_k,
+                                                                 cms_epsilon= cms_epsilon, cms_delta= cms_delta)
+        else:
+            filter_summary= file_handler.new_filter_summary()
+            aggregates= aggregator.aggregate_transactions(filtered_transactions(filter_summary))
+        metrics.end(rows_out= filter_summary["final_count"])
+        metrics.stages[-1]["rows_in"]= filter_summary["total_input"]
+        print(f"|'Filter Summary:': {filter_summary}")
+        if filter_summary["final_count"] == 0:
+            print("No valid transactions after filtering. Exiting.")
+            return
+        print()
+
+    #--------------(5/10) Analysing Sales data----------------
+        print("\n (5/10) Analyzing sales data...")
+        metrics.start("analyze", rows_in= aggregates["total_transactions"])
+        total_revenue= data_processor.calculate_total_revenue(None, aggregates= aggregates)
+        print(f" Total Revenue Calculated: ₹{total_revenue:,.2f}")
+        region_performance= data_processor.region_wise_sales(None, aggregates= aggregates)
+        print(f"region_performance: {region_performance}")
+        top_products= data_processor.top_selling_products(None, top_n=5, aggregates= aggregates)
+        print(f" Top 5 Selling Products: {top_products}")
+        customer_insights= data_processor.customer_analysis(None, aggregates= aggregates)
+        print(f" Customer Insights: {customer_insights}")
+        daily_trends= data_processor.daily_sales_trend(None, aggregates= aggregates)
+        print(f" Daily Sales Trends: {daily_trends}")
+        peak_revenue_days= data_processor.find_peak_sales_day(None, aggregates= aggregates)
+        print(f" Peak Revenue Days: {peak_revenue_days[:3]}")
+        low_products= data_processor.low_performing_products(None, threshold= 100.0, aggregates= aggregates)
+        print(f" Low Performing Products: {low_products}")
+        print_trends(aggregates)
+        metrics.end()
+        print()
+
+    #---------------(6/10) Fetch API products-------
+        print("\n(6/10) Fetching product details from API...")
+        # overlapped: the stages only measure the wait for the rest of the background fetch/enrich/save
+        metrics.start("fetch_api", overlapped= fetch_job is not None)
+        if fetch_job is not None:
+            api_products, fetch_seconds= fetch_job.result()
+        else:
+            api_products, fetch_seconds= api_handler.fetch_all_products(), None
+        metrics.end(rows_out= len(api_products), background_seconds= fetch_seconds)
+        print(f"Fetched {len(api_products)} products from API.")
+        if len(api_products) == 0:
+            print("No products fetched from API. Exiting.")
+            return
+        print()
+
+    #---------------(7-8/10) Enrich and save Sales data--------
+        print("\n(7-8/10) Enriching and saving sales data...")
+        metrics.start("enrich_save", overlapped= save_job is not None)
+        if save_job is not None:
+            write_stats, save_seconds= save_job.result()
+        else:
+            write_stats, save_seconds= enrich_and_save(api_products), None
+        metrics.end(rows_out= enrich_counts["total"], background_seconds= save_seconds)
+        if write_stats is None:
+            return
+        enriched_file= write_stats["path"]
+        enriched_rate= (
+        enrich_counts["matched"] / enrich_counts["total"] * 100 if enrich_counts["total"] > 0 else 0)
+        print(
+        f" - Successfully enriched: "
+        f"{enrich_counts['matched']}/{enrich_counts['total']} "
+        f"transactions ({enriched_rate:.2f}%)")
         print()
 
     #-------------(9/10) Generate Report--------
         print(f"\n (9/10) Generating sales report...")
-        report_file= "output/sales_report.txt"   
-        generate_sales_report.generate_sales_report(valid_transactions, enriched_transactions, output_file= report_file)
+        metrics.start("report", rows_in= aggregates["total_transactions"])
+        report_paths= generate_sales_report.generate_sales_report(None, None, output_file= report_file, aggregates= aggregates, enriched_count= enrich_counts["matched"],
+                                                    formats= report_formats)
+        metrics.end()
+        report_file= ", ".join(report_paths.values())
         print(f"Sales report generated at {report_file}.")
         print()
 
@@ -157,10 +517,132 @@ def main():
         print(f"Enriched data: {enriched_file}")
         print(f"Sales Report: {report_file}")
         print("="*40)
+        return True
     except Exception as e:
         print(f"\n Something went wrong but the program did not crash")
         print(f" Error: {e}")
+    finally:
+        if background is not None:
+            background.shutdown(wait= False, cancel_futures= True)
 
-if __name__ == "__main__":
-    main()
+# "text,csv" -> ["text", "csv"]; an unknown format is a usage error, not a failure after the run
+def report_format_list(value):
+    formats= [fmt.strip() for fmt in value.split(",") if fmt.strip()]
+    unknown= [fmt for fmt in formats if fmt not in report_renderer.FORMATS]
+    if unknown or not formats:
+        raise argparse.ArgumentTypeError(f"unknown report format {', '.join(unknown) or repr(value)} (use {', '.join(report_renderer.FORMATS)})")
+    return list(dict.fromkeys(formats))
+
+# Command line----- with no arguments it behaves as before (data/sales_data.txt, filters asked interactively).
+# Any of --region/--min-amount/--max-amount or --batch makes the run non-interactive (for cron), e.g.
+#   python main.py "data/stores/*.txt" --batch --region North --workers 4 --report output/north.txt
+def parse_args(argv= None):
+    parser= argparse.ArgumentParser(description= "Sales analytics pipeline: read, validate, analyse, enrich and report.")
+    parser.add_argument("inputs", nargs= "*", default= ["data/sales_data.txt"],
+                        help= "sales files or glob patterns, processed together (default data/sales_data.txt)")
+    parser.add_argument("--encoding", default= "utf-8", help= "encoding of the input files")
+
+    filters= parser.add_argument_group("filters")
+    filters.add_argument("--batch", action= "store_true", help= "do not ask for filters (no filter unless given below)")
+    filters.add_argument("--region", default= None)
+    filters.add_argument("--min-amount", type= float, default= None)
+    filters.add_argument("--max-amount", type= float, default= None)
 
+    outputs= parser.add_argument_group("outputs")
+    outputs.add_argument("--enriched-output", default= "data/enriched_sales_data.txt")
+    outputs.add_argument("--report", default= "output/sales_report.txt")
+    outputs.add_argument("--report-format", type= report_format_list, default= "text",
+                         help= "comma separated report formats: text, csv, json, html (other formats are written next to --report)")
+    outputs.add_argument("--enriched-format", choices= ["text", "columnar"], default= "text")
+    outputs.add_argument("--compress", choices= ["gzip", "zstd"], default= None, help= "compress the enriched text output")
+
+    engine= parser.add_argument_group("engine")
+    engine.add_argument("--stream", action= "store_true", help= "bounded-memory streaming pipeline")
+    engine.add_argument("--columnar", action= "store_true", help= "aggregate over a NumPy TransactionTable")
+    engine.add_argument("--workers", type= int, default= 1, help= "parallel ingest with N processes (streaming flow)")
+    engine.add_argument("--mmap", action= "store_true", help= "memory-mapped columnar reader (streaming flow)")
+    engine.add_argument("--cache", action= "store_true", help= "reuse parsed columns from .cache/parsed when a file is unchanged")
+    engine.add_argument("--incremental", action= "store_true", help= "parse only what was appended since the last run")
+    engine.add_argument("--approx", type= float, default= None, metavar= "ERROR",
+                        help= "fixed-memory sketches instead of exact per customer/product rollups, e.g. 0.01 for ~1%% distinct count error")
+    engine.add_argument("--top-k", type= int, default= 100, help= "products/customers tracked in approximate mode")
+    engine.add_argument("--cms-epsilon", type= float, default= None,
+                        help= "Count-Min error as a fraction of the total in approximate mode (default: ERROR / 100)")
+    engine.add_argument("--cms-delta", type= float, default= approx_aggregator.CMS_DELTA,
+                        help= "probability that a Count-Min estimate exceeds its error bound")
+    engine.add_argument("--rules", nargs= "?", const= "config/validation_rules.json", default= None, metavar= "RULES_JSON",
+                        help= "validate with the declarative rules engine (default rules: config/validation_rules.json)")
+    engine.add_argument("--quarantine", default= None, metavar= "PATH", help= "with --rules, write rejected rows here")
+    engine.add_argument("--canonical-names", action= "store_true",
+                        help= "fold product name variants (e.g. 'Webcam HD') into one name per ProductID")
+    engine.add_argument("--dedup", nargs= "?", const= "first", choices= ["first", "last"], default= None,
+                        help= "keep one row per TransactionID, the first (default) or the last copy")
+    engine.add_argument("--overlap", action= "store_true",
+                        help= "fetch the API catalog (and in streaming mode enrich) on a background thread while ingesting and aggregating")
+
+    diagnostics= parser.add_argument_group("metrics")
+    diagnostics.add_argument("--metrics-json", default= None, help= "write per-stage metrics as JSON")
+    diagnostics.add_argument("--metrics-prom", default= None, help= "write per-stage metrics as a Prometheus textfile")
+    diagnostics.add_argument("--profile-stage", default= "", help= "comma separated stages to run under cProfile")
+    diagnostics.add_argument("--trace-stage", default= "", help= "comma separated stages to run under tracemalloc")
+    args= parser.parse_args(argv)
+    if args.incremental and args.dedup == "last":
+        # rows already merged into the saved state cannot be replaced by a later copy
+        parser.error("--dedup last cannot be used with --incremental (incremental runs keep the first copy)")
+    streaming= [option for option, used in (("--stream", args.stream), ("--workers", args.workers > 1), ("--mmap", args.mmap),
+                                            ("--cache", args.cache), ("--incremental", args.incremental), ("--rules", args.rules))
+                if used]
+    if args.canonical_names and streaming:
+        # name variants are folded over all rows in memory, the streaming flow never holds them
+        parser.error(f"--canonical-names cannot be used with {', '.join(streaming)} (it needs the in-memory flow)")
+    for option, value in (("--approx", args.approx), ("--cms-epsilon", args.cms_epsilon), ("--cms-delta", args.cms_delta)):
+        if value is not None and not 0 < value < 1:
+            parser.error(f"{option} must be between 0 and 1, got {value}")
+    return args
+
+if __name__ == "__main__":
+    args= parse_args()
+    def stage_list(value):
+        return [stage.strip() for stage in value.split(",") if stage.strip()]
+    filters= None
+    if args.batch or args.region is not None or args.min_amount is not None or args.max_amount is not None:
+        filters= (args.region, args.min_amount, args.max_amount)
+    metrics= PipelineMetrics(profile_stages= stage_list(args.profile_stage), trace_stages= stage_list(args.trace_stage))
+    completed= False
+    try:
+        completed= main(
+            filenames= file_handler.expand_inputs(args.inputs),
+            filters= filters,
+            stream= args.stream,
+            columnar= args.columnar,
+            workers= args.workers,
+            use_mmap= args.mmap,
+            use_cache= args.cache,
+            incremental_mode= args.incremental,
+            enriched_format= args.enriched_format,
+            compression= args.compress,
+            metrics= metrics,
+            file_encoder= args.encoding,
+            enriched_file= args.enriched_output,
+            report_file= args.report,
+            approx_error= args.approx,
+            cms_epsilon= args.cms_epsilon,
+            cms_delta= args.cms_delta,
+            top_k= args.top_k,
+            report_formats= args.report_format,
+            overlap= args.overlap,
+            rules_file= args.rules,
+            quarantine_file= args.quarantine,
+            canonical_names= args.canonical_names,
+            dedup_policy= args.dedup)
+    finally:
+        # a failed run still leaves the stages that did finish
+        metrics.end()
+        print("\nStage metrics:")
+        metrics.print_table()
+        if args.metrics_json:
+            metrics.write_json(args.metrics_json)
+        if args.metrics_prom:
+            metrics.write_prometheus(args.metrics_prom)
+    # non-zero exit status lets a scheduler notice a failed run
+    sys.exit(0 if completed else 1)
@@ -0,0 +1,5 @@
+# tests import the application modules the way main.py does (from utils import ...)
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,81 @@
+# api_handler.fetch_all_products against a local http.server stub of the catalog API:
+# limit/skip paging, retries on 429/500, and the on-disk page cache
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from utils import api_handler
+
+CATALOG= [{"id": i, "title": f"Product {i}", "category": "c", "brand": "b", "rating": 4.0} for i in range(1, 26)]
+
+class CatalogStub(BaseHTTPRequestHandler):
+    # class level, set by the fixture: skip -> statuses to answer before the page
+    failures= {}
+    requests= Counter()
+    errors_sent= Counter()
+    lock= threading.Lock()
+
+    def do_GET(self):
+        query= parse_qs(urlparse(self.path).query)
+        limit, skip= int(query["limit"][0]), int(query["skip"][0])
+        with self.lock:
+            self.requests[skip] += 1
+            pending= self.failures.get(skip)
+            status= pending.pop(0) if pending else 200
+            if status != 200:
+                self.errors_sent[status] += 1
+        body= json.dumps({"products": CATALOG[skip:skip + limit], "total": len(CATALOG), "skip": skip, "limit": limit}
+                         if status == 200 else {"message": "try again"}).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+@pytest.fixture
+def catalog_url(monkeypatch):
+    monkeypatch.setenv("NO_PROXY", "127.0.0.1,localhost")
+    CatalogStub.failures= {}
+    CatalogStub.requests= Counter()
+    CatalogStub.errors_sent= Counter()
+    server= ThreadingHTTPServer(("127.0.0.1", 0), CatalogStub)
+    thread= threading.Thread(target= server.serve_forever, kwargs= {"poll_interval": 0.05}, daemon= True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/products"
+    server.shutdown()
+    server.server_close()
+
+def fetch(url, cache_dir, **options):
+    return api_handler.fetch_all_products(limit= 10, url= url, workers= 4, timeout= 5, backoff= 0,
+                                          cache_dir= str(cache_dir), **options)
+
+def test_pages_retries_and_cache(catalog_url, tmp_path):
+    # second page: 429, then 500, then the page
+    CatalogStub.failures= {10: [429, 500]}
+    products= fetch(catalog_url, tmp_path)
+    assert products == CATALOG
+    assert api_handler.create_product_mapping(products)[25]["title"] == "Product 25"
+    assert CatalogStub.requests == {0: 1, 10: 3, 20: 1}
+    assert CatalogStub.errors_sent == {429: 1, 500: 1}
+
+    # every page is cached now, a second run does not hit the API
+    assert fetch(catalog_url, tmp_path) == CATALOG
+    assert sum(CatalogStub.requests.values()) == 5
+
+    # cache disabled: the pages are fetched again
+    assert fetch(catalog_url, tmp_path, cache_ttl= 0) == CATALOG
+    assert CatalogStub.requests == {0: 2, 10: 4, 20: 2}
+
+def test_gives_up_after_retries(catalog_url, tmp_path):
+    CatalogStub.failures= {0: [503] * 10}
+    assert fetch(catalog_url, tmp_path, retries= 2) == []
+    # first attempt + 2 retries, nothing cached
+    assert CatalogStub.requests == {0: 3}
+    assert not list(tmp_path.iterdir())
@@ -0,0 +1,29 @@
+# parse_cache.load_table: an entry is only reused for the encoding it was decoded with
+import os
+
+from utils import parse_cache
+
+FIXTURE= os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sales_data.txt")
+
+with open(FIXTURE, mode= "r", encoding= "utf-8") as fixture:
+    HEADER, *ROWS= fixture.read().splitlines(keepends= True)
+
+def test_entry_per_encoding(tmp_path, capsys):
+    path= str(tmp_path / "sales.txt")
+    cache_dir= str(tmp_path / "cache")
+    fields= ROWS[0].rstrip("\n").split("|")
+    fields[3]= "Café Mug"       # ProductName
+    with open(path, mode= "w", encoding= "utf-8", newline= "") as file:
+        file.write(HEADER + "|".join(fields) + "\n" + "".join(ROWS[1:20]))
+
+    utf8, _= parse_cache.load_table(path, "utf-8", cache_dir= cache_dir)
+    latin1, _= parse_cache.load_table(path, "latin-1", cache_dir= cache_dir)
+    assert "Café Mug" in utf8.categories["ProductName"]
+    assert "CafÃ© Mug" in latin1.categories["ProductName"]
+    assert len(parse_cache.load_index(cache_dir)) == 2
+
+    # another spelling of the same codec shares its entry
+    capsys.readouterr()
+    again, _= parse_cache.load_table(path, "UTF8", cache_dir= cache_dir)
+    assert "from cache" in capsys.readouterr().out
+    assert again.categories == utf8.categories
@@ -0,0 +1,67 @@
+# partial_state: states of the shards of one file merge, in any order and grouping,
+# to the same aggregates and filter summary as one serial pass over the file
+import itertools
+import json
+import os
+from functools import reduce
+
+import pytest
+
+from utils import aggregator, file_handler, partial_state
+
+FIXTURE= os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sales_data.txt")
+
+def serial_aggregates(region= None, min_amount= None):
+    filter_summary= file_handler.new_filter_summary()
+    rows= file_handler.iter_parse_transactions(file_handler.iter_sales_data(FIXTURE, "utf-8"))
+    aggregates= aggregator.aggregate_transactions(
+        file_handler.iter_validate_and_filter(rows, filter_summary, region= region, min_amount= min_amount))
+    return aggregates, filter_summary
+
+def shard_states(shards, **filters):
+    # the states travel as JSON between map and reduce
+    return [json.loads(json.dumps(partial_state.map_shard(FIXTURE, shard= shard, shards= shards, **filters)))
+            for shard in range(shards)]
+
+def assert_same_aggregates(merged, serial):
+    assert merged["total_transactions"] == serial["total_transactions"]
+    assert merged["total_revenue"] == pytest.approx(serial["total_revenue"])
+    for group, fields in partial_state.FIELDS.items():
+        # same keys in the same (first seen) order as the serial run
+        assert list(merged[group]) == list(serial[group])
+        for key, data in serial[group].items():
+            for field, kind in fields:
+                if kind == "sum":
+                    assert merged[group][key][field] == pytest.approx(data[field])
+                else:
+                    assert merged[group][key][field] == data[field]
+
+@pytest.mark.parametrize("shards", [2, 3, 5])
+def test_every_merge_order_matches_serial(shards):
+    serial, serial_summary= serial_aggregates()
+    states= shard_states(shards)
+    assert sum(state["total_transactions"] for state in states) == serial["total_transactions"]
+    results= []
+    for order in itertools.permutations(states):
+        merged= partial_state.merge_all(order)
+        aggregates, filter_summary= partial_state.finalize(merged)
+        assert_same_aggregates(aggregates, serial)
+        assert filter_summary == serial_summary
+        results.append(merged)
+    # exact sums: every order gives the identical state, not just close floats
+    assert all(result == results[0] for result in results)
+
+def test_merge_is_associative():
+    a, b, c, d= shard_states(4)
+    left= reduce(partial_state.merge_states, [a, b, c, d])
+    right= partial_state.merge_states(a, partial_state.merge_states(b, partial_state.merge_states(c, d)))
+    tree= partial_state.merge_states(partial_state.merge_states(a, b), partial_state.merge_states(c, d))
+    assert left == right == tree
+    assert partial_state.merge_states(partial_state.empty_state(), left) == left
+
+def test_filtered_shards_match_serial():
+    serial, serial_summary= serial_aggregates(region= "North", min_amount= 1000)
+    states= shard_states(3, region= "North", min_amount= 1000)
+    aggregates, filter_summary= partial_state.finalize(partial_state.merge_all(reversed(states)))
+    assert_same_aggregates(aggregates, serial)
+    assert filter_summary == serial_summary
@@ -0,0 +1,66 @@
+# query_server.QueryService on data/sales_data.txt: /health, /summary and reloads
+import json
+import os
+import shutil
+
+import pytest
+
+from utils import aggregator, file_handler, query_server
+
+FIXTURE= os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "sales_data.txt")
+EXTRA_ROW= "T999|2024-12-31|P101|Laptop|2|1000|C001|North\n"
+
+def get(service, path, query_string= ""):
+    status, body= service.handle(path, query_string)
+    return status, json.loads(body)
+
+def serial_aggregates(filename, region= None):
+    filter_summary= file_handler.new_filter_summary()
+    rows= file_handler.iter_parse_transactions(file_handler.iter_sales_data(filename, "utf-8"))
+    return aggregator.aggregate_transactions(file_handler.iter_validate_and_filter(rows, filter_summary, region= region))
+
+@pytest.fixture
+def sales_file(tmp_path):
+    path= tmp_path / "sales_data.txt"
+    shutil.copy(FIXTURE, path)
+    return str(path)
+
+def test_health_and_summary(sales_file):
+    service= query_server.QueryService([sales_file], cache_size= 8, reload_interval= 0)
+    expected= serial_aggregates(sales_file)
+
+    status, health= get(service, "/health")
+    assert status == 200
+    assert health["transactions"] == expected["total_transactions"]
+    assert health["load_seconds"] >= 0
+    assert health["reloads"] == 0
+
+    status, summary= get(service, "/summary")
+    assert status == 200
+    assert summary["total_transactions"] == expected["total_transactions"]
+    assert summary["total_revenue"] == pytest.approx(expected["total_revenue"])
+
+    # filtered answers come from the table subset
+    north= serial_aggregates(sales_file, region= "North")
+    status, summary= get(service, "/summary", "region=North")
+    assert summary["total_transactions"] == north["total_transactions"]
+    assert summary["total_revenue"] == pytest.approx(north["total_revenue"])
+
+    assert get(service, "/summary", "min_amount=abc")[0] == 400
+    assert get(service, "/nothing")[0] == 404
+
+def test_reload(sales_file):
+    service= query_server.QueryService([sales_file], cache_size= 8, reload_interval= 0)
+    before= get(service, "/summary")[1]
+
+    status, reloaded= get(service, "/reload")
+    assert status == 200 and reloaded["transactions"] == before["total_transactions"]
+    assert get(service, "/health")[1]["reloads"] == 1
+
+    # a changed file is picked up on the next request, cached answers are not reused
+    with open(sales_file, mode= "a", encoding= "utf-8") as file:
+        file.write(EXTRA_ROW)
+    after= get(service, "/summary")[1]
+    assert after["total_transactions"] == before["total_transactions"] + 1
+    assert after["total_revenue"] == pytest.approx(before["total_revenue"] + 2000)
+    assert get(service, "/health")[1]["reloads"] == 2
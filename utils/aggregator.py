@@ -0,0 +1,139 @@
+# AGGREGATION ENGINE-----
+# Builds every region/product/customer/day rollup in a single pass over the
+# transactions. data_processor and generate_sales_report read from its result
+# instead of walking the transaction list again.
+
+from datetime import datetime
+
+from utils.records import Transaction
+
+# a) Empty aggregate state---
+def new_aggregates():
+    return {
+        "total_revenue": 0.0,
+        "total_transactions": 0,
+        "regions": {},      # region -> {total_sales, transaction_count}
+        "products": {},     # product name -> {total_sales, total_quantity}
+        "customers": {},    # customer id -> {total_spent, purchase_count, unique_products}
+        "daily": {}         # date -> {total_revenue, transaction_count, unique_customers}
+    }
+
+# b) Add one transaction to the rollups---
+def add_transaction(aggregates, txn):
+    try:
+        if txn.__class__ is Transaction:
+            # records always have every field--- plain attribute reads
+            qty= int(txn.Quantity)
+            price= float(txn.UnitPrice)
+            region= str(txn.Region).strip()
+            p_name= str(txn.ProductName).strip()
+            c_id= str(txn.CustomerID).strip()
+            dt= str(txn.Date).strip()
+        else:
+            qty= int(txn.get("Quantity", 0))
+            price= float(txn.get("UnitPrice", 0.0))
+            region= str(txn.get("Region", "Unknown")).strip()
+            p_name= str(txn.get("ProductName", "Unknown")).strip()
+            c_id= str(txn.get("CustomerID", "Unknown")).strip()
+            dt= str(txn.get("Date", "Unknown")).strip()
+        amount= qty * price
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return False
+
+    aggregates["total_revenue"] += amount
+    aggregates["total_transactions"] += 1
+
+    region_data= aggregates["regions"].get(region)
+    if region_data is None:
+        region_data= aggregates["regions"][region]= {
+            "total_sales": 0.0,
+            "transaction_count": 0
+        }
+    region_data["total_sales"] += amount
+    region_data["transaction_count"] += 1
+
+    product_data= aggregates["products"].get(p_name)
+    if product_data is None:
+        product_data= aggregates["products"][p_name]= {
+            "total_sales": 0.0,
+            "total_quantity": 0
+        }
+    product_data["total_sales"] += amount
+    product_data["total_quantity"] += qty
+
+    customer_data= aggregates["customers"].get(c_id)
+    if customer_data is None:
+        customer_data= aggregates["customers"][c_id]= {
+            "total_spent": 0.0,
+            "purchase_count": 0,
+            "unique_products": set()
+        }
+    customer_data["total_spent"] += amount
+    customer_data["purchase_count"] += 1
+    customer_data["unique_products"].add(p_name)
+
+    daily_data= aggregates["daily"].get(dt)
+    if daily_data is None:
+        daily_data= aggregates["daily"][dt]= {
+            "total_revenue": 0.0,
+            "transaction_count": 0,
+            "unique_customers": set()
+        }
+    daily_data["total_revenue"] += amount
+    daily_data["transaction_count"] += 1
+    if c_id:
+        daily_data["unique_customers"].add(c_id)
+    return True
+
+# c) Aggregate any iterable of transactions in one pass---
+# columnar tables (utils/columnar.py) bring their own vectorized aggregate()
+def aggregate_transactions(transactions):
+    if hasattr(transactions, "aggregate"):
+        return transactions.aggregate()
+    aggregates= new_aggregates()
+    for txn in transactions:
+        add_transaction(aggregates, txn)
+    return aggregates
+
+# d) Merge partial aggregates (e.g. one per file chunk) into `target`---
+# merging chunks in file order keeps the same key order as a serial pass
+def merge_aggregates(target, other):
+    target["total_revenue"] += other["total_revenue"]
+    target["total_transactions"] += other["total_transactions"]
+    for region, data in other["regions"].items():
+        region_data= target["regions"].setdefault(region, {"total_sales": 0.0, "transaction_count": 0})
+        region_data["total_sales"] += data["total_sales"]
+        region_data["transaction_count"] += data["transaction_count"]
+    for p_name, data in other["products"].items():
+        product_data= target["products"].setdefault(p_name, {"total_sales": 0.0, "total_quantity": 0})
+        product_data["total_sales"] += data["total_sales"]
+        product_data["total_quantity"] += data["total_quantity"]
+    for c_id, data in other["customers"].items():
+        customer_data= target["customers"].setdefault(c_id, {"total_spent": 0.0, "purchase_count": 0, "unique_products": set()})
+        customer_data["total_spent"] += data["total_spent"]
+        customer_data["purchase_count"] += data["purchase_count"]
+        customer_data["unique_products"] |= data["unique_products"]
+    for dt, data in other["daily"].items():
+        daily_data= target["daily"].setdefault(dt, {"total_revenue": 0.0, "transaction_count": 0, "unique_customers": set()})
+        daily_data["total_revenue"] += data["total_revenue"]
+        daily_data["transaction_count"] += data["transaction_count"]
+        daily_data["unique_customers"] |= data["unique_customers"]
+    return target
+
+# e) Date range---- parses each distinct date once instead of once per row
+def date_range(aggregates):
+    min_date, max_date= None, None
+    for dt_str in aggregates["daily"]:
+        try:
+            dt= datetime.strptime(dt_str, "%Y-%m-%d")
+        except (ValueError, TypeError):
+            continue
+        if min_date is None or dt < min_date:
+            min_date= dt
+        if max_date is None or dt > max_date:
+            max_date= dt
+    return min_date, max_date
+
+# f) Distinct counts are sets in the row engine and plain ints in the columnar engine
+def distinct_count(value):
+    return value if isinstance(value, int) else len(value)
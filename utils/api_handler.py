@@ -2,21 +2,86 @@
 # TASK 3.1: 
 # # a) Fetch Product Details
 import requests
-import csv
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+
+API_URL= "https://dummyjson.com/products"
+API_CACHE_DIR= ".cache/api"
+RETRY_STATUS= {429, 500, 502, 503, 504}
+
+# Pages through the whole catalog with limit/skip. The first page tells us the
+# total, the remaining pages are fetched concurrently over one pooled session.
+# Every request has a timeout and is retried with exponential backoff, and
+# page responses are cached on disk for `cache_ttl` seconds (0 disables it).
+def fetch_all_products(limit= 100, url= API_URL, workers= 8, timeout= 10, retries= 3,
+                       backoff= 0.5, cache_dir= API_CACHE_DIR, cache_ttl= 3600):
+    session= requests.Session()
+    adapter= HTTPAdapter(pool_connections= 1, pool_maxsize= workers)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
 
-def fetch_all_products(limit= 100):
-    url= "https://dummyjson.com/products"
+    def fetch_page(skip):
+        return fetch_json(session, url, {"limit": limit, "skip": skip},
+                          timeout, retries, backoff, cache_dir, cache_ttl)
 
     try:
-        response= requests.get(url)
-        response.raise_for_status()  # raises exception for HTTP errors
-        data= response.json()
-        api_products= data.get("products", [])
+        first_page= fetch_page(0)
+        api_products= list(first_page.get("products", []))
+        total= int(first_page.get("total", len(api_products)))
+        page_size= len(api_products) or limit
+        skips= range(page_size, total, page_size)
+        with ThreadPoolExecutor(max_workers= workers) as pool:
+            # map() keeps page order, so products come back in catalog order
+            for page in pool.map(fetch_page, skips):
+                api_products.extend(page.get("products", []))
         print(f"Successfully Fetched {len(api_products)} products.")
         return api_products
-    except requests.RequestException as e:
+    except (requests.RequestException, ValueError) as e:
         print(f"Error fetching products: {e}")
         return []
+    finally:
+        session.close()
+
+# one GET with on-disk cache, timeout and retry/backoff---
+def fetch_json(session, url, params, timeout, retries, backoff, cache_dir, cache_ttl):
+    cache_file= None
+    if cache_dir and cache_ttl > 0:
+        key= hashlib.sha256(f"{url}?{sorted(params.items())}".encode("utf-8")).hexdigest()
+        cache_file= os.path.join(cache_dir, key + ".json")
+        try:
+            if time.time() - os.path.getmtime(cache_file) < cache_ttl:
+                with open(cache_file, mode= "r", encoding= "utf-8") as file:
+                    return json.load(file)
+        except (OSError, ValueError):
+            pass
+
+    for attempt in range(retries + 1):
+        try:
+            response= session.get(url, params= params, timeout= timeout)
+            if response.status_code in RETRY_STATUS and attempt < retries:
+                time.sleep(backoff * (2 ** attempt))
+                continue
+            response.raise_for_status()  # raises exception for HTTP errors
+            data= response.json()
+            break
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == retries:
+                raise
+            time.sleep(backoff * (2 ** attempt))
+
+    if cache_file is not None:
+        try:
+            os.makedirs(cache_dir, exist_ok= True)
+            with open(cache_file + ".tmp", mode= "w", encoding= "utf-8") as file:
+                json.dump(data, file)
+            os.replace(cache_file + ".tmp", cache_file)
+        except OSError as e:
+            print(f"Could not cache API response: {e}")
+    return data
     
 
 # b) Create Product mapping---
@@ -44,91 +109,98 @@ def create_product_mapping(api_products):
 
 # TASK 3.2 - Enrich Sales Data-----enriches transaction data with product details from API
 
-import os
 import re
-def enrich_sales_data(transactions, product_mapping):
-    
-    enriched_data= []
-    # output file path---
-    output_dir= "data"
-    output_file= os.path.join(output_dir, "enriched_sales_data.txt")
-    os.makedirs(output_dir, exist_ok= True)
-
-    # columns for output file-- pipe delimited--
-    base_cols= [
-        "TransactionID", "Date", "ProductID", "ProductName", "Quantity", "UnitPrice", "CustomerID", "Region"
-    ]
-    new_cols= ["API_category", "API_brand", "API_rating", "API_match"]
-    header_cols= base_cols + new_cols
-    
-    def extract_numeric_id(product_id):    # P101--> 101, P5--> 5
-        match= re.search(r'(\d+)', str(product_id))
-        return int(match.group(1)) if match else None
-    
-    for txn in transactions:
-        api_category= None
-        api_brand= None
-        api_rating= None
-        api_match= False
+from collections import ChainMap
+from utils import enriched_writer
+def enrich_sales_data(transactions, product_mapping, output_file= "data/enriched_sales_data.txt"):
+    # hash join--- API columns live once per distinct ProductID in the index and
+    # each row is a read-only view over (transaction, API columns), no row copies
+    enriched_data= EnrichedTransactions(transactions, EnrichmentIndex(product_mapping))
 
-        try:
-            p_id_str= extract_numeric_id(txn.get("ProductID", ""))
-            if p_id_str is not None and p_id_str in product_mapping:
-                info= product_mapping[p_id_str]
-                api_category= info["category"]
-                api_brand= info["brand"]
-                api_rating= info["rating"]
-                api_match= True
-                p_id= int(p_id_str)
-        except Exception:
-            pass
-        enriched_txn= dict(txn)  # copy original transaction
-        enriched_txn.update({
-            "API_category": api_category,
-            "API_brand": api_brand,
-            "API_rating": api_rating,
-            "API_match": api_match
-        })
-        enriched_data.append(enriched_txn)
-
-    # write pipe delimited enriched data to output file
-    try:
-        with open(output_file, mode= "w", encoding= "utf-8", newline= "\n") as file:
-            writer= csv.writer(file, delimiter="|")
-            writer.writerow(header_cols)  # write header
-            for txn in enriched_data:
-                row= [
-                    txn.get(col, "") for col in base_cols
-                ] + [
-                    txn.get("API_category", ""),
-                    txn.get("API_brand", ""),
-                    txn.get("API_rating", ""),
-                    str(txn.get("API_match", False))
-                ]
-                writer.writerow(row)
-        print(f"Enriched data written to {output_file}")
-    except Exception as e:
-        print(f"Error writing enriched data: {e}")
+    # write pipe delimited enriched data to output file (output_file= None skips it)
+    if output_file is not None:
+        enriched_writer.write_enriched_data(enriched_data, output_file)
     return enriched_data
 
-# Helper function--
-def save_enriched_data(enriched_transactions, filename= "data/enriched_sales_data.txt"):
+def extract_numeric_id(product_id):    # P101--> 101, P5--> 5
+    match= re.search(r'(\d+)', str(product_id))
+    return int(match.group(1)) if match else None
+
+# API columns for one ProductID---
+def api_columns(product_id, product_mapping):
+    columns= {
+        "API_category": None,
+        "API_brand": None,
+        "API_rating": None,
+        "API_match": False
+    }
     try:
-        with open(filename, mode= "w", encoding= "utf-8", newline= "\n") as file:
-            writer= csv.writer(file, delimiter="|")
-            # write header
-            header_cols= [
-                "TransactionID", "Date", "ProductID", "ProductName", 
-                "Quantity", "UnitPrice", "CustomerID", "Region",
-                "API_category", "API_brand", "API_rating", "API_match"
-            ]
-            writer.writerow(header_cols)
-            for txn in enriched_transactions:
-                row= [
-                    txn.get(col, "") for col in header_cols
-                ]
-                writer.writerow(row)
-    except Exception as e:
-        print(f"Error saving enriched data: {e}")
-        print(f"Enriched data saved to {filename}")
+        p_id= extract_numeric_id(product_id)
+        if p_id is not None and p_id in product_mapping:
+            info= product_mapping[p_id]
+            columns["API_category"]= info["category"]
+            columns["API_brand"]= info["brand"]
+            columns["API_rating"]= info["rating"]
+            columns["API_match"]= True
+    except Exception:
+        pass
+    return columns
+
+# ProductID -> API columns, filled on first lookup so the regex and the
+# mapping lookup run once per distinct product instead of once per row
+class EnrichmentIndex(dict):
+    def __init__(self, product_mapping):
+        super().__init__()
+        self.product_mapping= product_mapping
+
+    def __missing__(self, product_id):
+        columns= api_columns(product_id, self.product_mapping)
+        self[product_id]= columns
+        return columns
+
+# Enriched rows as ChainMap(transaction, API columns): reads see both, writes
+# go to the transaction itself, and no transaction dict is ever copied
+class EnrichedTransactions:
+    __slots__= ("transactions", "index")
+
+    def __init__(self, transactions, index):
+        self.transactions= transactions
+        self.index= index
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def __getitem__(self, i):
+        return self.row(self.transactions[i])
 
+    def __iter__(self):
+        for txn in self.transactions:
+            yield self.row(txn)
+
+    def row(self, txn):
+        return ChainMap(txn, self.index[txn.get("ProductID", "")])
+
+    def iter_rows(self, columns):
+        # plain value lists for writers, without a ChainMap lookup per column
+        index= self.index
+        for txn in self.transactions:
+            api= index[txn.get("ProductID", "")]
+            yield [txn[col] if col in txn else api.get(col, "") for col in columns]
+
+    def matched_count(self):
+        index= self.index
+        return sum(1 for txn in self.transactions if index[txn.get("ProductID", "")]["API_match"])
+
+# enriches a single transaction (as a view, see EnrichedTransactions)
+def enrich_transaction(txn, product_mapping):
+    return ChainMap(txn, api_columns(txn.get("ProductID", ""), product_mapping))
+
+# Streaming enrichment--- yields enriched transactions one at a time
+def iter_enrich_sales_data(transactions, product_mapping):
+    index= EnrichmentIndex(product_mapping)
+    for txn in transactions:
+        yield ChainMap(txn, index[txn.get("ProductID", "")])
+
+# Helper function--
+def save_enriched_data(enriched_transactions, filename= "data/enriched_sales_data.txt"):
+    return enriched_writer.write_enriched_data(enriched_transactions, filename)
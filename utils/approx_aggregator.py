@@ -0,0 +1,139 @@
+# APPROXIMATE AGGREGATION-----
+# Opt-in replacement for aggregator.aggregate_transactions on very large data.
+# Totals, regions and per-day revenue/transaction counts stay exact (their
+# cardinality is small). Everything that grows with the number of customers or
+# products is kept in fixed-size sketches (utils/sketches.py):
+#   - product sales/quantities, customer spend/purchase counts: Count-Min sketches
+#   - top products / top customers: the top_k keys by Count-Min sales / spend
+#   - unique customers per day, unique products per tracked customer (counted
+#     from the moment the customer entered the top k) and the overall distinct
+#     customers/products: HyperLogLog
+# finalize() turns the sketches into the usual aggregates structure, so
+# data_processor and generate_sales_report work unchanged; `products` and
+# `customers` then only hold the tracked heavy hitters, and the error bounds
+# are reported under aggregates["approximate"].
+#
+# The Count-Min error bound is epsilon * (total weight), so with the default
+# epsilon = error * CMS_EPSILON_SHARE a key holding 1% of the revenue is off
+# by at most `error` of its own value (with probability 1 - delta).
+# The sketches cost a per-row Python loop: 8-12x slower than the exact engine
+# at 10k rows (0.23-0.28s vs 0.023-0.029s), worth it only when memory is the limit.
+
+from utils.sketches import CountMinSketch, HyperLogLog, TopK, hash_key
+
+CMS_EPSILON_SHARE= 0.01
+CMS_DELTA= 0.01
+
+# a) Empty sketch state---
+def new_approx_aggregates(error= 0.01, top_k= 100, cms_epsilon= None, cms_delta= CMS_DELTA):
+    if cms_epsilon is None:
+        cms_epsilon= error * CMS_EPSILON_SHARE
+    return {
+        "total_revenue": 0.0,
+        "total_transactions": 0,
+        "regions": {},
+        "daily": {},        # date -> {total_revenue, transaction_count, unique_customers (HLL)}
+        "sketches": {
+            "error": error,
+            "top_products": TopK(top_k),
+            "top_customers": TopK(top_k),
+            "product_sales": CountMinSketch(cms_epsilon, cms_delta),
+            "product_quantity": CountMinSketch(cms_epsilon, cms_delta),
+            "customer_spend": CountMinSketch(cms_epsilon, cms_delta),
+            "customer_purchases": CountMinSketch(cms_epsilon, cms_delta),
+            "distinct_products": HyperLogLog(error),
+            "distinct_customers": HyperLogLog(error)
+        }
+    }
+
+# b) Add one transaction (same parsing rules as aggregator.add_transaction)---
+def add_transaction(aggregates, txn):
+    try:
+        qty= int(txn.get("Quantity", 0))
+        price= float(txn.get("UnitPrice", 0.0))
+        amount= qty * price
+        region= str(txn.get("Region", "Unknown")).strip()
+        p_name= str(txn.get("ProductName", "Unknown")).strip()
+        c_id= str(txn.get("CustomerID", "Unknown")).strip()
+        dt= str(txn.get("Date", "Unknown")).strip()
+    except (ValueError, TypeError, KeyError, AttributeError):
+        return False
+    sketches= aggregates["sketches"]
+
+    aggregates["total_revenue"] += amount
+    aggregates["total_transactions"] += 1
+
+    region_data= aggregates["regions"].get(region)
+    if region_data is None:
+        region_data= aggregates["regions"][region]= {"total_sales": 0.0, "transaction_count": 0}
+    region_data["total_sales"] += amount
+    region_data["transaction_count"] += 1
+
+    product_hash= hash_key(p_name)
+    sketches["top_products"].offer(p_name, sketches["product_sales"].add_hash(product_hash, amount))
+    sketches["product_quantity"].add_hash(product_hash, qty)
+    sketches["distinct_products"].add_hash(product_hash)
+
+    customer_hash= hash_key(c_id)
+    customer_slot= sketches["top_customers"].offer(c_id, sketches["customer_spend"].add_hash(customer_hash, amount))
+    if customer_slot is not None:
+        if "unique_products" not in customer_slot:
+            # per tracked customer only, so a coarser sketch is enough
+            customer_slot["unique_products"]= HyperLogLog(max(sketches["error"], 0.05))
+        customer_slot["unique_products"].add_hash(product_hash)
+    sketches["customer_purchases"].add_hash(customer_hash)
+    sketches["distinct_customers"].add_hash(customer_hash)
+
+    daily_data= aggregates["daily"].get(dt)
+    if daily_data is None:
+        daily_data= aggregates["daily"][dt]= {
+            "total_revenue": 0.0,
+            "transaction_count": 0,
+            "unique_customers": HyperLogLog(sketches["error"])
+        }
+    daily_data["total_revenue"] += amount
+    daily_data["transaction_count"] += 1
+    if c_id:
+        daily_data["unique_customers"].add_hash(customer_hash)
+    return True
+
+# c) Sketches -> aggregates structure + error bounds---
+def finalize(aggregates):
+    sketches= aggregates["sketches"]
+    products= {}
+    for p_name, slot in sketches["top_products"].top():
+        product_hash= hash_key(p_name)
+        products[p_name]= {
+            "total_sales": sketches["product_sales"].estimate_hash(product_hash),
+            "total_quantity": int(sketches["product_quantity"].estimate_hash(product_hash))
+        }
+    customers= {}
+    for c_id, slot in sketches["top_customers"].top():
+        customer_hash= hash_key(c_id)
+        customers[c_id]= {
+            "total_spent": sketches["customer_spend"].estimate_hash(customer_hash),
+            "purchase_count": int(sketches["customer_purchases"].estimate_hash(customer_hash)),
+            "unique_products": slot["unique_products"]
+        }
+    aggregates["products"]= products
+    aggregates["customers"]= customers
+    aggregates["approximate"]= {
+        "distinct_products": sketches["distinct_products"].count(),
+        "distinct_customers": sketches["distinct_customers"].count(),
+        "distinct_relative_error": sketches["distinct_customers"].relative_error,
+        # absolute overestimate bounds, each holding with probability 1 - error_probability
+        "product_sales_error_bound": sketches["product_sales"].error_bound,
+        "product_quantity_error_bound": sketches["product_quantity"].error_bound,
+        "customer_spend_error_bound": sketches["customer_spend"].error_bound,
+        "customer_purchases_error_bound": sketches["customer_purchases"].error_bound,
+        "cms_epsilon": sketches["product_sales"].epsilon,
+        "error_probability": sketches["product_sales"].delta,
+        "top_k": sketches["top_products"].k
+    }
+    return aggregates
+
+def aggregate_transactions(transactions, error= 0.01, top_k= 100, cms_epsilon= None, cms_delta= CMS_DELTA):
+    aggregates= new_approx_aggregates(error= error, top_k= top_k, cms_epsilon= cms_epsilon, cms_delta= cms_delta)
+    for txn in transactions:
+        add_transaction(aggregates, txn)
+    return finalize(aggregates)
@@ -0,0 +1,314 @@
+# COLUMNAR TRANSACTION STORE-----
+# Holds transactions as NumPy columns instead of one dict per row.
+# Quantity/UnitPrice/amount are typed arrays and Region/ProductID/ProductName/
+# CustomerID/Date are dictionary encoded (integer code per row + one list of
+# distinct values), so the rollups become bincount/unique group-bys.
+
+import numpy as np
+
+CATEGORICAL_COLUMNS= ["Region", "ProductID", "ProductName", "CustomerID", "Date"]
+
+BITMAP_LIMIT= 1 << 24      # distinct (group, value) pairs are counted in a bitmap up to this many cells
+
+class TransactionTable:
+    def __init__(self, transaction_ids, quantity, price, codes, categories, first_seen_order= False):
+        self.transaction_ids= transaction_ids     # numpy str array
+        self.quantity= quantity                   # int64
+        self.price= price                         # float64
+        self.amount= quantity * price             # float64
+        self.codes= codes                         # column -> int32 codes
+        self.categories= categories               # column -> list of distinct values (code order)
+        # True when every category is present and codes follow first appearance (as encoded),
+        # so the rollups can take the code order as row order
+        self.first_seen_order= first_seen_order
+
+    def __len__(self):
+        return len(self.quantity)
+
+    def values(self, column):
+        # decoded values of one categorical column
+        return [self.categories[column][c] for c in self.codes[column].tolist()]
+
+    def filter(self, mask):
+        # new table with the rows where mask is True, categories are shared
+        return TransactionTable(
+            self.transaction_ids[mask],
+            self.quantity[mask],
+            self.price[mask],
+            {col: codes[mask] for col, codes in self.codes.items()},
+            self.categories
+        )
+
+    def iter_transactions(self):
+        # yields rows back as transaction dicts (for enrichment/writers)
+        decoded= {col: self.values(col) for col in CATEGORICAL_COLUMNS}
+        quantity= self.quantity.tolist()
+        price= self.price.tolist()
+        for i, t_id in enumerate(self.transaction_ids.tolist()):
+            yield {
+                "TransactionID": t_id,
+                "Date": decoded["Date"][i],
+                "ProductID": decoded["ProductID"][i],
+                "ProductName": decoded["ProductName"][i],
+                "Quantity": quantity[i],
+                "UnitPrice": price[i],
+                "CustomerID": decoded["CustomerID"][i],
+                "Region": decoded["Region"][i]
+            }
+
+    def aggregate(self):
+        return aggregate_table(self)
+
+# a) Dictionary encoding---- codes follow first appearance, like dict insertion order
+def encode_column(values):
+    lookup= {}
+    codes= np.fromiter(
+        (lookup.setdefault(v, len(lookup)) for v in values),
+        dtype= np.int32
+    )
+    return codes, list(lookup)
+
+# same codes/categories as encode_column for a NumPy string array, without a Python loop per row:
+# the fixed width values are packed into 64 bit keys (exact up to 8 bytes, hashed above that,
+# a hash collision is caught by comparing every value with its group's first value)
+def encode_array(values):
+    if len(values) == 0:
+        return np.zeros(0, dtype= np.int32), []
+    values= np.ascontiguousarray(values)
+    width= values.dtype.itemsize
+    raw= values.view(np.uint8).reshape(len(values), width)
+    if width % 8:
+        padded= np.zeros((len(values), width + 8 - width % 8), dtype= np.uint8)
+        padded[:, :width]= raw
+        raw= padded
+    words= raw.view(np.uint64)
+    keys= words[:, 0].copy()
+    for i in range(1, words.shape[1]):
+        keys *= np.uint64(1099511628211)
+        keys ^= words[:, i]
+    first_seen, inverse= first_seen_groups(keys)
+    # hash collisions: equal values have equal (zero padded) words
+    if words.shape[1] > 1 and not (words[first_seen[inverse]] == words).all():
+        first_seen, inverse= first_seen_groups(values)
+    # codes follow first appearance
+    order= np.argsort(first_seen, kind= "stable")
+    rank= np.empty(len(order), dtype= np.int32)
+    rank[order]= np.arange(len(order), dtype= np.int32)
+    return rank[inverse], values[first_seen[order]].tolist()
+
+# (first row of each distinct value, group of each row)--- with up to `few` distinct keys each row is
+# looked up in a small table of the distinct keys (multiplicative hash without collisions among them),
+# with more of them one sort of all rows is faster
+def first_seen_groups(keys, sample= 4096, few= 256):
+    distinct= sorted_distinct(keys[:sample])
+    inverse= None
+    while keys.dtype == np.uint64 and len(distinct) <= few:
+        inverse= lookup_slots(keys, distinct)
+        if inverse is None:
+            break
+        missing= distinct[inverse] != keys
+        if not missing.any():
+            break
+        distinct= sorted_distinct(np.concatenate([distinct, keys[missing]]))
+        inverse= None
+    if inverse is None:
+        order= np.argsort(keys)
+        ordered= keys[order]
+        new_group= np.empty(len(keys), dtype= bool)
+        new_group[0]= True
+        new_group[1:]= ordered[1:] != ordered[:-1]
+        inverse= np.empty(len(keys), dtype= np.int64)
+        inverse[order]= np.cumsum(new_group) - 1
+        return np.minimum.reduceat(order, np.flatnonzero(new_group)), inverse
+    first_seen= np.full(len(distinct), len(keys), dtype= np.int64)
+    np.minimum.at(first_seen, inverse, np.arange(len(keys)))
+    return first_seen, inverse
+
+# sorted distinct values (np.unique without its options, which imports numpy.ma on its first call)
+def sorted_distinct(values):
+    values= np.sort(values)
+    return values[np.concatenate([[True], values[1:] != values[:-1]])] if len(values) else values
+
+HASH_MULTIPLIERS= np.array([0x9E3779B97F4A7C15, 0xC2B2AE3D27D4EB4F, 0x165667B19E3779F9, 0xFF51AFD7ED558CCD], dtype= np.uint64)
+
+# index of each key in the sorted `distinct` keys (any index for a key that is not one of them),
+# None when no multiplier spreads the distinct keys over the table without a collision
+def lookup_slots(keys, distinct):
+    bits= 2 * max(len(distinct) - 1, 1).bit_length() + 1
+    shift= np.uint64(64 - bits)
+    for multiplier in HASH_MULTIPLIERS:
+        slots= (distinct * multiplier) >> shift
+        ordered= np.sort(slots)
+        if (ordered[1:] != ordered[:-1]).all():
+            table= np.zeros(1 << bits, dtype= np.int32)
+            table[slots]= np.arange(len(distinct), dtype= np.int32)
+            return table[(keys * multiplier) >> shift]
+    return None
+
+# b) Build a table from parsed/validated transaction dicts---
+def table_from_transactions(transactions):
+    ids, qty, price= [], [], []
+    raw= {col: [] for col in CATEGORICAL_COLUMNS}
+    for txn in transactions:
+        try:
+            q= int(txn.get("Quantity", 0))
+            p= float(txn.get("UnitPrice", 0.0))
+            row= {col: str(txn.get(col, "Unknown")).strip() for col in CATEGORICAL_COLUMNS}
+        except (ValueError, TypeError, KeyError, AttributeError):
+            continue
+        ids.append(str(txn.get("TransactionID", "")))
+        qty.append(q)
+        price.append(p)
+        for col in CATEGORICAL_COLUMNS:
+            raw[col].append(row[col])
+    return table_from_columns(ids, qty, price, raw)
+
+def table_from_columns(transaction_ids, quantity, price, raw_columns):
+    codes, categories= {}, {}
+    for col in CATEGORICAL_COLUMNS:
+        codes[col], categories[col]= encode_column(raw_columns[col])
+    return TransactionTable(
+        np.asarray(transaction_ids, dtype= str),
+        np.asarray(quantity, dtype= np.int64),
+        np.asarray(price, dtype= np.float64),
+        codes,
+        categories,
+        first_seen_order= True
+    )
+
+def empty_table():
+    return table_from_columns([], [], [], {col: [] for col in CATEGORICAL_COLUMNS})
+
+# one table from several (e.g. one per input file)--- categories are merged and codes remapped
+def concat_tables(tables):
+    if not tables:
+        return empty_table()
+    if len(tables) == 1:
+        return tables[0]
+    codes, categories= {}, {}
+    for col in CATEGORICAL_COLUMNS:
+        lookup= {}
+        parts= []
+        for table in tables:
+            remap= np.array([lookup.setdefault(v, len(lookup)) for v in table.categories[col]], dtype= np.int32)
+            parts.append(remap[table.codes[col]] if len(remap) else table.codes[col])
+        codes[col]= np.concatenate(parts)
+        categories[col]= list(lookup)
+    return TransactionTable(
+        np.concatenate([table.transaction_ids for table in tables]),
+        np.concatenate([table.quantity for table in tables]),
+        np.concatenate([table.price for table in tables]),
+        codes,
+        categories,
+        # merged codes are numbered table by table, in row order
+        first_seen_order= all(table.first_seen_order for table in tables)
+    )
+
+# Region/amount filters with the same rules and counters as file_handler.validate_and_filter
+def filter_table(table, filter_summary, region= None, min_amount= None, max_amount= None):
+    if region is not None:
+        region_key= str(region).strip().lower()
+        matches= np.array([r.strip().lower() == region_key for r in table.categories["Region"]], dtype= bool)
+        keep= matches[table.codes["Region"]] if len(matches) else np.zeros(len(table), dtype= bool)
+        filter_summary["filtered_by_region"] += int(len(table) - keep.sum())
+        table= table.filter(keep)
+    keep= np.ones(len(table), dtype= bool)
+    if min_amount is not None:
+        keep &= table.amount >= float(min_amount)
+    if max_amount is not None:
+        keep &= table.amount <= float(max_amount)
+    filter_summary["filtered_by_amount"] += int(len(table) - keep.sum())
+    table= table.filter(keep)
+    filter_summary["final_count"]= len(table)
+    return table
+
+# c) Vectorized group-bys---
+def group_sum(codes, size, weights= None):
+    return np.bincount(codes, weights= weights, minlength= size)
+
+def appearance_order(codes, size, first_seen_order= False):
+    # codes present in this table, ordered by first row they appear in
+    # (a filtered table keeps the parent categories, so code order is not enough)
+    if first_seen_order:
+        return range(size)
+    first_index= np.full(size, len(codes), dtype= np.int64)
+    np.minimum.at(first_index, codes, np.arange(len(codes)))
+    present= np.flatnonzero(first_index < len(codes))
+    return present[np.argsort(first_index[present], kind= "stable")].tolist()
+
+def top_groups(table, column, k, weights= None):
+    # k largest groups of one categorical column by amount (or `weights`), argpartition instead of a full sort
+    from utils import ranking
+    totals= group_sum(table.codes[column], len(table.categories[column]), table.amount if weights is None else weights)
+    return [(table.categories[column][i], float(totals[i])) for i in ranking.top_k_indices(totals, k).tolist()]
+
+def distinct_pairs_per_group(group_codes, other_codes, other_size, size):
+    # number of distinct `other` values per group, via unique (group, other) pairs
+    if len(group_codes) == 0:
+        return np.zeros(size, dtype= np.int64)
+    pairs= group_codes.astype(np.int64) * other_size + other_codes
+    if size * other_size <= BITMAP_LIMIT:
+        seen= np.zeros(size * other_size, dtype= bool)
+        seen[pairs]= True
+        return seen.reshape(size, other_size).sum(axis= 1)
+    return np.bincount(np.unique(pairs) // other_size, minlength= size)
+
+# d) Aggregate a table into the same structure as aggregator.aggregate_transactions---
+# distinct counts (unique_products, unique_customers) are ints instead of sets
+def aggregate_table(table):
+    amount= table.amount
+    aggregates= {
+        "total_revenue": float(amount.sum()),
+        "total_transactions": len(table),
+        "regions": {},
+        "products": {},
+        "customers": {},
+        "daily": {}
+    }
+
+    region_codes= table.codes["Region"]
+    regions= table.categories["Region"]
+    sales= group_sum(region_codes, len(regions), amount).tolist()
+    counts= group_sum(region_codes, len(regions)).tolist()
+    for i in appearance_order(region_codes, len(regions), table.first_seen_order):
+        region= regions[i]
+        aggregates["regions"][region]= {"total_sales": sales[i], "transaction_count": counts[i]}
+
+    product_codes= table.codes["ProductName"]
+    products= table.categories["ProductName"]
+    sales= group_sum(product_codes, len(products), amount).tolist()
+    quantities= group_sum(product_codes, len(products), table.quantity).astype(np.int64).tolist()
+    counts= group_sum(product_codes, len(products)).tolist()
+    for i in appearance_order(product_codes, len(products), table.first_seen_order):
+        p_name= products[i]
+        aggregates["products"][p_name]= {"total_sales": sales[i], "total_quantity": quantities[i]}
+
+    customer_codes= table.codes["CustomerID"]
+    customers= table.categories["CustomerID"]
+    spent= group_sum(customer_codes, len(customers), amount).tolist()
+    counts= group_sum(customer_codes, len(customers)).tolist()
+    unique_products= distinct_pairs_per_group(customer_codes, product_codes, len(products), len(customers)).tolist()
+    for i in appearance_order(customer_codes, len(customers), table.first_seen_order):
+        c_id= customers[i]
+        aggregates["customers"][c_id]= {
+            "total_spent": spent[i],
+            "purchase_count": counts[i],
+            "unique_products": unique_products[i]
+        }
+
+    date_codes= table.codes["Date"]
+    dates= table.categories["Date"]
+    revenue= group_sum(date_codes, len(dates), amount).tolist()
+    counts= group_sum(date_codes, len(dates)).tolist()
+    # empty customer ids are not counted as customers (same as the row engine)
+    has_customer= np.array([bool(c) for c in customers], dtype= bool)[customer_codes] if len(customers) else np.zeros(0, dtype= bool)
+    unique_customers= distinct_pairs_per_group(
+        date_codes[has_customer], customer_codes[has_customer], len(customers), len(dates)).tolist()
+    for i in appearance_order(date_codes, len(dates), table.first_seen_order):
+        dt= dates[i]
+        aggregates["daily"][dt]= {
+            "total_revenue": revenue[i],
+            "transaction_count": counts[i],
+            "unique_customers": unique_customers[i]
+        }
+    return aggregates
@@ -0,0 +1,76 @@
+# SYNTHETIC SALES DATA GENERATOR-----
+# Writes pipe delimited sales files in the same layout as data/sales_data.txt,
+# at any scale, with the dirty rows parse_transactions/validate_and_filter
+# have to deal with: comma thousands separators, commas inside product names,
+# zero quantities, negative prices, bad T/P/C ID prefixes, missing fields,
+# wrong field counts and blank lines. Output is deterministic for a given seed.
+
+import random
+import sys
+from datetime import date, timedelta
+
+HEADER= "TransactionID|Date|ProductID|ProductName|Quantity|UnitPrice|CustomerID|Region"
+REGIONS= ["North", "South", "East", "West"]
+PRODUCTS= [
+    ("P101", "Laptop", 45000), ("P102", "Mouse", 600), ("P103", "Keyboard", 1500),
+    ("P104", "Monitor", 15000), ("P105", "Webcam", 3000), ("P106", "Headphones", 2500),
+    ("P107", "USB Cable", 200), ("P108", "External Hard Drive", 4500),
+    ("P109", "Wireless Mouse", 1200), ("P110", "Laptop Charger", 2000)
+]
+NAME_VARIANTS= ["", " HD", " Premium", " Wireless", " 1TB", " Gaming"]
+DIRTY_KINDS= ["thousands", "name_comma", "zero_qty", "negative_price", "bad_tid",
+              "bad_pid", "bad_cid", "missing_field", "field_count", "blank"]
+
+def generate_rows(rows, seed= 42, dirty_fraction= 0.12, customers= None, days= 31, start_date= date(2024, 12, 1)):
+    rng= random.Random(seed)
+    customers= customers or max(30, rows // 20)
+    for i in range(1, rows + 1):
+        p_id, p_name, base_price= rng.choice(PRODUCTS)
+        p_name= p_name + rng.choice(NAME_VARIANTS)
+        qty= rng.randint(1, 10)
+        price= int(base_price * rng.uniform(0.5, 1.5))
+        fields= [
+            f"T{i:03d}",
+            (start_date + timedelta(days= rng.randrange(days))).isoformat(),
+            p_id,
+            p_name,
+            str(qty),
+            str(price),
+            f"C{rng.randint(1, customers):03d}",
+            rng.choice(REGIONS)
+        ]
+        if rng.random() < dirty_fraction:
+            kind= rng.choice(DIRTY_KINDS)
+            if kind == "thousands":
+                fields[5]= f"{price:,}"
+            elif kind == "name_comma":
+                fields[3]= p_name.replace(" ", ",", 1) if " " in p_name else p_name + ",Pro"
+            elif kind == "zero_qty":
+                fields[4]= "0"
+            elif kind == "negative_price":
+                fields[5]= str(-price)
+            elif kind == "bad_tid":
+                fields[0]= "X" + fields[0][1:]
+            elif kind == "bad_pid":
+                fields[2]= "Q" + fields[2][1:]
+            elif kind == "bad_cid":
+                fields[6]= "D" + fields[6][1:]
+            elif kind == "missing_field":
+                fields[rng.choice([1, 6, 7])]= ""
+            elif kind == "field_count":
+                fields= fields[:-1]
+            elif kind == "blank":
+                yield ""
+                continue
+        yield "|".join(fields)
+
+def generate_sales_file(filename, rows, seed= 42, dirty_fraction= 0.12):
+    with open(filename, mode= "w", encoding= "utf-8", newline= "\n", buffering= 1024 * 1024) as file:
+        file.write(HEADER + "\n")
+        for line in generate_rows(rows, seed= seed, dirty_fraction= dirty_fraction):
+            file.write(line + "\n")
+    return filename
+
+if __name__ == "__main__":
+    # python -m utils.data_generator out.txt 1000000 [seed]
+    generate_sales_file(sys.argv[1], int(sys.argv[2]), seed= int(sys.argv[3]) if len(sys.argv) > 3 else 42)
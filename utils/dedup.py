@@ -0,0 +1,233 @@
+# DUPLICATE TRANSACTION REMOVAL-----
+# Re-delivered files or overlapping extracts repeat TransactionIDs, and every
+# copy used to be counted again in the revenue. This stage keeps one row per
+# TransactionID, either the first one seen ("first") or the last one ("last",
+# e.g. a corrected re-delivery), and counts the dropped rows in
+# filter_summary["duplicates_removed"]. It runs on the validated rows before
+# the region/amount filters, so the copy kept does not depend on the filters.
+#
+# TransactionIDs such as "T001" are packed into one integer (prefix letter,
+# digit count, value), other IDs are kept as strings, so the keys are exact.
+#   - in-memory runs: one Python set of those keys
+#   - tables: np.unique over the ID column
+#   - streaming/incremental runs: a bloom filter answers "never seen" for most
+#     rows; only on a bloom hit the ID is checked in an sqlite file of all IDs
+#     seen, so memory stays fixed however many rows go through. "last" needs
+#     to know the future rows, so it reads the stream twice (the first pass
+#     only notes the position of the last copy of each duplicated ID).
+
+import math
+import os
+import re
+import sqlite3
+import tempfile
+from hashlib import blake2b
+
+import numpy as np
+
+from utils import file_handler
+
+POLICIES= ("first", "last")
+ID_PATTERN= re.compile(r"([A-Za-z]?)([0-9]{1,15})")
+DEFAULT_CAPACITY= 10_000_000
+DEFAULT_ERROR_RATE= 0.01
+FLUSH_EVERY= 50_000
+MASK64= (1 << 64) - 1
+
+def check_policy(policy):
+    if policy not in POLICIES:
+        raise ValueError(f"Unknown duplicate policy: {policy} (use one of {', '.join(POLICIES)})")
+
+# a) TransactionID -> exact key---
+def encode_id(t_id):
+    # "T001" -> (ord("T") << 54) | (3 << 50) | 1; the digit count keeps "T001" and "T1" apart
+    t_id= str(t_id).strip()
+    match= ID_PATTERN.fullmatch(t_id)
+    if match is None:
+        return t_id
+    prefix, digits= match.groups()
+    return (ord(prefix) if prefix else 0) << 54 | len(digits) << 50 | int(digits)
+
+def count_removed(filter_summary, removed):
+    if filter_summary is not None:
+        filter_summary["duplicates_removed"]= filter_summary.get("duplicates_removed", 0) + removed
+
+# b) In-memory runs--- list in, list out (order of the kept copies)
+def dedupe_transactions(transactions, filter_summary= None, policy= "first"):
+    check_policy(policy)
+    seen= set()
+    kept= []
+    rows= transactions if policy == "first" else reversed(transactions)
+    for txn in rows:
+        key= encode_id(txn["TransactionID"])
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(txn)
+    if policy == "last":
+        kept.reverse()
+    count_removed(filter_summary, len(transactions) - len(kept))
+    return kept
+
+# columnar tables (utils/columnar.py)--- first/last row of each ID, kept in table order
+def dedupe_table(table, filter_summary= None, policy= "first"):
+    check_policy(policy)
+    if len(table) == 0:
+        count_removed(filter_summary, 0)
+        return table
+    ids= np.char.strip(table.transaction_ids)
+    if policy == "first":
+        keep_rows= np.unique(ids, return_index= True)[1]
+    else:
+        keep_rows= len(ids) - 1 - np.unique(ids[::-1], return_index= True)[1]
+    removed= len(table) - len(keep_rows)
+    count_removed(filter_summary, removed)
+    if removed == 0:
+        return table
+    keep= np.zeros(len(table), dtype= bool)
+    keep[keep_rows]= True
+    return table.filter(keep)
+
+# c) Bloom filter--- no false negatives, `error_rate` false positives at `capacity` keys
+class BloomFilter:
+    def __init__(self, capacity= DEFAULT_CAPACITY, error_rate= DEFAULT_ERROR_RATE):
+        self.capacity= capacity
+        self.error_rate= error_rate
+        self.size= max(64, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes= max(1, round(self.size / capacity * math.log(2)))
+        self.bits= bytearray((self.size + 7) // 8)
+
+    def positions(self, key):
+        if isinstance(key, int):
+            h= (key * 0x9E3779B97F4A7C15) & MASK64
+            h= ((h ^ (h >> 31)) * 0xBF58476D1CE4E5B9) & MASK64
+            h ^= h >> 29
+        else:
+            h= int.from_bytes(blake2b(key.encode("utf-8"), digest_size= 8).digest(), "little")
+        # double hashing: h1 + i*h2
+        h1, h2= h & 0xFFFFFFFF, (h >> 32) | 1
+        size= self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        # True when every bit was already set (the key may have been added before)
+        bits= self.bits
+        present= True
+        for pos in self.positions(key):
+            byte, mask= pos >> 3, 1 << (pos & 7)
+            if not bits[byte] & mask:
+                bits[byte] |= mask
+                present= False
+        return present
+
+# d) Exact "seen before?" for streams--- bloom filter in front of an sqlite file of every key.
+# Keys are written with a `generation` (one per run of a persistent store), so the keys of a run
+# whose results were never saved can be dropped again with discard_after().
+class SeenIds:
+    def __init__(self, path= None, bloom= None, capacity= DEFAULT_CAPACITY, error_rate= DEFAULT_ERROR_RATE, generation= 0):
+        self.temporary= path is None
+        if path is None:
+            handle, path= tempfile.mkstemp(prefix= "seen_ids_", suffix= ".sqlite")
+            os.close(handle)
+        else:
+            directory= os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok= True)
+        self.path= path
+        self.bloom= bloom if bloom is not None else BloomFilter(capacity, error_rate)
+        self.db= sqlite3.connect(path)
+        self.db.execute("CREATE TABLE IF NOT EXISTS int_ids (id INTEGER PRIMARY KEY, generation INTEGER)")
+        self.db.execute("CREATE TABLE IF NOT EXISTS text_ids (id TEXT PRIMARY KEY, generation INTEGER)")
+        self.generation= generation
+        self.pending= set()
+        self.added= 0
+        self.disk_checks= 0
+
+    def seen(self, key):
+        # True if the key was added before, otherwise adds it
+        if not self.bloom.add(key):
+            self.remember(key)
+            return False
+        if key in self.pending:
+            return True
+        self.disk_checks += 1
+        table= "int_ids" if isinstance(key, int) else "text_ids"
+        if self.db.execute(f"SELECT 1 FROM {table} WHERE id = ?", (key,)).fetchone() is not None:
+            return True
+        self.remember(key)
+        return False
+
+    def remember(self, key):
+        self.added += 1
+        self.pending.add(key)
+        if len(self.pending) >= FLUSH_EVERY:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        generation= self.generation
+        with self.db:
+            self.db.executemany("INSERT OR IGNORE INTO int_ids VALUES (?, ?)", ((k, generation) for k in self.pending if isinstance(k, int)))
+            self.db.executemany("INSERT OR IGNORE INTO text_ids VALUES (?, ?)", ((k, generation) for k in self.pending if not isinstance(k, int)))
+        self.pending.clear()
+
+    def discard_after(self, generation):
+        with self.db:
+            self.db.execute("DELETE FROM int_ids WHERE generation > ?", (generation,))
+            self.db.execute("DELETE FROM text_ids WHERE generation > ?", (generation,))
+
+    def keys(self):
+        for table in ("int_ids", "text_ids"):
+            for (key,) in self.db.execute(f"SELECT id FROM {table}"):
+                yield key
+
+    def resize(self, capacity):
+        # new bloom filter for `capacity` keys, refilled from the stored keys
+        self.flush()
+        self.bloom= BloomFilter(capacity, self.bloom.error_rate)
+        for key in self.keys():
+            self.bloom.add(key)
+
+    # a persistent store keeps only what flush() wrote; pending keys of an unfinished run are dropped
+    def close(self):
+        self.db.close()
+        if self.temporary:
+            try:
+                os.remove(self.path)
+            except OSError:
+                pass
+
+# e) Streaming runs--- make_rows(filter_summary) returns a fresh iterator of validated rows
+# (called twice for "last", the first pass counts into a scratch summary)
+def iter_dedupe(make_rows, filter_summary, policy= "first", capacity= DEFAULT_CAPACITY, error_rate= DEFAULT_ERROR_RATE):
+    check_policy(policy)
+    filter_summary.setdefault("duplicates_removed", 0)
+    last_copy= None
+    if policy == "last":
+        # position of the last copy of every duplicated ID (only duplicates are kept in memory)
+        last_copy= {}
+        seen= SeenIds(capacity= capacity, error_rate= error_rate)
+        try:
+            for position, txn in enumerate(make_rows(file_handler.new_filter_summary())):
+                key= encode_id(txn["TransactionID"])
+                if seen.seen(key):
+                    last_copy[key]= position
+        finally:
+            seen.close()
+
+    seen= SeenIds(capacity= capacity, error_rate= error_rate) if last_copy is None else None
+    try:
+        for position, txn in enumerate(make_rows(filter_summary)):
+            key= encode_id(txn["TransactionID"])
+            if last_copy is not None:
+                duplicate= key in last_copy and last_copy[key] != position
+            else:
+                duplicate= seen.seen(key)
+            if duplicate:
+                count_removed(filter_summary, 1)
+                continue
+            yield txn
+    finally:
+        if seen is not None:
+            seen.close()
@@ -0,0 +1,187 @@
+# ENRICHED DATA WRITER-----
+# One writer for enriched_sales_data.txt, shared by api_handler and main.py.
+# Rows are formatted in batches and handed to csv.writer.writerows through a
+# large write buffer. Text output can be gzip or zstd compressed, and a binary
+# columnar format (.npy per column, strings dictionary encoded, written batch by
+# batch) is available for downstream jobs that want to memory-map the data.
+
+import csv
+import gzip
+import io
+import json
+import os
+import struct
+import time
+
+ENRICHED_COLUMNS= [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region",
+    "API_category", "API_brand", "API_rating", "API_match"
+]
+NUMERIC_COLUMNS= {"Quantity": "int64", "UnitPrice": "float64", "API_rating": "float64", "API_match": "bool"}
+BATCH_SIZE= 10000
+BUFFER_SIZE= 1024 * 1024
+COMPRESSION_SUFFIX= {"gzip": ".gz", "zstd": ".zst"}
+
+# a) Output stream for text (plain / gzip / zstd)---
+def open_text_output(filename, compression= None, buffer_size= BUFFER_SIZE):
+    if compression is None:
+        return open(filename, mode= "w", encoding= "utf-8", newline= "\n", buffering= buffer_size)
+    if compression == "gzip":
+        raw= gzip.open(filename, mode= "wb", compresslevel= 6)
+    elif compression == "zstd":
+        import zstandard   # optional dependency, only needed for zstd output
+        raw= zstandard.ZstdCompressor().stream_writer(open(filename, mode= "wb"), closefd= True)
+    else:
+        raise ValueError(f"Unknown compression: {compression}")
+    return io.TextIOWrapper(io.BufferedWriter(raw, buffer_size), encoding= "utf-8", newline= "\n")
+
+def output_filename(filename, fmt= "text", compression= None):
+    if fmt == "columnar":
+        return filename if filename.endswith(".cols") else filename + ".cols"
+    suffix= COMPRESSION_SUFFIX.get(compression, "")
+    return filename if filename.endswith(suffix) else filename + suffix
+
+def iter_batches(rows, batch_size):
+    batch= []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            yield batch
+            batch= []
+    if batch:
+        yield batch
+
+# b) Pipe delimited text---
+def write_text(enriched_transactions, filename, compression, batch_size, buffer_size):
+    with open_text_output(filename, compression, buffer_size) as file:
+        writer= csv.writer(file, delimiter="|")
+        writer.writerow(ENRICHED_COLUMNS)  # write header
+        if hasattr(enriched_transactions, "iter_rows"):
+            rows= enriched_transactions.iter_rows(ENRICHED_COLUMNS)
+        else:
+            rows= (
+                [txn.get(col, "") for col in ENRICHED_COLUMNS]
+                for txn in enriched_transactions
+            )
+        count= 0
+        for batch in iter_batches(rows, batch_size):
+            writer.writerows(batch)
+            count += len(batch)
+    return count
+
+# c) Binary columnar--- <name>.cols/ with one .npy per column + meta.json
+# Every batch is appended to the column files as soon as it is full, so memory holds one batch
+# (plus the string dictionaries). The .npy headers have a fixed size and get the final row
+# count when the writer closes; meta.json lists the rows of every segment (batch) written.
+NPY_HEADER_SIZE= 128
+
+def npy_header(dtype, rows):
+    import numpy as np
+
+    header= repr({"descr": np.lib.format.dtype_to_descr(np.dtype(dtype)), "fortran_order": False, "shape": (rows,)})
+    header= header.ljust(NPY_HEADER_SIZE - 11) + "\n"
+    return np.lib.format.magic(1, 0) + struct.pack("<H", len(header)) + header.encode("latin1")
+
+def write_columnar(enriched_transactions, dirname, batch_size= BATCH_SIZE, buffer_size= BUFFER_SIZE):
+    import numpy as np
+
+    os.makedirs(dirname, exist_ok= True)
+    dtypes= dict(NUMERIC_COLUMNS)
+    dtypes.update({col: "int32" for col in ENRICHED_COLUMNS if col not in NUMERIC_COLUMNS})
+    paths= {col: os.path.join(dirname, f"{col}.npy" if col in NUMERIC_COLUMNS else f"{col}.codes.npy") for col in dtypes}
+    lookups= {col: {} for col in dtypes if col not in NUMERIC_COLUMNS}
+    files= {}
+    segments= []
+    try:
+        for col, path in paths.items():
+            files[col]= open(path, mode= "wb", buffering= buffer_size)
+            files[col].write(npy_header(dtypes[col], 0))
+        for batch in iter_batches(enriched_transactions, batch_size):
+            for col in NUMERIC_COLUMNS:
+                values= [txn.get(col) for txn in batch]
+                if col == "API_rating":
+                    values= [float("nan") if value is None else value for value in values]
+                else:
+                    values= [value or 0 for value in values]
+                files[col].write(np.asarray(values, dtype= dtypes[col]).tobytes())
+            for col, lookup in lookups.items():
+                codes= []
+                for txn in batch:
+                    value= txn.get(col)
+                    value= "" if value is None else str(value)
+                    code= lookup.get(value)
+                    if code is None:
+                        code= lookup[value]= len(lookup)
+                    codes.append(code)
+                files[col].write(np.asarray(codes, dtype= np.int32).tobytes())
+            segments.append(len(batch))
+        count= sum(segments)
+        for col, file in files.items():
+            file.seek(0)
+            file.write(npy_header(dtypes[col], count))
+    finally:
+        for file in files.values():
+            file.close()
+
+    with open(os.path.join(dirname, "meta.json"), mode= "w", encoding= "utf-8") as file:
+        json.dump({
+            "rows": count,
+            "columns": ENRICHED_COLUMNS,
+            "numeric": NUMERIC_COLUMNS,
+            "categories": {col: list(lookup) for col, lookup in lookups.items()},
+            "segments": segments
+        }, file)
+    return count
+
+# memory-maps a columnar output back: numeric arrays, and (codes, categories) per string column
+def load_columnar(dirname):
+    import numpy as np
+
+    with open(os.path.join(dirname, "meta.json"), mode= "r", encoding= "utf-8") as file:
+        meta= json.load(file)
+    columns= {}
+    for col in meta["columns"]:
+        if col in meta["numeric"]:
+            columns[col]= np.load(os.path.join(dirname, f"{col}.npy"), mmap_mode= "r")
+        else:
+            columns[col]= (np.load(os.path.join(dirname, f"{col}.codes.npy"), mmap_mode= "r"), meta["categories"][col])
+    return columns
+
+def output_size(path):
+    if os.path.isdir(path):
+        return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+    return os.path.getsize(path)
+
+# d) Shared entry point--- returns write stats, prints throughput
+def write_enriched_data(enriched_transactions, filename= "data/enriched_sales_data.txt", fmt= "text",
+                        compression= None, batch_size= BATCH_SIZE, buffer_size= BUFFER_SIZE):
+    path= output_filename(filename, fmt, compression)
+    directory= os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok= True)
+    start= time.perf_counter()
+    try:
+        if fmt == "columnar":
+            rows= write_columnar(enriched_transactions, path, batch_size, buffer_size)
+        else:
+            rows= write_text(enriched_transactions, path, compression, batch_size, buffer_size)
+    except ImportError as e:
+        print(f"Error writing enriched data: {e} (install it to use {compression} output)")
+        return None
+    except Exception as e:
+        print(f"Error writing enriched data: {e}")
+        return None
+    seconds= time.perf_counter() - start
+    size= output_size(path)
+    stats= {
+        "path": path,
+        "rows": rows,
+        "bytes": size,
+        "seconds": seconds,
+        "rows_per_sec": rows / seconds if seconds > 0 else 0.0,
+        "mb_per_sec": size / (1024 * 1024) / seconds if seconds > 0 else 0.0
+    }
+    print(f"Enriched data written to {path}: {rows} rows, {size / 1024:.1f} KB "
+          f"in {seconds:.3f}s ({stats['rows_per_sec']:,.0f} rows/s, {stats['mb_per_sec']:.2f} MB/s)")
+    return stats
@@ -1,75 +1,156 @@
 ## Task 1.1  Read Sales data with Encoding handling
 
 import csv
+import glob
+from utils.records import Transaction
+
+# input paths or glob patterns -> sorted list of files (a path that matches nothing is kept so it reports "File not found")
+def expand_inputs(patterns):
+    filenames= []
+    for pattern in patterns:
+        matches= sorted(glob.glob(pattern)) if glob.has_magic(pattern) else [pattern]
+        if not matches:
+            print(f"No files match {pattern}")
+        for filename in matches:
+            if filename not in filenames:
+                filenames.append(filename)
+    return filenames
+
 def read_sales_data(filename, file_encoder):
+    return ['|'.join(row) for row in iter_sales_data(filename, file_encoder)]
+
+# Streaming reader--- yields the split fields of one row at a time, so the file is never held in memory
+def iter_sales_data(filename, file_encoder):
     try:
-        data= []
         with open(filename, mode= "r", encoding= file_encoder, newline= "\n") as file:
             file_data= csv.reader(file, delimiter="|")
-            next(file_data)   # skips header
+            next(file_data, None)   # skips header
             for row in file_data:
                 if row and any(field.strip() for field in row):  # removes empty lines
-                    data.append('|'.join(row))
-        return data
+                    yield row
     except UnicodeDecodeError:
         print(f"File cannot be decoded using {file_encoder}")
-        return []
     except FileNotFoundError:
         print (f"File not found")
-        return []
-    
-    
+
+# rows of an already decoded block of lines (used by the chunked/incremental readers)
+def iter_text_rows(text):
+    for row in csv.reader(text.split("\n"), delimiter="|"):
+        if row and any(field.strip() for field in row):  # removes empty lines
+            yield row
+
+
 
 # Task 1.2 - Parse and clean data
 
 def parse_transactions(raw_lines):
+    return list(iter_parse_transactions(raw_lines))
+
+# Streaming parser--- accepts raw '|' joined lines or already split field lists
+def iter_parse_transactions(rows):
+    for row in rows:
+        txn= parse_transaction(row)
+        if txn is not None:
+            yield txn
+
+def parse_transaction(row):
+    if isinstance(row, str):
+        row= row.split('|')
+    fields = [f.strip() for f in row]
+     # Skip rows with incorrect number of fields
+    if len(fields) != 8:
+        return None
+    t_id, dt, p_id, p_name, qty, price, c_id, region= fields
+
+    # Handles commas within product names by replacing commas with space....
+    p_name_clean= p_name.replace(",", " ").strip()
+
+    # Removes commas from numeric fields (eg. price = 45,000 or quantity = 10,000)
+    qty_clean= qty.replace(",", "").strip()
+    price_clean= price.replace(",", "").strip()
 
-    data= []
-    for line in raw_lines:
-        fields = [f.strip() for f in line.split('|')]
-        t_id, dt, p_id, p_name, qty, price, c_id, region= fields
-         # Skip rows with incorrect number of fields
-        if len(fields) != 8:
-            continue
+    try:
+        qty= int(qty_clean)
+        price= float(price_clean)
+    except ValueError:
+        return None
 
-        # Handles commas within product names by replacing commas with space....
-        p_name_clean= p_name.replace(",", " ").strip()
+    # compact __slots__ record with interned categorical fields (utils/records.py)
+    return Transaction(t_id, dt, p_id, p_name_clean, qty, price, c_id, region)
 
-        # Removes commas from numeric fields (eg. price = 45,000 or quantity = 10,000)
-        qty_clean= qty.replace(",", "").strip()
-        price_clean= price.replace(",", "").strip()
 
-        try:
-            qty= int(qty_clean)
-            price= float(price_clean)
-        except ValueError:
-            continue
-        
-        data.append(
-            {"TransactionID": t_id,
-             "Date": dt,
-             "ProductID": p_id,
-             "ProductName": p_name_clean,
-             "Quantity": qty,
-             "UnitPrice": price,
-             "CustomerID": c_id,
-             "Region": region
-             }
-        )
-
-    return data
+# Task 1.3 Data Validation & Filtering
 
+REQUIRED_FIELDS= [
+    "TransactionID", "Date", "ProductID", "ProductName",
+    "Quantity", "UnitPrice", "CustomerID", "Region"
+]
+
+# checks one transaction and normalises its numeric fields, returns True if valid
+def validate_transaction(txn):
+    # must be a dict or a Transaction record
+    if txn.__class__ is Transaction:
+        # records always have every field--- plain attribute reads
+        values= (txn.TransactionID, txn.Date, txn.ProductID, txn.ProductName,
+                 txn.Quantity, txn.UnitPrice, txn.CustomerID, txn.Region)
+    elif isinstance(txn, dict):
+        if any(k not in txn for k in REQUIRED_FIELDS):
+            return False
+        values= tuple(txn[k] for k in REQUIRED_FIELDS)
+    else:
+        return False
+    # all required fields must be non empty
+    if None in values or "" in values:
+        return False
+    t_id, _, p_id, _, qty, price, c_id, _= values
+    # Fixing wrong ID formats
+    if not str(t_id).startswith("T"):
+        return False
+    if not str(p_id).startswith("P"):
+        return False
+    if not str(c_id).startswith("C"):
+        return False
+    # quantity and unit price must be positive
+    try:
+        qty= int(qty)
+        price= float(price)
+    except (ValueError, TypeError):
+        return False
+    if qty<= 0 or price <= 0:
+        return False
+    # stores normalised numeric values----
+    if txn.__class__ is Transaction:
+        txn.Quantity= qty
+        txn.UnitPrice= price
+    else:
+        txn["Quantity"]= qty
+        txn["UnitPrice"]= price
+    return True
+
+def new_filter_summary():
+    return {
+        "total_input": 0,
+        "invalid": 0,
+        "filtered_by_region": 0,
+        "filtered_by_amount": 0,
+        "final_count": 0
+    }
 
-# Task 1.3 Data Validation & Filtering
+# adds the counters of a partial summary (one file or chunk) into `target`
+def merge_filter_summary(target, other):
+    # nested counts (e.g. rejected_by_rule from utils/rules_engine.py) are merged key by key
+    for key, value in other.items():
+        if isinstance(value, dict):
+            counts= target.setdefault(key, {})
+            for name, count in value.items():
+                counts[name]= counts.get(name, 0) + count
+        else:
+            target[key]= target.get(key, 0) + value
+    return target
 
 def validate_and_filter(transactions, region= None, min_amount= None, max_amount= None):
     # validates transactions and applies optional filters
 
-    required_fields= [ 
-        "TransactionID", "Date", "ProductID", "ProductName", 
-        "Quantity", "UnitPrice", "CustomerID", "Region"
-    ]
-    
     total_input= len(transactions)
     invalid_count= 0
     valid_transactions= []
@@ -77,45 +158,15 @@ def validate_and_filter(transactions, region= None, min_amount= None, max_amount
     regions= sorted({
         t.get("Region", "").strip()
         for t in transactions
-        if isinstance(t, dict) and t.get("Region")
+        if isinstance(t, (dict, Transaction)) and t.get("Region")
     })
     print("Available regions:", regions if regions else "None Found")
 
     #---validate transactions-----
     for txn in transactions:
-    # must be a dict
-        if not isinstance(txn, dict):
+        if not validate_transaction(txn):
             invalid_count += 1
             continue
-    # all required fields must be non empty
-        missing= [k for k in required_fields if k not in txn or txn.get(k) in (None, "")]
-        if missing:
-            invalid_count += 1
-            continue
-    # Fixing wrong ID formats
-        if not str(txn["TransactionID"]).startswith("T"):
-            invalid_count+= 1
-            continue
-        if not str(txn["ProductID"]).startswith("P"):
-            invalid_count+= 1
-            continue
-        if not str(txn["CustomerID"]).startswith("C"):
-            invalid_count+= 1
-            continue
-    # quantity and unit price must be positive
-        try:
-            qty= int(txn["Quantity"])
-            price= float(txn["UnitPrice"])
-        except (ValueError, TypeError):
-            invalid_count+= 1
-            continue
-        if qty<= 0 or price <= 0:
-            invalid_count+= 1
-            continue
-# stores normalised numeric values----
-        txn["Quantity"]= qty
-        txn["UnitPrice"]= price
-
         valid_transactions.append(txn)
 
 # Amount range print--computed from valid transactions--
@@ -153,13 +204,43 @@ def validate_and_filter(transactions, region= None, min_amount= None, max_amount
         filtered_by_amount+= before- len(valid_transactions)
         print(f"After max_amount filter ({max_amount}): {len(valid_transactions)} records")
 
-    filter_summary= {
+    filter_summary= new_filter_summary()
+    filter_summary.update({
         "total_input": total_input,
         "invalid": invalid_count,
         "filtered_by_region": filtered_by_region,
         "filtered_by_amount": filtered_by_amount,
         "final_count": len(valid_transactions)
-    }
+    })
     
     return valid_transactions, filter_summary
 
+# Streaming validation & filtering--- yields one transaction at a time and
+# keeps the same counters as validate_and_filter in `filter_summary`
+def iter_validate_and_filter(transactions, filter_summary, region= None, min_amount= None, max_amount= None):
+    return iter_filter(iter_validate(transactions, filter_summary), filter_summary, region, min_amount, max_amount)
+
+# the two halves on their own, so a stage can run between validation and the filters (e.g. utils/dedup.py)
+def iter_validate(transactions, filter_summary):
+    for txn in transactions:
+        filter_summary["total_input"] += 1
+        if not validate_transaction(txn):
+            filter_summary["invalid"] += 1
+            continue
+        yield txn
+
+def iter_filter(transactions, filter_summary, region= None, min_amount= None, max_amount= None):
+    region_key= str(region).strip().lower() if region is not None else None
+    min_value= float(min_amount) if min_amount is not None else None
+    max_value= float(max_amount) if max_amount is not None else None
+
+    for txn in transactions:
+        if region_key is not None and str(txn.get("Region", "")).strip().lower() != region_key:
+            filter_summary["filtered_by_region"] += 1
+            continue
+        amount= txn["Quantity"]* txn["UnitPrice"]
+        if (min_value is not None and amount < min_value) or (max_value is not None and amount > max_value):
+            filter_summary["filtered_by_amount"] += 1
+            continue
+        filter_summary["final_count"] += 1
+        yield txn
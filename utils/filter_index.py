@@ -0,0 +1,114 @@
+# FILTER INDEX-----
+# Validates the parsed transactions once and builds secondary indexes over the
+# valid rows, so any region / amount range / date range combination is answered
+# by intersecting row masks instead of rescanning every transaction:
+#   - region  -> one boolean row mask per region (case/space insensitive, like validate_and_filter)
+#   - amount  -> Quantity*UnitPrice sorted once, ranges found with binary search
+#   - date    -> distinct dates sorted once, rows ordered by date, ranges found with binary search
+# Results keep the original row order and come with the same filter_summary
+# counters as file_handler.validate_and_filter. With a dedup_policy the valid
+# rows keep one copy per TransactionID (utils/dedup.py) before any filter.
+
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+from utils import dedup, file_handler
+
+class FilterIndex:
+    def __init__(self, transactions, dedup_policy= None):
+        self.total_input= len(transactions)
+        self.transactions= []
+        for txn in transactions:
+            if file_handler.validate_transaction(txn):
+                self.transactions.append(txn)
+        self.invalid= self.total_input - len(self.transactions)
+        self.dedup_policy= dedup_policy
+        self.duplicates= 0
+        if dedup_policy:
+            valid_count= len(self.transactions)
+            self.transactions= dedup.dedupe_transactions(self.transactions, policy= dedup_policy)
+            self.duplicates= valid_count - len(self.transactions)
+        n= len(self.transactions)
+
+        # region masks---
+        region_keys= [str(t.get("Region", "")).strip().lower() for t in self.transactions]
+        self.region_masks= {}
+        for key in dict.fromkeys(region_keys):
+            self.region_masks[key]= np.zeros(n, dtype= bool)
+        for row, key in enumerate(region_keys):
+            self.region_masks[key][row]= True
+
+        # amounts, sorted---
+        self.amounts= np.fromiter((t["Quantity"]* t["UnitPrice"] for t in self.transactions), dtype= np.float64, count= n)
+        self.amount_order= np.argsort(self.amounts, kind= "stable")
+        self.sorted_amounts= self.amounts[self.amount_order]
+
+        # dates, sorted (ISO dates sort as strings)---
+        date_values= [str(t.get("Date", "")).strip() for t in self.transactions]
+        self.dates= sorted(set(date_values))
+        position= {dt: i for i, dt in enumerate(self.dates)}
+        date_codes= np.fromiter((position[dt] for dt in date_values), dtype= np.int32, count= n)
+        self.date_order= np.argsort(date_codes, kind= "stable")
+        self.sorted_date_codes= date_codes[self.date_order]
+
+    def __len__(self):
+        return len(self.transactions)
+
+    def regions(self):
+        return list(self.region_masks)
+
+    def amount_range(self):
+        if len(self.sorted_amounts) == 0:
+            return None, None
+        return float(self.sorted_amounts[0]), float(self.sorted_amounts[-1])
+
+    # a) Single predicates -> row masks---
+    def region_mask(self, region):
+        mask= self.region_masks.get(str(region).strip().lower())
+        return mask if mask is not None else np.zeros(len(self), dtype= bool)
+
+    def amount_mask(self, min_amount= None, max_amount= None):
+        lo= 0 if min_amount is None else np.searchsorted(self.sorted_amounts, float(min_amount), side= "left")
+        hi= len(self) if max_amount is None else np.searchsorted(self.sorted_amounts, float(max_amount), side= "right")
+        mask= np.zeros(len(self), dtype= bool)
+        mask[self.amount_order[lo:hi]]= True
+        return mask
+
+    def date_mask(self, start_date= None, end_date= None):
+        first= 0 if start_date is None else bisect_left(self.dates, str(start_date).strip())
+        last= len(self.dates) if end_date is None else bisect_right(self.dates, str(end_date).strip())
+        lo= np.searchsorted(self.sorted_date_codes, first, side= "left")
+        hi= np.searchsorted(self.sorted_date_codes, last, side= "left")
+        mask= np.zeros(len(self), dtype= bool)
+        mask[self.date_order[lo:hi]]= True
+        return mask
+
+    # b) Any combination--- (row ids in file order, filter_summary)
+    def row_ids(self, region= None, min_amount= None, max_amount= None, start_date= None, end_date= None):
+        filter_summary= file_handler.new_filter_summary()
+        filter_summary["total_input"]= self.total_input
+        filter_summary["invalid"]= self.invalid
+        if self.dedup_policy:
+            filter_summary["duplicates_removed"]= self.duplicates
+        mask= np.ones(len(self), dtype= bool)
+        count= len(self)
+        if region is not None:
+            mask &= self.region_mask(region)
+            filter_summary["filtered_by_region"]= count - int(mask.sum())
+            count -= filter_summary["filtered_by_region"]
+        if min_amount is not None or max_amount is not None:
+            mask &= self.amount_mask(min_amount, max_amount)
+            filter_summary["filtered_by_amount"]= count - int(mask.sum())
+            count -= filter_summary["filtered_by_amount"]
+        if start_date is not None or end_date is not None:
+            mask &= self.date_mask(start_date, end_date)
+            filter_summary["filtered_by_date"]= count - int(mask.sum())
+        rows= np.flatnonzero(mask)
+        filter_summary["final_count"]= len(rows)
+        return rows, filter_summary
+
+    def query(self, region= None, min_amount= None, max_amount= None, start_date= None, end_date= None):
+        rows, filter_summary= self.row_ids(region, min_amount, max_amount, start_date, end_date)
+        transactions= self.transactions
+        return [transactions[row] for row in rows.tolist()], filter_summary
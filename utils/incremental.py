@@ -0,0 +1,207 @@
+# INCREMENTAL PROCESSING-----
+# For append-only sales files. The state saved after each run holds, per file,
+# the byte offset already processed and the aggregates and filter summary so
+# far. The next run parses only the bytes appended since then and merges them
+# into the saved state, so the cost is proportional to the new data. If a file
+# was truncated/rewritten or the filters changed, the state is rebuilt from the
+# start of the file(s).
+# A trailing line without '\n' is treated as still being written and is left
+# for the next run.
+#
+# Without a dedup policy every file has its own state. With one, all input
+# files of the run share one state (keyed by the input set): one set of the
+# TransactionIDs seen (see utils/dedup.py: a bloom filter in the state and an
+# sqlite file of the IDs next to it), so a row re-delivered in another file is
+# skipped before the filters, like a full --dedup run. The IDs of a run count
+# only once its state is saved. A copy appended to an earlier file after its
+# twin in a later file was counted is the one skipped (the one counted first
+# is kept), and a rewritten file rebuilds the whole input set.
+
+import hashlib
+import os
+import pickle
+
+from utils import aggregator, dedup, file_handler
+
+STATE_DIR= ".cache/incremental"
+STATE_VERSION= 2
+HEAD_BYTES= 4096
+MIN_SEEN_CAPACITY= 1024
+
+def state_file(filenames, state_dir):
+    inputs= "\n".join(os.path.abspath(filename) for filename in filenames)
+    key= hashlib.blake2b(inputs.encode("utf-8"), digest_size= 16).hexdigest()
+    return os.path.join(state_dir, key + ".pkl")
+
+def head_hash(filename, length):
+    with open(filename, mode= "rb") as file:
+        return hashlib.blake2b(file.read(length), digest_size= 16).hexdigest()
+
+def new_file_state():
+    return {
+        "offset": 0,
+        "head_hash": None,
+        "aggregates": aggregator.new_aggregates(),
+        "filter_summary": file_handler.new_filter_summary()
+    }
+
+def new_state(filenames, filters):
+    return {
+        "version": STATE_VERSION,
+        "inputs": [os.path.abspath(filename) for filename in filenames],
+        "filters": filters,
+        "files": {os.path.abspath(filename): new_file_state() for filename in filenames},
+        "seen_bloom": None,         # sized from the row count on first use
+        "seen_count": 0,
+        "seen_generation": 0,       # last run whose IDs belong to this state
+        "duplicates_skipped": 0
+    }
+
+def load_state(path):
+    try:
+        with open(path, mode= "rb") as file:
+            return pickle.load(file)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+        return None
+
+def save_state(path, state):
+    os.makedirs(os.path.dirname(path), exist_ok= True)
+    with open(path + ".tmp", mode= "wb") as file:
+        pickle.dump(state, file, protocol= pickle.HIGHEST_PROTOCOL)
+    os.replace(path + ".tmp", path)
+
+def seen_ids_file(path):
+    return path[:-len(".pkl")] + ".ids.sqlite"
+
+# the saved offset of a file still points into the same data
+def unchanged(filename, file_state):
+    try:
+        file_size= os.path.getsize(filename)
+    except FileNotFoundError:
+        return True     # reported (and left out) when the file is read
+    offset= file_state["offset"]
+    return file_size >= offset and head_hash(filename, min(offset, HEAD_BYTES)) == file_state["head_hash"]
+
+# skips transactions whose TransactionID was already counted
+def skip_seen(transactions, state, filter_summary, seen):
+    for txn in transactions:
+        if seen.seen(dedup.encode_id(txn["TransactionID"])):
+            state["duplicates_skipped"] += 1
+            dedup.count_removed(filter_summary, 1)
+            continue
+        yield txn
+
+# complete lines appended since the saved offset -> (text, bytes consumed), (None, 0) if nothing new
+def new_lines(filename, file_state, file_encoder):
+    with open(filename, mode= "rb") as file:
+        file.seek(file_state["offset"])
+        tail= file.read()
+    start= 0
+    if file_state["offset"] == 0:
+        start= tail.find(b"\n") + 1   # skips header
+        if start == 0:
+            return None, 0
+    end= tail.rfind(b"\n") + 1        # only complete lines
+    if end <= start:
+        print(f"No new transactions in {filename} since the last run.")
+        return None, 0
+    try:
+        return tail[start:end].decode(file_encoder), end
+    except UnicodeDecodeError:
+        print(f"File cannot be decoded using {file_encoder}")
+        return None, 0
+
+# a) Process the appended tails and return the merged (aggregates, filter_summary)---
+def update(filenames, file_encoder= "utf-8", region= None, min_amount= None, max_amount= None, state_dir= STATE_DIR,
+           dedup_policy= None):
+    # dedup_policy "first" skips TransactionIDs already counted (in any input file, in this or an earlier run)
+    if isinstance(filenames, str):
+        filenames= [filenames]
+    if dedup_policy not in (None, "first"):
+        raise ValueError("Incremental runs can only keep the first copy of a TransactionID")
+    groups= [filenames] if dedup_policy else [[filename] for filename in filenames]
+    aggregates= aggregator.new_aggregates()
+    filter_summary= file_handler.new_filter_summary()
+    if dedup_policy:
+        filter_summary["duplicates_removed"]= 0
+    for group in groups:
+        for file_aggregates, file_summary in update_group(group, file_encoder, (region, min_amount, max_amount, dedup_policy), state_dir):
+            aggregator.merge_aggregates(aggregates, file_aggregates)
+            file_handler.merge_filter_summary(filter_summary, file_summary)
+    return aggregates, filter_summary
+
+# one saved state for `filenames`--- returns [(aggregates, filter_summary)] of the files found, in input order
+def update_group(filenames, file_encoder, filters, state_dir):
+    region, min_amount, max_amount, dedup_policy= filters
+    path= state_file(filenames, state_dir)
+    state= load_state(path)
+    if (state is None or state.get("version") != STATE_VERSION or state["filters"] != filters
+            or state["inputs"] != [os.path.abspath(filename) for filename in filenames]
+            or not all(unchanged(filename, state["files"][os.path.abspath(filename)]) for filename in filenames)):
+        if state is not None:
+            print("Sales file was rewritten or filters changed, rebuilding incremental state.")
+        state= new_state(filenames, filters)
+        try:
+            os.remove(seen_ids_file(path))
+        except FileNotFoundError:
+            pass
+
+    found= [filename for filename in filenames if os.path.exists(filename)]
+    for filename in filenames:
+        if filename not in found:
+            print(f"File not found: {filename}")
+    seen= None
+    processed= False
+    try:
+        for filename in found:
+            file_state= state["files"][os.path.abspath(filename)]
+            text, end= new_lines(filename, file_state, file_encoder)
+            if not end:
+                continue
+            processed= True
+            summary= file_state["filter_summary"]
+            before= summary["total_input"]
+            valid= file_handler.iter_validate(
+                file_handler.iter_parse_transactions(file_handler.iter_text_rows(text)), summary)
+            if dedup_policy:
+                seen= open_seen_ids(path, state, seen, text.count("\n"))
+                summary.setdefault("duplicates_removed", 0)
+                valid= skip_seen(valid, state, summary, seen)
+            for txn in file_handler.iter_filter(valid, summary, region= region, min_amount= min_amount, max_amount= max_amount):
+                aggregator.add_transaction(file_state["aggregates"], txn)
+            print(f"Processed {summary['total_input'] - before} new transactions from {filename} "
+                  f"({end} bytes, {state['duplicates_skipped']} duplicate IDs skipped so far).")
+            file_state["offset"] += end
+            file_state["head_hash"]= head_hash(filename, min(file_state["offset"], HEAD_BYTES))
+
+        if seen is not None:
+            # the IDs of this run are committed first and become part of the state with save_state;
+            # if the state is not saved, the next run discards them (discard_after)
+            seen.flush()
+            state["seen_bloom"]= seen.bloom
+            state["seen_count"] += seen.added
+            state["seen_generation"]= seen.generation
+        if processed:
+            save_state(path, state)
+    finally:
+        if seen is not None:
+            seen.close()
+    return results(state, found)
+
+def results(state, filenames):
+    file_states= [state["files"][os.path.abspath(filename)] for filename in filenames]
+    return [(file_state["aggregates"], dict(file_state["filter_summary"])) for file_state in file_states]
+
+# ID set of the saved state (opened on the first file with new lines), the bloom filter is
+# sized for the IDs so far plus the new lines and grown when a later file needs more room
+def open_seen_ids(path, state, seen, new_rows):
+    if seen is None:
+        needed= state["seen_count"] + new_rows
+        bloom= state["seen_bloom"] or dedup.BloomFilter(max(MIN_SEEN_CAPACITY, 2 * needed))
+        seen= dedup.SeenIds(seen_ids_file(path), bloom= bloom, generation= state["seen_generation"] + 1)
+        seen.discard_after(state["seen_generation"])
+    else:
+        needed= state["seen_count"] + seen.added + new_rows
+    if seen.bloom.capacity < needed:
+        seen.resize(max(MIN_SEEN_CAPACITY, 2 * needed))
+    return seen
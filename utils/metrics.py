@@ -0,0 +1,153 @@
+# PIPELINE METRICS-----
+# Per-stage instrumentation for main.py: wall time, CPU time, rows in/out,
+# rows/sec and the growth of the process peak RSS during the stage. Results
+# can be written as JSON and as a Prometheus textfile (node_exporter textfile
+# collector format, written atomically) so slow ingest/report runs can be
+# alerted on. cProfile and tracemalloc can be switched on for chosen stages.
+# With --overlap some stages run on a background thread: they keep their
+# names, are marked "overlapped", and their wall time is only the wait for the
+# background work (whose own duration is in "background_seconds").
+
+import cProfile
+import json
+import os
+import resource
+import sys
+import time
+import tracemalloc
+
+def peak_rss_bytes():
+    # ru_maxrss is KB on Linux, bytes on macOS
+    peak= resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+class PipelineMetrics:
+    def __init__(self, profile_stages= (), trace_stages= (), profile_dir= "output/profiles"):
+        self.profile_stages= set(profile_stages)
+        self.trace_stages= set(trace_stages)
+        self.profile_dir= profile_dir
+        self.stages= []
+        self.current= None
+        self.started_at= time.time()
+
+    # a) Stage start / end---
+    def start(self, name, rows_in= None, overlapped= False):
+        if self.current is not None:
+            self.end()
+        self.current= {
+            "stage": name,
+            "rows_in": rows_in,
+            "overlapped": overlapped,
+            "_wall": time.perf_counter(),
+            "_cpu": time.process_time(),
+            "_rss": peak_rss_bytes(),
+            "_profiler": None
+        }
+        if name in self.profile_stages:
+            self.current["_profiler"]= cProfile.Profile()
+            self.current["_profiler"].enable()
+        if name in self.trace_stages:
+            tracemalloc.start()
+
+    def end(self, rows_out= None, background_seconds= None):
+        record= self.current
+        if record is None:
+            return None
+        self.current= None
+        wall= time.perf_counter() - record.pop("_wall")
+        cpu= time.process_time() - record.pop("_cpu")
+        rss_before= record.pop("_rss")
+        profiler= record.pop("_profiler")
+        rows= rows_out if rows_out is not None else record["rows_in"]
+        record.update({
+            "rows_out": rows_out,
+            "wall_seconds": wall,
+            "cpu_seconds": cpu,
+            "rows_per_sec": rows / wall if rows and wall > 0 else None,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "peak_rss_delta_bytes": peak_rss_bytes() - rss_before
+        })
+        if record["overlapped"]:
+            record["background_seconds"]= background_seconds
+        if profiler is not None:
+            profiler.disable()
+            os.makedirs(self.profile_dir, exist_ok= True)
+            record["profile_file"]= os.path.join(self.profile_dir, f"{record['stage']}.prof")
+            profiler.dump_stats(record["profile_file"])
+        if record["stage"] in self.trace_stages and tracemalloc.is_tracing():
+            snapshot= tracemalloc.take_snapshot()
+            record["traced_peak_bytes"]= tracemalloc.get_traced_memory()[1]
+            record["top_allocations"]= [str(stat) for stat in snapshot.statistics("lineno")[:10]]
+            tracemalloc.stop()
+        self.stages.append(record)
+        return record
+
+    # b) Output---
+    def summary(self):
+        return {
+            "started_at": self.started_at,
+            "total_wall_seconds": sum(s["wall_seconds"] for s in self.stages),
+            "total_cpu_seconds": sum(s["cpu_seconds"] for s in self.stages),
+            "stages": self.stages
+        }
+
+    def write_json(self, path):
+        write_atomic(path, json.dumps(self.summary(), indent= 1))
+
+    def write_prometheus(self, path):
+        lines= []
+        gauges= [
+            ("wall_seconds", "Wall clock time of the pipeline stage"),
+            ("cpu_seconds", "CPU time of the pipeline stage"),
+            ("rows_in", "Rows entering the pipeline stage"),
+            ("rows_out", "Rows leaving the pipeline stage"),
+            ("rows_per_sec", "Throughput of the pipeline stage"),
+            ("peak_rss_delta_bytes", "Growth of the process peak RSS during the stage"),
+            ("background_seconds", "Time the overlapped stage took on the background thread")
+        ]
+        for key, help_text in gauges:
+            metric= f"sales_pipeline_stage_{key}"
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} gauge")
+            for record in self.stages:
+                if record.get(key) is not None:
+                    lines.append(f'{metric}{{stage="{record["stage"]}"}} {record[key]}')
+        lines.append("# HELP sales_pipeline_stage_overlapped 1 if the stage ran on the background thread (wall time is the wait)")
+        lines.append("# TYPE sales_pipeline_stage_overlapped gauge")
+        for record in self.stages:
+            lines.append(f'sales_pipeline_stage_overlapped{{stage="{record["stage"]}"}} {int(record["overlapped"])}')
+        summary= self.summary()
+        lines.append("# HELP sales_pipeline_total_wall_seconds Wall clock time of all instrumented stages")
+        lines.append("# TYPE sales_pipeline_total_wall_seconds gauge")
+        lines.append(f"sales_pipeline_total_wall_seconds {summary['total_wall_seconds']}")
+        lines.append("# HELP sales_pipeline_last_run_timestamp_seconds Unix time the run started")
+        lines.append("# TYPE sales_pipeline_last_run_timestamp_seconds gauge")
+        lines.append(f"sales_pipeline_last_run_timestamp_seconds {self.started_at}")
+        write_atomic(path, "\n".join(lines) + "\n")
+
+    def print_table(self):
+        print(f"{'stage':<16}{'wall s':>10}{'cpu s':>10}{'rows in':>10}{'rows out':>10}{'rows/s':>12}{'rss +MB':>9}")
+        for s in self.stages:
+            print(f"{s['stage'] + ('*' if s['overlapped'] else ''):<16}{s['wall_seconds']:>10.3f}{s['cpu_seconds']:>10.3f}"
+                  f"{s['rows_in'] if s['rows_in'] is not None else '-':>10}"
+                  f"{s['rows_out'] if s['rows_out'] is not None else '-':>10}"
+                  f"{s['rows_per_sec'] or 0:>12,.0f}{s['peak_rss_delta_bytes'] / (1024 * 1024):>9.1f}")
+        overlapped= [s for s in self.stages if s["overlapped"]]
+        if overlapped:
+            print("* ran on the background thread, wall s is the wait for it ("
+                  + ", ".join(f"{s['stage']} took {s['background_seconds'] or 0:.3f}s" for s in overlapped) + ")")
+
+# runs fn(*args) and returns (result, seconds), for work submitted to the background thread
+def timed(fn, *args):
+    start= time.perf_counter()
+    result= fn(*args)
+    return result, time.perf_counter() - start
+
+# textfile collectors may read at any time, so write to a temp file and rename
+def write_atomic(path, text):
+    directory= os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok= True)
+    with open(path + ".tmp", mode= "w", encoding= "utf-8") as file:
+        file.write(text)
+    os.replace(path + ".tmp", path)
@@ -0,0 +1,138 @@
+# MEMORY-MAPPED READER-----
+# Reads sales_data.txt through mmap and works on raw bytes: lines are found by
+# scanning for b'\n', fields by splitting on b'|'. Categorical fields are
+# dictionary encoded on their raw bytes, so each distinct Region/ProductID/
+# ProductName/CustomerID/Date is decoded once instead of once per row, and
+# Quantity/UnitPrice go straight into typed arrays. Applies the same parsing
+# and validation rules as file_handler.parse_transactions + validate_and_filter.
+
+import mmap
+import os
+import sys
+import time
+from array import array
+
+import numpy as np
+
+from utils import columnar, file_handler
+
+# field positions in a row
+T_ID, DATE, P_ID, P_NAME, QTY, PRICE, C_ID, REGION= range(8)
+CATEGORICAL_FIELDS= {"Region": REGION, "ProductID": P_ID, "ProductName": P_NAME, "CustomerID": C_ID, "Date": DATE}
+
+BLOCK_SIZE= 8 * 1024 * 1024
+
+# lines of the mapped file, split a whole block at a time (block ends on a newline)
+def iter_lines(mm, start):
+    size= len(mm)
+    while start < size:
+        end= mm.find(b"\n", min(start + BLOCK_SIZE, size))
+        if end == -1:
+            end= size
+        yield from mm[start:end].split(b"\n")
+        start= end + 1
+
+# a) Read + parse + validate into a TransactionTable---
+def read_sales_table(filename, file_encoder= "utf-8"):
+    filter_summary= file_handler.new_filter_summary()
+    transaction_ids= []
+    quantity= array("q")
+    price= array("d")
+    codes= {col: array("i") for col in CATEGORICAL_FIELDS}
+    lookups= {col: {} for col in CATEGORICAL_FIELDS}
+    # bound methods hoisted out of the row loop
+    encoders= [(codes[col].append, lookups[col], index) for col, index in CATEGORICAL_FIELDS.items()]
+    append_id, append_qty, append_price= transaction_ids.append, quantity.append, price.append
+
+    try:
+        with open(filename, mode= "rb") as file:
+            if os.fstat(file.fileno()).st_size == 0:
+                return columnar.empty_table(), filter_summary
+            with mmap.mmap(file.fileno(), 0, access= mmap.ACCESS_READ) as mm:
+                header_end= mm.find(b"\n")   # skips header
+                start= len(mm) if header_end == -1 else header_end + 1
+                for line in iter_lines(mm, start):
+                    # removes empty lines
+                    if not line.replace(b"|", b"").strip():
+                        continue
+                    # parse step--- rows with the wrong field count or bad numbers are dropped
+                    fields= [f.strip() for f in line.split(b"|")]
+                    if len(fields) != 8:
+                        continue
+                    # numeric fields may carry thousands separators (eg. 1,916)
+                    try:
+                        qty= int(fields[QTY].replace(b",", b""))
+                        unit_price= float(fields[PRICE].replace(b",", b""))
+                    except ValueError:
+                        continue
+                    filter_summary["total_input"] += 1
+
+                    # validation step--- all fields non empty, ID prefixes, positive numbers
+                    if not all(fields):
+                        filter_summary["invalid"] += 1
+                        continue
+                    if not (fields[T_ID].startswith(b"T") and fields[P_ID].startswith(b"P") and fields[C_ID].startswith(b"C")):
+                        filter_summary["invalid"] += 1
+                        continue
+                    if qty <= 0 or unit_price <= 0:
+                        filter_summary["invalid"] += 1
+                        continue
+                    # Handles commas within product names by replacing commas with space....
+                    fields[P_NAME]= fields[P_NAME].replace(b",", b" ").strip()
+
+                    append_id(fields[T_ID])
+                    append_qty(qty)
+                    append_price(unit_price)
+                    for append_code, lookup, index in encoders:
+                        code= lookup.get(fields[index])
+                        if code is None:
+                            code= lookup[fields[index]]= len(lookup)
+                        append_code(code)
+    except FileNotFoundError:
+        print (f"File not found")
+        return columnar.empty_table(), filter_summary
+
+    try:
+        # only the distinct values are decoded
+        categories= {col: [v.decode(file_encoder) for v in lookups[col]] for col in CATEGORICAL_FIELDS}
+        ids= np.array([t.decode(file_encoder) for t in transaction_ids], dtype= str)
+    except UnicodeDecodeError:
+        print(f"File cannot be decoded using {file_encoder}")
+        return columnar.empty_table(), file_handler.new_filter_summary()
+
+    filter_summary["final_count"]= len(quantity)
+    table= columnar.TransactionTable(
+        ids,
+        np.frombuffer(quantity, dtype= np.int64),
+        np.frombuffer(price, dtype= np.float64),
+        {col: np.frombuffer(codes[col], dtype= np.int32) for col in CATEGORICAL_FIELDS},
+        categories,
+        first_seen_order= True
+    )
+    return table, filter_summary
+
+# b) Ingest throughput---- existing reader vs mmap reader, in MB/s
+def measure_throughput(filename, file_encoder= "utf-8"):
+    size_mb= os.path.getsize(filename) / (1024 * 1024)
+    results= {}
+
+    start= time.perf_counter()
+    raw_lines= file_handler.read_sales_data(filename, file_encoder)
+    parsed= file_handler.parse_transactions(raw_lines)
+    valid= [t for t in parsed if file_handler.validate_transaction(t)]
+    elapsed= time.perf_counter() - start
+    results["csv_reader"]= {"seconds": elapsed, "rows": len(valid), "mb_per_sec": size_mb / elapsed if elapsed > 0 else 0.0}
+
+    start= time.perf_counter()
+    table, _= read_sales_table(filename, file_encoder)
+    elapsed= time.perf_counter() - start
+    results["mmap_reader"]= {"seconds": elapsed, "rows": len(table), "mb_per_sec": size_mb / elapsed if elapsed > 0 else 0.0}
+
+    print(f"Ingest throughput for {filename} ({size_mb:.2f} MB):")
+    for name, data in results.items():
+        print(f" {name:<12} {data['rows']} rows in {data['seconds']:.3f}s -> {data['mb_per_sec']:.2f} MB/s")
+    return results
+
+if __name__ == "__main__":
+    # python -m utils.mmap_reader data/sales_data.txt
+    measure_throughput(sys.argv[1] if len(sys.argv) > 1 else "data/sales_data.txt")
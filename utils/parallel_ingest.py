@@ -0,0 +1,72 @@
+# PARALLEL INGEST-----
+# Splits the sales file into byte ranges that start and end on a newline,
+# parses/validates/filters/aggregates each range in a separate process and
+# merges the partial aggregates in file order. The result is the same
+# aggregates + filter_summary the serial streaming pipeline produces.
+# Several files (e.g. one per store per day) share one pool and one merge.
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils import aggregator, file_handler
+
+# a) Byte ranges aligned on newline boundaries (header line excluded)---
+def split_file(filename, n_chunks):
+    file_size= os.path.getsize(filename)
+    with open(filename, mode= "rb") as file:
+        file.readline()   # skips header
+        data_start= file.tell()
+        chunk_size= max(1, (file_size - data_start) // max(1, n_chunks))
+        boundaries= [data_start]
+        while boundaries[-1] < file_size:
+            file.seek(min(boundaries[-1] + chunk_size, file_size))
+            file.readline()   # move forward to the next line start
+            boundaries.append(min(file.tell(), file_size))
+    return list(zip(boundaries[:-1], boundaries[1:]))
+
+# b) Worker--- one byte range -> (partial aggregates, partial filter summary)
+def process_chunk(task):
+    filename, file_encoder, start, end, region, min_amount, max_amount= task
+    with open(filename, mode= "rb") as file:
+        file.seek(start)
+        text= file.read(end - start).decode(file_encoder)
+    rows= file_handler.iter_text_rows(text)
+    filter_summary= file_handler.new_filter_summary()
+    valid= file_handler.iter_validate_and_filter(
+        file_handler.iter_parse_transactions(rows),
+        filter_summary,
+        region= region,
+        min_amount= min_amount,
+        max_amount= max_amount)
+    return aggregator.aggregate_transactions(valid), filter_summary
+
+# c) Parallel ingest driver--- `filenames` is one path or a list of paths
+def parallel_aggregate(filenames, file_encoder, workers, region= None, min_amount= None, max_amount= None):
+    if isinstance(filenames, str):
+        filenames= [filenames]
+    aggregates= aggregator.new_aggregates()
+    filter_summary= file_handler.new_filter_summary()
+    tasks= []
+    for filename in filenames:
+        try:
+            # a few chunks per worker so one slow range does not hold up the pool
+            ranges= split_file(filename, workers * 4)
+        except FileNotFoundError:
+            print (f"File not found: {filename}")
+            continue
+        tasks.extend(
+            (filename, file_encoder, start, end, region, min_amount, max_amount)
+            for start, end in ranges
+        )
+    if not tasks:
+        return aggregates, filter_summary
+    try:
+        with ProcessPoolExecutor(max_workers= workers) as pool:
+            # map() yields results in task order, so the merge keeps file order
+            for partial, partial_summary in pool.map(process_chunk, tasks):
+                aggregator.merge_aggregates(aggregates, partial)
+                file_handler.merge_filter_summary(filter_summary, partial_summary)
+    except UnicodeDecodeError:
+        print(f"File cannot be decoded using {file_encoder}")
+        return aggregator.new_aggregates(), file_handler.new_filter_summary()
+    return aggregates, filter_summary
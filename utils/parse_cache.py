@@ -0,0 +1,153 @@
+# PARSED DATA CACHE-----
+# Keeps the parsed + validated TransactionTable of each input file on disk as
+# one .npy file per column. Entries are keyed by the source path and the
+# encoding it was decoded with, and checked against its size, mtime and
+# content hash; a valid entry is loaded back with
+# np.load(mmap_mode="r"), so warm runs skip reading and parsing entirely.
+# The cache is capped in bytes and evicts the least recently used input file.
+
+import codecs
+import hashlib
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+from utils import columnar, file_handler, mmap_reader
+
+CACHE_DIR= ".cache/parsed"
+MAX_CACHE_BYTES= 512 * 1024 * 1024
+INDEX_FILE= "index.json"
+
+# a) Source file fingerprint---
+def content_hash(filename):
+    digest= hashlib.blake2b(digest_size= 16)
+    with open(filename, mode= "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+# the same bytes decode to different values under another encoding, so it is part of the key
+# (by codec name, "UTF8" and "utf-8" share one entry)
+def cache_key(filename, file_encoder= "utf-8"):
+    source= os.path.abspath(filename) + "\n" + codecs.lookup(file_encoder).name
+    return hashlib.blake2b(source.encode("utf-8"), digest_size= 16).hexdigest()
+
+# b) Index of cached entries (json, written atomically)---
+def load_index(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, INDEX_FILE), mode= "r", encoding= "utf-8") as file:
+            return json.load(file)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_index(cache_dir, index):
+    os.makedirs(cache_dir, exist_ok= True)
+    tmp_file= os.path.join(cache_dir, INDEX_FILE + ".tmp")
+    with open(tmp_file, mode= "w", encoding= "utf-8") as file:
+        json.dump(index, file, indent= 1)
+    os.replace(tmp_file, os.path.join(cache_dir, INDEX_FILE))
+
+def remove_entry(cache_dir, index, key):
+    shutil.rmtree(os.path.join(cache_dir, key), ignore_errors= True)
+    index.pop(key, None)
+
+# c) Is the cached entry still valid for the file on disk?---
+# size + mtime match -> valid; mtime changed but same content hash -> still valid
+def entry_is_valid(entry, filename):
+    stat= os.stat(filename)
+    if entry["size"] != stat.st_size:
+        return False
+    if entry["mtime_ns"] == stat.st_mtime_ns:
+        return True
+    if content_hash(filename) == entry["content_hash"]:
+        entry["mtime_ns"]= stat.st_mtime_ns
+        return True
+    return False
+
+# d) Write / read one entry---
+def store_table(entry_dir, table, filter_summary):
+    os.makedirs(entry_dir, exist_ok= True)
+    np.save(os.path.join(entry_dir, "transaction_ids.npy"), table.transaction_ids)
+    np.save(os.path.join(entry_dir, "quantity.npy"), table.quantity)
+    np.save(os.path.join(entry_dir, "price.npy"), table.price)
+    for col in columnar.CATEGORICAL_COLUMNS:
+        np.save(os.path.join(entry_dir, f"codes_{col}.npy"), table.codes[col])
+    with open(os.path.join(entry_dir, "meta.json"), mode= "w", encoding= "utf-8") as file:
+        json.dump({"categories": table.categories, "filter_summary": filter_summary,
+                   "first_seen_order": table.first_seen_order}, file)
+    return sum(
+        os.path.getsize(os.path.join(entry_dir, name)) for name in os.listdir(entry_dir)
+    )
+
+def load_table_entry(entry_dir):
+    def column(name):
+        return np.load(os.path.join(entry_dir, name + ".npy"), mmap_mode= "r")
+
+    with open(os.path.join(entry_dir, "meta.json"), mode= "r", encoding= "utf-8") as file:
+        meta= json.load(file)
+    table= columnar.TransactionTable(
+        column("transaction_ids"),
+        column("quantity"),
+        column("price"),
+        {col: column(f"codes_{col}") for col in columnar.CATEGORICAL_COLUMNS},
+        meta["categories"],
+        first_seen_order= meta.get("first_seen_order", False)
+    )
+    return table, meta["filter_summary"]
+
+# e) LRU eviction down to the byte cap---
+def evict(cache_dir, index, max_bytes):
+    total= sum(entry["bytes"] for entry in index.values())
+    for key in sorted(index, key= lambda k: index[k]["last_used"]):
+        if total <= max_bytes:
+            break
+        total -= index[key]["bytes"]
+        remove_entry(cache_dir, index, key)
+
+# f) Cached load--- returns (table, filter_summary) like mmap_reader.read_sales_table
+def load_table(filename, file_encoder= "utf-8", cache_dir= CACHE_DIR, max_bytes= MAX_CACHE_BYTES):
+    index= load_index(cache_dir)
+    key= cache_key(filename, file_encoder)
+    entry_dir= os.path.join(cache_dir, key)
+    entry= index.get(key)
+
+    try:
+        if entry is not None and entry_is_valid(entry, filename):
+            table, filter_summary= load_table_entry(entry_dir)
+            entry["last_used"]= time.time()
+            save_index(cache_dir, index)
+            print(f"Loaded {len(table)} parsed transactions from cache ({entry_dir})")
+            return table, dict(filter_summary)
+    except FileNotFoundError:
+        # source or cache files vanished--- fall through and rebuild
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        print(f"Ignoring unreadable cache entry {entry_dir}: {e}")
+
+    remove_entry(cache_dir, index, key)
+    if not os.path.exists(filename):
+        save_index(cache_dir, index)
+        print (f"File not found")
+        return columnar.empty_table(), file_handler.new_filter_summary()
+
+    stat= os.stat(filename)
+    table, filter_summary= mmap_reader.read_sales_table(filename, file_encoder)
+    try:
+        size= store_table(entry_dir, table, filter_summary)
+        index[key]= {
+            "path": os.path.abspath(filename),
+            "encoding": codecs.lookup(file_encoder).name,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": content_hash(filename),
+            "bytes": size,
+            "last_used": time.time()
+        }
+        evict(cache_dir, index, max_bytes)
+        save_index(cache_dir, index)
+    except OSError as e:
+        print(f"Could not write parse cache: {e}")
+    return table, filter_summary
@@ -0,0 +1,273 @@
+# MERGEABLE PARTIAL STATE-----
+# Serializable form of the aggregator rollups for map/reduce style runs: every
+# worker (process or machine) turns its shard into a partial state, states are
+# combined with merge_states() in any order and grouping, and finalize() gives
+# back aggregates + filter_summary that produce the same report as one serial
+# pass over all shards.
+#   - money sums are exact fractions ([numerator, denominator]), so merging is
+#     associative and commutative, not just up to float rounding
+#   - counts are ints, distinct values are sorted lists (or HyperLogLog
+#     registers when distinct_error is given, for compact states)
+#   - every key remembers where it was first seen as [shard, rank], finalize()
+#     orders keys by it so ties come out in the same order as a serial run
+#
+#   python -m utils.partial_state map data/sales_data.txt --shard 0/4 --out part0.json
+#   python -m utils.partial_state reduce part*.json --report output/sales_report.txt
+#   python -m utils.partial_state local data/sales_data.txt --workers 4
+
+import argparse
+import base64
+import json
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from fractions import Fraction
+
+from utils import aggregator, file_handler, parallel_ingest
+from utils.sketches import HyperLogLog
+
+STATE_FORMAT= "sales-partial-state"
+STATE_VERSION= 1
+
+# (field, kind) per group--- "sum" exact money, "count" int, "distinct" set/HLL
+FIELDS= {
+    "regions": [("total_sales", "sum"), ("transaction_count", "count")],
+    "products": [("total_sales", "sum"), ("total_quantity", "count")],
+    "customers": [("total_spent", "sum"), ("purchase_count", "count"), ("unique_products", "distinct")],
+    "daily": [("total_revenue", "sum"), ("transaction_count", "count"), ("unique_customers", "distinct")]
+}
+
+# a) Value encodings---
+def encode_sum(value):
+    fraction= Fraction(value)
+    return [fraction.numerator, fraction.denominator]
+
+def decode_sum(value):
+    return Fraction(value[0], value[1])
+
+def encode_distinct(values, distinct_error):
+    if isinstance(values, int):
+        raise ValueError("Distinct counts are plain ints (columnar engine) and cannot be merged, aggregate rows instead")
+    if isinstance(values, HyperLogLog) or distinct_error is not None:
+        sketch= values if isinstance(values, HyperLogLog) else HyperLogLog(distinct_error)
+        if not isinstance(values, HyperLogLog):
+            for value in values:
+                sketch.add(value)
+        return {"hll": sketch.p, "registers": base64.b64encode(bytes(sketch.registers)).decode("ascii")}
+    return sorted(values)
+
+def decode_hll(value):
+    sketch= HyperLogLog()
+    sketch.p= value["hll"]
+    sketch.m= 1 << sketch.p
+    sketch.registers= bytearray(base64.b64decode(value["registers"]))
+    return sketch
+
+def merge_distinct(a, b):
+    if isinstance(a, list) and isinstance(b, list):
+        return sorted(set(a) | set(b))
+    # at least one side is a sketch--- lists are folded into it
+    sketches= [decode_hll(v) for v in (a, b) if isinstance(v, dict)]
+    merged= sketches[0]
+    for other in sketches[1:]:
+        merged.merge(other)
+    for values in (a, b):
+        if isinstance(values, list):
+            for value in values:
+                merged.add(value)
+    return encode_distinct(merged, None)
+
+# b) Aggregates -> partial state---
+def to_state(aggregates, filter_summary= None, shard= 0, distinct_error= None):
+    if "approximate" in aggregates:
+        raise ValueError("Approximate (top-k) aggregates cannot be merged exactly, build states from exact rollups")
+    state= {
+        "format": STATE_FORMAT,
+        "version": STATE_VERSION,
+        "total_revenue": encode_sum(aggregates["total_revenue"]),
+        "total_transactions": aggregates["total_transactions"],
+        "filter_summary": dict(filter_summary or file_handler.new_filter_summary())
+    }
+    for group, fields in FIELDS.items():
+        state[group]= {}
+        for rank, (key, data) in enumerate(aggregates[group].items()):
+            entry= {"first": [shard, rank]}
+            for field, kind in fields:
+                if kind == "sum":
+                    entry[field]= encode_sum(data[field])
+                elif kind == "count":
+                    entry[field]= data[field]
+                else:
+                    entry[field]= encode_distinct(data[field], distinct_error)
+            state[group][key]= entry
+    return state
+
+def empty_state():
+    return to_state(aggregator.new_aggregates())
+
+def check_state(state):
+    if state.get("format") != STATE_FORMAT or state.get("version") != STATE_VERSION:
+        raise ValueError(f"Not a {STATE_FORMAT} v{STATE_VERSION} file")
+
+# c) Merge--- pure, associative and commutative
+def merge_states(a, b):
+    check_state(a)
+    check_state(b)
+    merged= {
+        "format": STATE_FORMAT,
+        "version": STATE_VERSION,
+        "total_revenue": encode_sum(decode_sum(a["total_revenue"]) + decode_sum(b["total_revenue"])),
+        "total_transactions": a["total_transactions"] + b["total_transactions"],
+        "filter_summary": file_handler.merge_filter_summary(dict(a["filter_summary"]), b["filter_summary"])
+    }
+    for group, fields in FIELDS.items():
+        entries= {key: dict(entry) for key, entry in a[group].items()}
+        for key, other in b[group].items():
+            entry= entries.get(key)
+            if entry is None:
+                entries[key]= dict(other)
+                continue
+            entry["first"]= min(entry["first"], other["first"])
+            for field, kind in fields:
+                if kind == "sum":
+                    entry[field]= encode_sum(decode_sum(entry[field]) + decode_sum(other[field]))
+                elif kind == "count":
+                    entry[field] += other[field]
+                else:
+                    entry[field]= merge_distinct(entry[field], other[field])
+        merged[group]= entries
+    return merged
+
+def merge_all(states):
+    merged= empty_state()
+    for state in states:
+        merged= merge_states(merged, state)
+    return merged
+
+# d) Partial state -> (aggregates, filter_summary) for data_processor / generate_sales_report---
+def finalize(state):
+    check_state(state)
+    aggregates= aggregator.new_aggregates()
+    aggregates["total_revenue"]= float(decode_sum(state["total_revenue"]))
+    aggregates["total_transactions"]= state["total_transactions"]
+    for group, fields in FIELDS.items():
+        for key, entry in sorted(state[group].items(), key= lambda item: item[1]["first"]):
+            data= {}
+            for field, kind in fields:
+                if kind == "sum":
+                    data[field]= float(decode_sum(entry[field]))
+                elif kind == "count":
+                    data[field]= entry[field]
+                elif isinstance(entry[field], dict):
+                    data[field]= decode_hll(entry[field])
+                else:
+                    data[field]= set(entry[field])
+            aggregates[group][key]= data
+    return aggregates, dict(state["filter_summary"])
+
+# e) Files---
+def save_state(state, path):
+    directory= os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok= True)
+    with open(path + ".tmp", mode= "w", encoding= "utf-8") as file:
+        json.dump(state, file, separators= (",", ":"))
+    os.replace(path + ".tmp", path)
+
+def load_state(path):
+    with open(path, mode= "r", encoding= "utf-8") as file:
+        state= json.load(file)
+    check_state(state)
+    return state
+
+# f) Map step--- one shard (a byte range of a file) -> partial state
+def map_shard(filename, file_encoder= "utf-8", shard= 0, shards= 1, region= None, min_amount= None, max_amount= None,
+              distinct_error= None, shard_offset= 0):
+    ranges= parallel_ingest.split_file(filename, shards)
+    if shard >= len(ranges):
+        # small file, fewer ranges than shards
+        return to_state(aggregator.new_aggregates(), shard= shard_offset + shard)
+    start, end= ranges[shard]
+    aggregates, filter_summary= parallel_ingest.process_chunk(
+        (filename, file_encoder, start, end, region, min_amount, max_amount))
+    return to_state(aggregates, filter_summary, shard= shard_offset + shard, distinct_error= distinct_error)
+
+def map_task(task):
+    # worker entry point--- returns the state as JSON text, as it would travel between machines
+    return json.dumps(map_shard(*task), separators= (",", ":"))
+
+# g) Local multi-process driver--- map every shard in a pool, reduce in completion order
+def run_local(filenames, file_encoder= "utf-8", workers= 4, shards_per_file= None, region= None, min_amount= None,
+              max_amount= None, distinct_error= None, shuffle= False):
+    shards_per_file= shards_per_file or workers
+    tasks= []
+    for file_index, filename in enumerate(filenames):
+        if not os.path.exists(filename):
+            print(f"File not found: {filename}")
+            continue
+        for shard in range(shards_per_file):
+            # shard ids keep file order, so finalize() orders keys like a serial run
+            tasks.append((filename, file_encoder, shard, shards_per_file, region, min_amount, max_amount,
+                          distinct_error, file_index * shards_per_file))
+    if shuffle:
+        random.shuffle(tasks)
+    merged= empty_state()
+    with ProcessPoolExecutor(max_workers= workers) as pool:
+        futures= [pool.submit(map_task, task) for task in tasks]
+        for future in as_completed(futures):
+            merged= merge_states(merged, json.loads(future.result()))
+    return merged
+
+def write_report(state, report_file):
+    from utils import generate_sales_report
+    aggregates, filter_summary= finalize(state)
+    print(f"Filter Summary: {filter_summary}")
+    generate_sales_report.generate_sales_report(None, None, output_file= report_file, aggregates= aggregates, enriched_count= 0)
+
+if __name__ == "__main__":
+    parser= argparse.ArgumentParser(description= "Map/reduce sales aggregation with mergeable partial states.")
+    commands= parser.add_subparsers(dest= "command", required= True)
+
+    def add_filters(command):
+        command.add_argument("--encoding", default= "utf-8")
+        command.add_argument("--region", default= None)
+        command.add_argument("--min-amount", type= float, default= None)
+        command.add_argument("--max-amount", type= float, default= None)
+        command.add_argument("--distinct-error", type= float, default= None,
+                             help= "store distinct values as HyperLogLog with this error instead of exact lists")
+
+    map_command= commands.add_parser("map", help= "aggregate one shard of a file into a partial state")
+    map_command.add_argument("filename")
+    map_command.add_argument("--shard", default= "0/1", help= "i/n: the i-th of n byte ranges of the file")
+    map_command.add_argument("--shard-offset", type= int, default= 0, help= "added to the shard id, e.g. file index * n")
+    map_command.add_argument("--out", required= True)
+    add_filters(map_command)
+
+    reduce_command= commands.add_parser("reduce", help= "merge partial states and write the report")
+    reduce_command.add_argument("states", nargs= "+")
+    reduce_command.add_argument("--out", default= None, help= "also save the merged state")
+    reduce_command.add_argument("--report", default= "output/sales_report.txt")
+
+    local_command= commands.add_parser("local", help= "map all shards in a local process pool and reduce")
+    local_command.add_argument("inputs", nargs= "+")
+    local_command.add_argument("--workers", type= int, default= 4)
+    local_command.add_argument("--out", default= None)
+    local_command.add_argument("--report", default= "output/sales_report.txt")
+    add_filters(local_command)
+
+    args= parser.parse_args()
+    if args.command == "map":
+        shard, shards= (int(part) for part in args.shard.split("/"))
+        state= map_shard(args.filename, args.encoding, shard, shards, args.region, args.min_amount, args.max_amount,
+                         args.distinct_error, args.shard_offset)
+        save_state(state, args.out)
+        print(f"Shard {shard}/{shards} of {args.filename}: {state['total_transactions']} transactions -> {args.out}")
+    else:
+        if args.command == "reduce":
+            state= merge_all(load_state(path) for path in file_handler.expand_inputs(args.states))
+        else:
+            state= run_local(file_handler.expand_inputs(args.inputs), args.encoding, args.workers, region= args.region,
+                             min_amount= args.min_amount, max_amount= args.max_amount, distinct_error= args.distinct_error)
+        if args.out:
+            save_state(state, args.out)
+        write_report(state, args.report)
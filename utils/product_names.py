@@ -0,0 +1,272 @@
+# PRODUCT NAME CANONICALIZATION-----
+# The same ProductID shows up under several names ("Webcam" / "Webcam HD",
+# "Laptop" / "Laptop Premium"), and the product rollups key on the name, so
+# the revenue of one product gets split across its variants.
+#
+# Names are normalized (NFKC, casefolded, split into word tokens) and grouped
+# by ProductID. The canonical name of a product is its base variant: the one
+# whose tokens are contained in the most rows' names ("laptop" is contained in
+# "laptop premium"), ties going to the more frequent spelling. Names that were
+# not seen when the index was built are resolved through the ProductID, then
+# an exact normalized lookup, then a character trigram index (Dice similarity).
+#
+# Sales names are also fuzzy matched against the API catalog titles
+# (api_handler.create_product_mapping) with the same trigram index. Every
+# resolution is memoized, so a run costs one lookup per distinct name, and
+# the catalog matches are kept in .cache/product_names keyed by a fingerprint
+# of the catalog, so later runs reuse them.
+#
+#   python -m utils.product_names data/sales_data.txt
+
+import argparse
+import hashlib
+import json
+import os
+import re
+import unicodedata
+from collections import Counter, defaultdict
+
+CACHE_FILE= ".cache/product_names/matches.json"
+CACHE_VERSION= 1
+NGRAM= 3
+MIN_SIMILARITY= 0.6
+TOKEN_SPLIT= re.compile(r"\W+")
+
+# a) Normalized names, tokens and n-grams---
+def normalize_name(name):
+    # " Webcam,HD" / "WEBCAM  hd" -> "webcam hd"
+    text= unicodedata.normalize("NFKC", str(name)).casefold()
+    return " ".join(token for token in TOKEN_SPLIT.split(text) if token)
+
+def name_tokens(normalized):
+    return frozenset(normalized.split())
+
+def ngrams(normalized, n= NGRAM):
+    padded= f" {normalized} "
+    if len(padded) <= n:
+        return {padded}
+    return {padded[i:i + n] for i in range(len(padded) - n + 1)}
+
+def similarity(a, b):
+    # Dice coefficient of the trigram sets of two normalized names
+    grams_a, grams_b= ngrams(a), ngrams(b)
+    return 2 * len(grams_a & grams_b) / (len(grams_a) + len(grams_b))
+
+# trigram -> keys inverted index; best() only scores keys sharing a trigram with the query
+class NgramIndex:
+    def __init__(self):
+        self.postings= defaultdict(list)
+        self.sizes= {}
+
+    def add(self, key, normalized):
+        if key in self.sizes:
+            return
+        grams= ngrams(normalized)
+        self.sizes[key]= len(grams)
+        for gram in grams:
+            self.postings[gram].append(key)
+
+    def best(self, normalized, min_similarity= MIN_SIMILARITY):
+        grams= ngrams(normalized)
+        shared= Counter()
+        for gram in grams:
+            shared.update(self.postings.get(gram, ()))
+        best_key, best_score= None, 0.0
+        for key, count in shared.items():
+            score= 2 * count / (len(grams) + self.sizes[key])
+            if score > best_score:
+                best_key, best_score= key, score
+        if best_score < min_similarity:
+            return None, best_score
+        return best_key, best_score
+
+# b) Sales names -> canonical product names---
+class ProductNameIndex:
+    def __init__(self, min_similarity= MIN_SIMILARITY):
+        self.min_similarity= min_similarity
+        self.variants= defaultdict(Counter)     # product id -> normalized name -> rows
+        self.spellings= {}                      # normalized name -> first spelling seen
+        self.canonical= {}                      # product id -> canonical name
+        self.targets= {}                        # product id -> normalized name -> canonical name
+        self.by_name= {}                        # normalized name -> canonical name
+        self.names= NgramIndex()                # canonical names for fuzzy lookups
+        self.resolved= {}                       # (product id, name) -> canonical name
+
+    def add(self, product_id, name, count= 1):
+        normalized= normalize_name(name)
+        if not normalized:
+            return
+        self.spellings.setdefault(normalized, str(name).strip())
+        self.variants[str(product_id).strip()][normalized] += count
+
+    def add_transactions(self, transactions):
+        pairs= Counter((t.get("ProductID", ""), t.get("ProductName", "")) for t in transactions)
+        for (product_id, name), count in pairs.items():
+            self.add(product_id, name, count)
+        return self
+
+    def build(self):
+        self.canonical.clear()
+        self.targets.clear()
+        self.by_name.clear()
+        self.resolved.clear()
+        owners= {}      # normalized name -> (rows, canonical) of the product that uses it most
+        for product_id, counts in self.variants.items():
+            tokens= {name: name_tokens(name) for name in counts}
+            # base variant: contained in the most rows' names, then most frequent, then first seen
+            base= max(counts, key= lambda name: (
+                sum(rows for other, rows in counts.items() if tokens[name] <= tokens[other]),
+                counts[name]))
+            canonical= self.spellings[base]
+            self.canonical[product_id]= canonical
+            self.names.add(canonical, base)
+            targets= self.targets[product_id]= {}
+            for name, rows in counts.items():
+                related= tokens[base] <= tokens[name] or similarity(base, name) >= self.min_similarity
+                target= targets[name]= canonical if related else self.spellings[name]
+                if name not in owners or rows > owners[name][0]:
+                    owners[name]= (rows, target)
+        self.by_name= {name: target for name, (rows, target) in owners.items()}
+        return self
+
+    def resolve(self, product_id, name):
+        key= (product_id, name)
+        canonical= self.resolved.get(key)
+        if canonical is None:
+            canonical= self.resolved[key]= self.lookup(str(product_id).strip(), name)
+        return canonical
+
+    def lookup(self, product_id, name):
+        normalized= normalize_name(name)
+        if not normalized:
+            return name
+        canonical= self.canonical.get(product_id)
+        if canonical is not None:
+            # known product: its own variants, or a new name close to its canonical one
+            if normalized in self.targets[product_id]:
+                return self.targets[product_id][normalized]
+            base= normalize_name(canonical)
+            if name_tokens(base) <= name_tokens(normalized) or similarity(base, normalized) >= self.min_similarity:
+                return canonical
+        if normalized in self.by_name:
+            return self.by_name[normalized]
+        match, score= self.names.best(normalized, self.min_similarity)
+        return match if match is not None else name
+
+    def variant_groups(self):
+        # canonical name -> spellings folded into it (only groups with more than one)
+        groups= defaultdict(set)
+        for normalized, canonical in self.by_name.items():
+            groups[canonical].add(self.spellings[normalized])
+        return {canonical: sorted(names) for canonical, names in groups.items() if len(names) > 1}
+
+def build_index(transactions, min_similarity= MIN_SIMILARITY):
+    return ProductNameIndex(min_similarity).add_transactions(transactions).build()
+
+# renames transactions in place to their canonical product name; returns the number changed
+def canonicalize_transactions(transactions, index):
+    changed= 0
+    resolve= index.resolve
+    for txn in transactions:
+        name= txn["ProductName"]
+        canonical= resolve(txn["ProductID"], name)
+        if canonical != name:
+            txn["ProductName"]= canonical
+            changed += 1
+    return changed
+
+# c) Persistent cache of catalog matches (json, written atomically)---
+# {"version": 1, "catalogs": {catalog fingerprint: {normalized name: [api id, title, score] or null}}}
+class MatchCache:
+    def __init__(self, path= CACHE_FILE):
+        self.path= path
+        self.catalogs= {}
+        self.dirty= False
+        if path:
+            try:
+                with open(path, mode= "r", encoding= "utf-8") as file:
+                    data= json.load(file)
+                if data.get("version") == CACHE_VERSION:
+                    self.catalogs= data.get("catalogs", {})
+            except (OSError, ValueError, AttributeError):
+                pass
+
+    def entries(self, fingerprint):
+        return self.catalogs.setdefault(fingerprint, {})
+
+    def save(self):
+        if not self.path or not self.dirty:
+            return
+        try:
+            directory= os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok= True)
+            with open(self.path + ".tmp", mode= "w", encoding= "utf-8") as file:
+                json.dump({"version": CACHE_VERSION, "catalogs": self.catalogs}, file, ensure_ascii= False)
+            os.replace(self.path + ".tmp", self.path)
+            self.dirty= False
+        except OSError as e:
+            print(f"Could not save product name matches: {e}")
+
+def catalog_fingerprint(product_mapping):
+    digest= hashlib.blake2b(digest_size= 16)
+    for product_id in sorted(product_mapping, key= str):
+        digest.update(f"{product_id}\x1f{product_mapping[product_id].get('title', '')}\x1e".encode("utf-8"))
+    return digest.hexdigest()
+
+# d) Sales names -> API catalog products---
+class CatalogMatcher:
+    def __init__(self, product_mapping, cache= None, min_similarity= MIN_SIMILARITY):
+        self.product_mapping= product_mapping
+        self.min_similarity= min_similarity
+        self.cache= cache
+        self.matches= cache.entries(catalog_fingerprint(product_mapping)) if cache is not None else {}
+        self.titles= None
+
+    def title_index(self):
+        # built on the first cache miss only
+        if self.titles is None:
+            self.titles= NgramIndex()
+            for product_id, info in self.product_mapping.items():
+                normalized= normalize_name(info.get("title", ""))
+                if normalized:
+                    self.titles.add(product_id, normalized)
+        return self.titles
+
+    def match(self, name):
+        # {"id", "title", "score"} of the closest catalog title, None below min_similarity
+        normalized= normalize_name(name)
+        if normalized not in self.matches:
+            product_id, score= self.title_index().best(normalized, self.min_similarity)
+            entry= None
+            if product_id is not None:
+                entry= [product_id, self.product_mapping[product_id].get("title", ""), round(score, 4)]
+            self.matches[normalized]= entry
+            if self.cache is not None:
+                self.cache.dirty= True
+        entry= self.matches[normalized]
+        if entry is None:
+            return None
+        return {"id": entry[0], "title": entry[1], "score": entry[2]}
+
+    def match_all(self, names):
+        return {name: self.match(name) for name in names}
+
+# e) Command line--- prints the variant groups of the given files
+def parse_args(argv= None):
+    parser= argparse.ArgumentParser(description= "Show product name variants and their canonical names.")
+    parser.add_argument("inputs", nargs= "+")
+    parser.add_argument("--encoding", default= "utf-8")
+    parser.add_argument("--min-similarity", type= float, default= MIN_SIMILARITY)
+    return parser.parse_args(argv)
+
+if __name__ == "__main__":
+    from utils import file_handler
+    args= parse_args()
+    index= ProductNameIndex(args.min_similarity)
+    for filename in args.inputs:
+        index.add_transactions(file_handler.iter_parse_transactions(file_handler.iter_sales_data(filename, args.encoding)))
+    index.build()
+    for product_id, canonical in sorted(index.canonical.items()):
+        variants= sorted(index.spellings[name] for name in index.variants[product_id])
+        print(f"{product_id:<10}{canonical:<25}{', '.join(variants)}")
@@ -0,0 +1,359 @@
+# QUERY SERVER-----
+# Long-lived process that reads, parses and validates the sales files once,
+# keeps a FilterIndex (utils/filter_index.py), the same rows as a columnar
+# TransactionTable (utils/columnar.py), the unfiltered aggregates and the time
+# series cube warm in memory, and answers analytics questions as JSON over a
+# local HTTP endpoint. Filters have the validate_and_filter meaning (region,
+# min/max amount) plus an optional date range: the index turns them into row
+# ids, and the filtered rows are aggregated with the vectorized table group-bys
+# (the cube only when /trend asks for it); results are the data_processor
+# views over those aggregates. Responses are kept in an LRU cache keyed by path + query string,
+# and the data is reloaded (and the cache cleared) when an input file changes.
+#
+#   python -m utils.query_server data/sales_data.txt --port 8765
+#   curl "localhost:8765/regions?min_amount=1000"
+#   curl "localhost:8765/products?region=North&top=3"
+#
+# Endpoints (all accept region, min_amount, max_amount, start_date, end_date):
+#   /summary     total revenue, transaction count, date range, filter summary
+#   /regions     region_wise_sales
+#   /products    top_selling_products (?top=5), one product (?product=Laptop), ?low=<threshold>
+#   /customers   customer_analysis (?top=N), one customer (?customer=C001)
+#   /days        daily_sales_trend, one day (?date=2024-12-01), /days/peak find_peak_sales_day
+#   /trend       revenue rollup from the time series cube (?period=day|week|month, ?window=7 daily moving average)
+#   /health      row counts, load time, cache stats;  /reload forces a reload
+
+import argparse
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+from utils import aggregator, columnar, data_processor, file_handler, timeseries
+from utils.filter_index import FilterIndex
+
+FILTER_PARAMS= ("region", "min_amount", "max_amount", "start_date", "end_date")
+
+class QueryError(ValueError):
+    # bad request parameters--- answered with 400
+    pass
+
+# a) Loaded data---
+class SalesDataset:
+    def __init__(self, filenames, file_encoder= "utf-8"):
+        started= time.perf_counter()
+        self.filenames= list(filenames)
+        self.signature= file_signature(self.filenames)
+        raw_lines= []
+        for filename in self.filenames:
+            raw_lines.extend(file_handler.read_sales_data(filename, file_encoder))
+        self.index= FilterIndex(file_handler.parse_transactions(raw_lines))
+        # the table has the index rows in the same order, so index row ids select table rows
+        self.table= columnar.table_from_transactions(self.index.transactions)
+        # unfiltered rollups are built once, filtered ones on demand (and cached)
+        self.everything= Selection(self.table, aggregator.aggregate_transactions(self.table), timeseries.cube_from_table(self.table))
+        self.loaded_at= time.time()
+        self.load_seconds= time.perf_counter() - started
+
+    def select(self, filters):
+        # -> (Selection, filter_summary)
+        rows, filter_summary= self.index.row_ids(**filters)
+        if len(rows) == len(self.table):
+            return self.everything, filter_summary
+        return Selection(self.table.filter(rows)), filter_summary
+
+# rows matching one set of filters--- aggregates and cube are built on first use
+class Selection:
+    def __init__(self, table, aggregates= None, cube= None):
+        self.table= table
+        self._aggregates= aggregates
+        self._cube= cube
+
+    def aggregates(self):
+        if self._aggregates is None:
+            self._aggregates= aggregator.aggregate_transactions(self.table)
+        return self._aggregates
+
+    def cube(self):
+        if self._cube is None:
+            self._cube= timeseries.cube_from_table(self.table)
+        return self._cube
+
+# (mtime, size) per file--- a changed signature means the data must be reloaded
+def file_signature(filenames):
+    signature= []
+    for filename in filenames:
+        try:
+            stat= os.stat(filename)
+            signature.append((filename, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((filename, None, None))
+    return tuple(signature)
+
+# b) LRU cache of JSON responses---
+class LRUCache:
+    def __init__(self, max_size= 256):
+        self.max_size= max_size
+        self.entries= OrderedDict()
+        self.hits= 0
+        self.misses= 0
+        self.lock= threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        if self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key]= value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last= False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def stats(self):
+        return {"size": len(self.entries), "max_size": self.max_size, "hits": self.hits, "misses": self.misses}
+
+# c) Query parameters---
+def parse_params(query_string):
+    params= {key: values[-1] for key, values in parse_qs(query_string, keep_blank_values= False).items()}
+    filters= {}
+    for name in FILTER_PARAMS:
+        value= params.get(name)
+        if value is None or value.strip() == "":
+            filters[name]= None
+        elif name in ("min_amount", "max_amount"):
+            filters[name]= number_param(name, value, float)
+        else:
+            filters[name]= value.strip()
+    return params, filters
+
+def number_param(name, value, kind= int):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        raise QueryError(f"{name} must be a number, got {value!r}")
+
+# d) Query service--- thread safe, shared by all request handlers
+class QueryService:
+    def __init__(self, filenames, file_encoder= "utf-8", cache_size= 256, reload_interval= 1.0):
+        self.filenames= list(filenames)
+        self.file_encoder= file_encoder
+        self.reload_interval= reload_interval
+        self.cache= LRUCache(cache_size)
+        self.lock= threading.Lock()
+        self.dataset= SalesDataset(self.filenames, file_encoder)
+        self.last_check= time.monotonic()
+        self.reloads= 0
+
+    def reload(self):
+        dataset= SalesDataset(self.filenames, self.file_encoder)
+        with self.lock:
+            self.dataset= dataset
+            self.reloads += 1
+        self.cache.clear()
+        print(f"Reloaded {len(dataset.index)} transactions in {dataset.load_seconds:.3f}s")
+
+    def reload_if_changed(self):
+        # file stats are checked at most once per reload_interval
+        now= time.monotonic()
+        if now - self.last_check < self.reload_interval:
+            return False
+        with self.lock:
+            if now - self.last_check < self.reload_interval:
+                return False
+            self.last_check= now
+        if file_signature(self.filenames) == self.dataset.signature:
+            return False
+        self.reload()
+        return True
+
+    def handle(self, path, query_string= ""):
+        # -> (status, body bytes)
+        path= path.rstrip("/") or "/"
+        if path == "/reload":
+            self.reload()
+            return 200, encode({"reloaded": True, "transactions": len(self.dataset.index)})
+        self.reload_if_changed()
+        if path == "/health":
+            return 200, encode(self.health())
+        # the reload count is part of the key, so an answer computed from the old data is never served after a reload
+        key= (self.reloads, path, query_string)
+        body= self.cache.get(key)
+        if body is not None:
+            return 200, body
+        try:
+            params, filters= parse_params(query_string)
+            result= self.answer(self.dataset, path, params, filters)
+        except QueryError as e:
+            return 400, encode({"error": str(e)})
+        if result is None:
+            return 404, encode({"error": f"Unknown endpoint {path}", "endpoints": sorted(ENDPOINTS)})
+        body= encode(result)
+        self.cache.put(key, body)
+        return 200, body
+
+    def health(self):
+        dataset= self.dataset
+        return {
+            "files": dataset.filenames,
+            "transactions": len(dataset.index),
+            "invalid": dataset.index.invalid,
+            "loaded_at": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(dataset.loaded_at)),
+            "load_seconds": round(dataset.load_seconds, 4),
+            "reloads": self.reloads,
+            "cache": self.cache.stats()
+        }
+
+    def answer(self, dataset, path, params, filters):
+        endpoint= ENDPOINTS.get(path)
+        if endpoint is None:
+            return None
+        selection, filter_summary= dataset.select(filters)
+        result= endpoint(selection.aggregates(), params, selection)
+        result["filters"]= {name: value for name, value in filters.items() if value is not None}
+        result["filter_summary"]= filter_summary
+        return result
+
+def encode(value):
+    return json.dumps(value, ensure_ascii= False, default= str).encode("utf-8")
+
+# e) Endpoints--- (aggregates, params, Selection) -> dict
+def summary_view(aggregates, params, selection):
+    min_date, max_date= aggregator.date_range(aggregates)
+    total_transactions= aggregates["total_transactions"]
+    return {
+        "total_revenue": data_processor.calculate_total_revenue(None, aggregates= aggregates),
+        "total_transactions": total_transactions,
+        "average_order_value": round(aggregates["total_revenue"] / total_transactions, 2) if total_transactions else 0.0,
+        "start_date": min_date.strftime("%Y-%m-%d") if min_date else None,
+        "end_date": max_date.strftime("%Y-%m-%d") if max_date else None
+    }
+
+def regions_view(aggregates, params, selection):
+    sorted_region_sales, grand_total, _, _= data_processor.region_wise_sales(None, aggregates= aggregates)
+    return {"total_revenue": round(grand_total, 2), "regions": sorted_region_sales}
+
+def products_view(aggregates, params, selection):
+    if params.get("product"):
+        name= params["product"].strip()
+        data= aggregates["products"].get(name)
+        if data is None:
+            return {"product": name, "found": False}
+        return {"product": name, "found": True, "total_quantity": data["total_quantity"], "total_sales": round(data["total_sales"], 2)}
+    if params.get("low"):
+        threshold= number_param("low", params["low"], float)
+        low= data_processor.low_performing_products(None, threshold= threshold, aggregates= aggregates)
+        return {"threshold": threshold, "products": [list(row) for row in low]}
+    top= number_param("top", params.get("top", 5))
+    top_products= data_processor.top_selling_products(None, top_n= top, aggregates= aggregates)
+    return {"top": top, "products": [list(row) for row in top_products]}
+
+def customers_view(aggregates, params, selection):
+    if params.get("customer"):
+        c_id= params["customer"].strip()
+        data= aggregates["customers"].get(c_id)
+        if data is None:
+            return {"customer": c_id, "found": False, "data": None}
+        # same row layout as the full customer_analysis list
+        row= data_processor.customer_analysis(None, aggregates= {"customers": {c_id: data}})[0]
+        return {"customer": c_id, "found": True, "data": row}
+    top= number_param("top", params["top"]) if params.get("top") else None
+    return {"top": top, "customers": data_processor.customer_analysis(None, aggregates= aggregates, top_n= top)}
+
+def days_view(aggregates, params, selection):
+    daily= data_processor.daily_sales_trend(None, aggregates= aggregates)
+    if params.get("date"):
+        dt= params["date"].strip()
+        matches= [row for row in daily if row["Date"] == dt]
+        return {"date": dt, "found": bool(matches), "data": matches[0] if matches else None}
+    return {"days": daily}
+
+def peak_day_view(aggregates, params, selection):
+    dt, transaction_count, revenue= data_processor.find_peak_sales_day(None, aggregates= aggregates)
+    return {"date": dt, "transaction_count": transaction_count, "total_revenue": round(revenue, 2)}
+
+def trend_view(aggregates, params, selection):
+    period= params.get("period", "week")
+    if period not in ("day", "week", "month"):
+        raise QueryError(f"period must be day, week or month, got {period!r}")
+    cube= selection.cube()
+    result= {
+        "period": period,
+        "revenue": [[label, round(value, 2)] for label, value in cube.rollup(period)]
+    }
+    if params.get("window"):
+        window= number_param("window", params["window"])
+        if window <= 0:
+            raise QueryError("window must be positive")
+        averages= cube.moving_average(window).tolist()
+        result["moving_average"]= [[label, round(value, 2)] for label, value in zip(cube.day_labels(), averages)]
+    return result
+
+ENDPOINTS= {
+    "/summary": summary_view,
+    "/regions": regions_view,
+    "/products": products_view,
+    "/customers": customers_view,
+    "/days": days_view,
+    "/days/peak": peak_day_view,
+    "/trend": trend_view
+}
+
+# f) HTTP---
+def make_handler(service, quiet= False):
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url= urlsplit(self.path)
+            try:
+                status, body= service.handle(url.path, url.query)
+            except Exception as e:
+                status, body= 500, encode({"error": str(e)})
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            if not quiet:
+                super().log_message(format, *args)
+
+    return QueryHandler
+
+def serve(filenames, host= "127.0.0.1", port= 8765, file_encoder= "utf-8", cache_size= 256, reload_interval= 1.0, quiet= False):
+    service= QueryService(filenames, file_encoder, cache_size= cache_size, reload_interval= reload_interval)
+    server= ThreadingHTTPServer((host, port), make_handler(service, quiet))
+    print(f"Loaded {len(service.dataset.index)} transactions in {service.dataset.load_seconds:.3f}s")
+    print(f"Serving sales queries on http://{host}:{server.server_address[1]}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\nStopping query server")
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    parser= argparse.ArgumentParser(description= "Serve sales analytics as JSON over HTTP from in-memory indexes.")
+    parser.add_argument("inputs", nargs= "*", default= ["data/sales_data.txt"])
+    parser.add_argument("--host", default= "127.0.0.1")
+    parser.add_argument("--port", type= int, default= 8765)
+    parser.add_argument("--encoding", default= "utf-8")
+    parser.add_argument("--cache-size", type= int, default= 256, help= "cached responses (LRU), 0 disables the cache")
+    parser.add_argument("--reload-interval", type= float, default= 1.0, help= "seconds between checks for changed input files")
+    parser.add_argument("--quiet", action= "store_true", help= "do not log every request")
+    args= parser.parse_args()
+    serve(file_handler.expand_inputs(args.inputs), args.host, args.port, args.encoding, args.cache_size, args.reload_interval, args.quiet)
@@ -0,0 +1,52 @@
+# TOP-K RANKING-----
+# Partial selection for the "top N" views: a heap of size k instead of sorting
+# every product/customer/region/day, O(n log k) instead of O(n log n).
+# Ties keep the input order by default (the same result as a stable
+# sorted(...)[:k]); tie_break= "name" orders ties by key instead.
+
+import heapq
+
+# a) Generic top k over (name, data) items---
+def top_k(items, k, key, reverse= True, tie_break= "first"):
+    if k is None:
+        return sorted(items, key= key, reverse= reverse)
+    if k <= 0:
+        return []
+    if tie_break == "first":
+        # heapq.nlargest/nsmallest are documented to equal sorted(...)[:k], stability included
+        select= heapq.nlargest if reverse else heapq.nsmallest
+        return select(k, items, key= key)
+    if tie_break == "name":
+        sign= -1 if reverse else 1
+        return heapq.nsmallest(k, items, key= lambda item: (sign * key(item), item[0]))
+    raise ValueError(f"Unknown tie_break: {tie_break}")
+
+# b) Views over aggregator rollups---
+def top_products(aggregates, k= 5, by= "total_sales", tie_break= "first"):
+    return top_k(aggregates["products"].items(), k, key= lambda item: item[1][by], tie_break= tie_break)
+
+def top_customers(aggregates, k= 5, by= "total_spent", tie_break= "first"):
+    return top_k(aggregates["customers"].items(), k, key= lambda item: item[1][by], tie_break= tie_break)
+
+def top_regions(aggregates, k= 5, by= "total_sales", tie_break= "first"):
+    return top_k(aggregates["regions"].items(), k, key= lambda item: item[1][by], tie_break= tie_break)
+
+def top_days(aggregates, k= 5, by= "total_revenue", tie_break= "first"):
+    return top_k(aggregates["daily"].items(), k, key= lambda item: item[1][by], tie_break= tie_break)
+
+# c) Columnar--- indices of the k largest values, ties by position (argpartition, O(n))
+def top_k_indices(values, k):
+    import numpy as np
+
+    values= np.asarray(values)
+    n= len(values)
+    if k is None or k >= n:
+        return np.argsort(-values, kind= "stable")
+    if k <= 0:
+        return np.zeros(0, dtype= np.int64)
+    threshold= values[np.argpartition(-values, k - 1)[k - 1]]
+    above= np.flatnonzero(values > threshold)
+    # only the first few rows equal to the threshold make it in, like a stable sort
+    equal= np.flatnonzero(values == threshold)[:k - len(above)]
+    chosen= np.concatenate([above, equal])
+    return chosen[np.lexsort((chosen, -values[chosen]))]
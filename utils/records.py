@@ -0,0 +1,75 @@
+# TRANSACTION RECORDS-----
+# Compact record for one parsed transaction, used instead of a dict per row.
+# The eight fields live in __slots__ (no per-row dict), and the repeating
+# categorical values (Date, ProductID, ProductName, CustomerID, Region) are
+# interned, so every row of "North" or "C009" points to the same string.
+# Records behave as read/write mappings over their fixed fields
+# (txn["Region"], txn.get("Region"), `in`, keys/items, ChainMap), so code
+# written for the transaction dicts keeps working; hot loops can read the
+# attributes directly (txn.Region).
+
+import sys
+from collections.abc import MutableMapping
+
+FIELDS= ("TransactionID", "Date", "ProductID", "ProductName", "Quantity", "UnitPrice", "CustomerID", "Region")
+FIELD_SET= frozenset(FIELDS)
+INTERNED_FIELDS= ("Date", "ProductID", "ProductName", "CustomerID", "Region")
+
+class Transaction(MutableMapping):
+    __slots__= FIELDS
+
+    def __init__(self, t_id, dt, p_id, p_name, qty, price, c_id, region):
+        intern= sys.intern
+        self.TransactionID= t_id
+        self.Date= intern(dt)
+        self.ProductID= intern(p_id)
+        self.ProductName= intern(p_name)
+        self.Quantity= qty
+        self.UnitPrice= price
+        self.CustomerID= intern(c_id)
+        self.Region= intern(region)
+
+    # a) Mapping interface over the fixed fields---
+    def __getitem__(self, key):
+        if key in FIELD_SET:
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def __setitem__(self, key, value):
+        if key not in FIELD_SET:
+            raise KeyError(f"Transaction records have no field {key!r}")
+        setattr(self, key, value)
+
+    def __delitem__(self, key):
+        raise TypeError("Transaction record fields cannot be deleted")
+
+    def __iter__(self):
+        return iter(FIELDS)
+
+    def __len__(self):
+        return len(FIELDS)
+
+    def __contains__(self, key):
+        return key in FIELD_SET
+
+    def get(self, key, default= None):
+        return getattr(self, key) if key in FIELD_SET else default
+
+    # b) Conversions---
+    def to_dict(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+    def __reduce__(self):
+        return (Transaction, tuple(getattr(self, field) for field in FIELDS))
+
+    def __repr__(self):
+        return f"Transaction({self.to_dict()!r})"
+
+# any transaction mapping (e.g. a dict from another source) -> record; None if a field is missing
+def to_record(txn):
+    if isinstance(txn, Transaction):
+        return txn
+    try:
+        return Transaction(*(txn[field] if field in ("Quantity", "UnitPrice") else str(txn[field]) for field in FIELDS))
+    except (KeyError, TypeError):
+        return None
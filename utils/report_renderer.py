@@ -0,0 +1,260 @@
+# REPORT RENDERER-----
+# Renders the sales report from already computed aggregates (utils/aggregator.py)
+# into text, CSV, JSON and HTML. build_report_data() reads the aggregates once
+# into a small report model; every renderer turns that model into one string
+# and each file is written with a single write, so report time depends on the
+# number of regions/products/customers/days, not on the number of rows.
+
+import csv
+import html
+import io
+import json
+import os
+from datetime import datetime
+
+from utils import aggregator, ranking
+
+FORMATS= ("text", "csv", "json", "html")
+EXTENSIONS= {"text": ".txt", "csv": ".csv", "json": ".json", "html": ".html"}
+
+# a) Aggregates -> report model---
+def build_report_data(aggregates, total_records= None, enriched_count= 0, generated_at= None, top_n= 5):
+    total_revenue= aggregates["total_revenue"]
+    total_transactions= aggregates["total_transactions"]
+    total_records= total_transactions if total_records is None else total_records
+    min_date, max_date= aggregator.date_range(aggregates)
+
+    regions= []
+    for region, data in ranking.top_k(aggregates["regions"].items(), None, key= lambda item: item[1]["total_sales"]):
+        regions.append({
+            "region": region,
+            "total_sales": data["total_sales"],
+            "grand_total": total_revenue,
+            "percentage": (data["total_sales"] / total_revenue) * 100 if total_revenue > 0 else 0.0,
+            "transaction_count": data["transaction_count"]
+        })
+    daily= [
+        {
+            "date": d,
+            "revenue": v["total_revenue"],
+            "transaction_count": v["transaction_count"],
+            "unique_customers": aggregator.distinct_count(v["unique_customers"])
+        }
+        for d, v in sorted(aggregates["daily"].items())
+    ]
+    if daily:
+        best_day= max(daily, key= lambda row: row["revenue"])
+        best_selling= (best_day["date"], best_day["revenue"], best_day["transaction_count"])
+    else:
+        best_selling= (None, 0.0, 0)
+
+    return {
+        "generated_at": generated_at or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        "total_records": total_records,
+        "summary": {
+            "total_revenue": total_revenue,
+            "total_transactions": total_transactions,
+            "average_order_value": (total_revenue / total_transactions) if total_transactions > 0 else 0.0,
+            "start_date": min_date.strftime("%Y-%m-%d") if min_date else None,
+            "end_date": max_date.strftime("%Y-%m-%d") if max_date else None
+        },
+        "approximate": aggregates.get("approximate"),
+        "regions": regions,
+        "top_products": [
+            {"product": p_name, "total_quantity": data["total_quantity"], "total_sales": data["total_sales"]}
+            for p_name, data in ranking.top_products(aggregates, top_n)
+        ],
+        "top_customers": [
+            {"customer_id": c_id, "total_spent": data["total_spent"], "purchase_count": data["purchase_count"]}
+            for c_id, data in ranking.top_customers(aggregates, top_n)
+        ],
+        "daily": daily,
+        "best_selling_day": best_selling,
+        "enrichment": {
+            "enriched": enriched_count,
+            "total": total_records,
+            "success_rate": (enriched_count / total_records * 100) if total_records > 0 else 0.0,
+            "not_enriched": total_records - enriched_count
+        }
+    }
+
+# b) Text--- same layout as the original sales_report.txt
+def render_text(report):
+    summary= report["summary"]
+    out= []
+    out.append(" "*25 + "SALES REPORT\n")
+    out.append(f"Generated on: {report['generated_at']}\n")
+    out.append(f"Total Transactions Analyzed: {report['total_records']}\n")
+    out.append("="*50 + "\n\n")
+
+    out.append("\nOVERALL SUMMARY\n")
+    out.append("-"*50 + "\n")
+    out.append(f"total_revenue: ₹{summary['total_revenue']:,.2f}\n")
+    out.append(f"total_transactions: {summary['total_transactions']}\n")
+    out.append(f"average_order_value: ₹{summary['average_order_value']:,.2f}\n")
+    out.append(f"date_range: {summary['start_date'] or 'N/A'} to {summary['end_date'] or 'N/A'}\n")
+    approx= report["approximate"]
+    if approx:
+        # sketch based rollups (utils/approx_aggregator.py)--- estimates with their error bounds
+        confidence= (1 - approx["error_probability"]) * 100
+        out.append("\nAPPROXIMATE MODE (customer/product figures are estimates)\n")
+        out.append("-"*50 + "\n")
+        out.append(f"distinct_customers: ~{approx['distinct_customers']} (±{approx['distinct_relative_error'] * 100:.1f}% std error)\n")
+        out.append(f"distinct_products: ~{approx['distinct_products']} (±{approx['distinct_relative_error'] * 100:.1f}% std error)\n")
+        out.append(f"product revenue / customer spend: at most ₹{approx['product_sales_error_bound']:,.2f} over the true value ({confidence:.0f}% confidence)\n")
+        out.append(f"quantities / order counts: at most {approx['product_quantity_error_bound']:,.0f} / {approx['customer_purchases_error_bound']:,.0f} over the true value ({confidence:.0f}% confidence)\n")
+        out.append(f"only the top {approx['top_k']} products and customers are tracked, daily unique customers are HyperLogLog estimates\n")
+
+    out.append("\nREGION-WISE PERFORMANCE\n")
+    out.append("-"*50 + "\n")
+    out.append("Region         Total Sales        Amount      Percentage of total     Transaction Count\n")
+    for row in report["regions"]:
+        out.append(
+            f"{row['region']:<15}  "
+            f"₹{row['total_sales']:,.2f}  "
+            f"₹{row['grand_total']:,.2f}  "
+            f"{row['percentage']:.2f}%  "
+            f"{row['transaction_count']}\n"
+        )
+
+    out.append("\nTOP 5 PRODUCTS\n")
+    out.append("-"*50 + "\n")
+    out.append("Product Name         Quantity Sold     Revenue\n")
+    for row in report["top_products"]:
+        out.append(
+            f"{row['product']:<20}"
+            f"{row['total_quantity']}"
+            f"₹{row['total_sales']:,.2f}\n"
+        )
+
+    out.append("\nTOP 5 CUSTOMERS\n")
+    out.append("-"*50 + "\n")
+    out.append("Customer ID         Total Spent     Order_count\n")
+    for row in report["top_customers"]:
+        out.append(f"{row['customer_id']:<20}"
+                   f"₹{row['total_spent']:,.2f}"
+                   f"{row['purchase_count']}\n")
+
+    out.append("\nDAILY SALES TREND\n")
+    out.append("-"*50 + "\n")
+    out.append("Date          Revenue      Transactions        unique_customers\n")
+    for row in report["daily"]:
+        out.append(f"{row['date']:<15}"
+                   f"₹{row['revenue']:,.2f}"
+                   f"{row['transaction_count']}"
+                   f"{row['unique_customers']}\n")
+
+    out.append("\nPRODUCT PERFORMANCE ANALYSIS\n")
+    out.append("-"*50 + "\n")
+    out.append(f"Best Selling Day: {report['best_selling_day']}")
+
+    enrichment= report["enrichment"]
+    out.append("\n API ENRICHED DATA SUMMARY\n")
+    out.append("-"*50 + "\n")
+    out.append(f"Total Products Enriched: {enrichment['enriched']} out of {enrichment['total']}\n")
+    out.append(f"Enrichment Success Rate: {enrichment['success_rate']:.2f}%\n")
+    out.append(f"Products Not Enriched: {enrichment['not_enriched']}\n")
+    return "".join(out)
+
+# c) CSV--- one table, `section` column tells the rows apart
+def render_csv(report):
+    buffer= io.StringIO()
+    writer= csv.writer(buffer, lineterminator= "\n")
+    writer.writerow(["section", "key", "value", "count", "extra"])
+    summary= report["summary"]
+    writer.writerows([
+        ["summary", "total_revenue", round(summary["total_revenue"], 2), summary["total_transactions"], ""],
+        ["summary", "average_order_value", round(summary["average_order_value"], 2), "", ""],
+        ["summary", "date_range", summary["start_date"] or "", "", summary["end_date"] or ""]
+    ])
+    writer.writerows(
+        ["region", row["region"], round(row["total_sales"], 2), row["transaction_count"], f"{row['percentage']:.2f}"]
+        for row in report["regions"])
+    writer.writerows(
+        ["top_product", row["product"], round(row["total_sales"], 2), row["total_quantity"], ""]
+        for row in report["top_products"])
+    writer.writerows(
+        ["top_customer", row["customer_id"], round(row["total_spent"], 2), row["purchase_count"], ""]
+        for row in report["top_customers"])
+    writer.writerows(
+        ["daily", row["date"], round(row["revenue"], 2), row["transaction_count"], row["unique_customers"]]
+        for row in report["daily"])
+    enrichment= report["enrichment"]
+    writer.writerow(["enrichment", "enriched", enrichment["enriched"], enrichment["total"], f"{enrichment['success_rate']:.2f}"])
+    return buffer.getvalue()
+
+# d) JSON---
+def render_json(report):
+    return json.dumps(report, indent= 1, ensure_ascii= False) + "\n"
+
+# e) HTML--- one self-contained page
+def html_table(headers, rows):
+    head= "".join(f"<th>{html.escape(str(h))}</th>" for h in headers)
+    body= "".join(
+        "<tr>" + "".join(f"<td>{html.escape(str(cell))}</td>" for cell in row) + "</tr>"
+        for row in rows
+    )
+    return f"<table><thead><tr>{head}</tr></thead><tbody>{body}</tbody></table>\n"
+
+def render_html(report):
+    summary= report["summary"]
+    enrichment= report["enrichment"]
+    out= [
+        "<!DOCTYPE html>\n<html><head><meta charset=\"utf-8\"><title>Sales Report</title>",
+        "<style>body{font-family:sans-serif}table{border-collapse:collapse;margin-bottom:1em}"
+        "td,th{border:1px solid #ccc;padding:2px 8px;text-align:right}td:first-child{text-align:left}</style>",
+        "</head><body>\n",
+        f"<h1>Sales Report</h1><p>Generated on {html.escape(report['generated_at'])}, "
+        f"{report['total_records']} transactions analyzed</p>\n",
+        "<h2>Overall Summary</h2>\n",
+        html_table(["Total Revenue", "Transactions", "Average Order Value", "Date Range"], [[
+            f"₹{summary['total_revenue']:,.2f}", summary["total_transactions"], f"₹{summary['average_order_value']:,.2f}",
+            f"{summary['start_date'] or 'N/A'} to {summary['end_date'] or 'N/A'}"]]),
+        "<h2>Region-wise Performance</h2>\n",
+        html_table(["Region", "Total Sales", "Share", "Transactions"], [
+            [row["region"], f"₹{row['total_sales']:,.2f}", f"{row['percentage']:.2f}%", row["transaction_count"]]
+            for row in report["regions"]]),
+        "<h2>Top Products</h2>\n",
+        html_table(["Product", "Quantity Sold", "Revenue"], [
+            [row["product"], row["total_quantity"], f"₹{row['total_sales']:,.2f}"] for row in report["top_products"]]),
+        "<h2>Top Customers</h2>\n",
+        html_table(["Customer ID", "Total Spent", "Orders"], [
+            [row["customer_id"], f"₹{row['total_spent']:,.2f}", row["purchase_count"]] for row in report["top_customers"]]),
+        "<h2>Daily Sales Trend</h2>\n",
+        html_table(["Date", "Revenue", "Transactions", "Unique Customers"], [
+            [row["date"], f"₹{row['revenue']:,.2f}", row["transaction_count"], row["unique_customers"]] for row in report["daily"]]),
+        f"<p>Best selling day: {html.escape(str(report['best_selling_day']))}</p>\n",
+        "<h2>API Enrichment</h2>\n",
+        f"<p>{enrichment['enriched']} of {enrichment['total']} transactions enriched "
+        f"({enrichment['success_rate']:.2f}%)</p>\n",
+        "</body></html>\n"
+    ]
+    return "".join(out)
+
+RENDERERS= {"text": render_text, "csv": render_csv, "json": render_json, "html": render_html}
+
+# f) Write several formats from one model--- returns {format: path}
+# text keeps output_file as given, unless it ends in the extension of another requested format
+# (--report out.csv with text,csv): then text gets .txt and the other format keeps the name
+def report_path(output_file, fmt, formats= ()):
+    base, extension= os.path.splitext(output_file)
+    if fmt != "text":
+        return base + EXTENSIONS[fmt]
+    if any(other != "text" and EXTENSIONS[other] == extension.lower() for other in formats):
+        return base + EXTENSIONS["text"]
+    return output_file
+
+def write_reports(report, output_file= "output/sales_report.txt", formats= ("text",)):
+    paths= {}
+    for fmt in formats:
+        if fmt not in RENDERERS:
+            raise ValueError(f"Unknown report format: {fmt}")
+        path= report_path(output_file, fmt, formats)
+        directory= os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok= True)
+        content= RENDERERS[fmt](report)
+        with open(path, mode= "w", encoding= "utf-8", newline= "") as file:
+            file.write(content)
+        paths[fmt]= path
+    return paths
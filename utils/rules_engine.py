@@ -0,0 +1,599 @@
+# VALIDATION RULES ENGINE-----
+# Declarative version of the parse_transactions + validate_and_filter checks.
+# Cleaning steps and rules come from a JSON file (config/validation_rules.json
+# by default), so a rule can be added, removed or reordered without touching
+# the code. The file is processed in blocks of whole lines: line and field
+# boundaries are found with NumPy over the raw bytes, every field becomes one
+# fixed width column, and every cleaning step / rule is one np.char or
+# comparison call over a whole column instead of a Python check per row.
+# The byte length of every field is known from the field boundaries, so the
+# cleaning only rewrites the rows a step changes (e.g. a strip only the values
+# with whitespace at either end), and numeric fields whose cleaning cannot
+# change a plain number are parsed from the raw bytes before the cleaning,
+# which then only sees the few values that are not plain numbers.
+# Blocks with quoted fields (or encodings that are not ASCII compatible) go
+# through the csv reader first and are then checked the same way.
+#
+# Every rejected row is charged to the first rule it fails (per-rule counts in
+# filter_summary["rejected_by_rule"]) and can be written to a quarantine file
+# with that rule name. As before, rows rejected by "parse" stage rules are
+# dropped before counting (not part of total_input), rows rejected by the
+# other rules count as invalid, and blank lines are skipped.
+#
+#   python -m utils.rules_engine data/sales_data.txt --quarantine output/quarantine.txt
+#   python -m utils.rules_engine data/sales_data.txt --benchmark
+#
+# Checks: field_count, integer, number, not_empty, prefix, one_of, max_length,
+#         greater_than, at_least, less_than, at_most
+# Cleaning ops: strip, replace, upper, lower
+
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from utils import columnar, file_handler
+
+DEFAULT_RULES_FILE= os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "config", "validation_rules.json")
+BLOCK_SIZE= 1024 * 1024
+
+STAGES= ("parse", "validate")
+NUMERIC_CHECKS= {"integer": np.int64, "number": np.float64}
+COMPARISONS= {
+    "greater_than": np.greater,
+    "at_least": np.greater_equal,
+    "less_than": np.less,
+    "at_most": np.less_equal
+}
+STRING_CHECKS= ("not_empty", "prefix", "one_of", "max_length")
+CLEANING_OPS= ("strip", "replace", "upper", "lower")
+WHITESPACE= np.zeros(256, dtype= bool)     # the bytes np.char.strip / bytes.strip remove
+WHITESPACE[[9, 10, 11, 12, 13, 32]]= True
+
+# a) Config---
+def load_rules(path= DEFAULT_RULES_FILE):
+    with open(path, mode= "r", encoding= "utf-8") as file:
+        return RuleSet(json.load(file))
+
+class RuleSet:
+    def __init__(self, config):
+        self.fields= list(config["fields"])
+        self.chunk_size= int(config.get("chunk_size", 16384))
+        self.position= {field: i for i, field in enumerate(self.fields)}
+        self.cleaning= [dict(step, fields= self.field_list(step.get("fields", "*"))) for step in config.get("cleaning", [])]
+        for step in self.cleaning:
+            if step["op"] not in CLEANING_OPS:
+                raise ValueError(f"Unknown cleaning op: {step['op']}")
+        self.rules= []
+        for rule in config.get("rules", []):
+            rule= dict(rule)
+            check= rule.get("check")
+            if check not in NUMERIC_CHECKS and check not in COMPARISONS and check not in STRING_CHECKS and check != "field_count":
+                raise ValueError(f"Unknown check {check!r} in rule {rule.get('name')}")
+            rule.setdefault("name", check)
+            rule.setdefault("stage", "validate")
+            if rule["stage"] not in STAGES:
+                raise ValueError(f"Unknown stage {rule['stage']!r} in rule {rule['name']}")
+            if "field" in rule:
+                rule["fields"]= self.field_list([rule["field"]])
+            elif check != "field_count":
+                rule["fields"]= self.field_list(rule.get("fields", "*"))
+            self.rules.append(rule)
+        # parse rules always run first, so the parse/invalid split matches the row pipeline
+        self.rules.sort(key= lambda rule: STAGES.index(rule["stage"]))
+        self.early_numbers= {field: kind for field in self.fields if (kind := self.early_number_kind(field))}
+        # fields whose cleaning starts with a strip (-> index of that step), trimmed when cut out of raw bytes
+        first_steps= {}
+        for index, step in enumerate(self.cleaning):
+            for field in step["fields"]:
+                first_steps.setdefault(field, index)
+        self.trimmed= {field: index for field, index in first_steps.items() if self.cleaning[index]["op"] == "strip"}
+
+    def field_list(self, fields):
+        if fields == "*":
+            return list(self.fields)
+        for field in fields:
+            if field not in self.position:
+                raise ValueError(f"Unknown field in rules: {field}")
+        return list(fields)
+
+    # numeric type of `field` when it can be parsed before the cleaning: one numeric check, run before any
+    # comparison, no string checks but not_empty, and no cleaning step that changes a plain number
+    def early_number_kind(self, field):
+        checks= [rule["check"] for rule in self.rules if field in rule.get("fields", ())]
+        numeric= [check for check in checks if check in NUMERIC_CHECKS]
+        if len(set(numeric)) != 1 or any(check in COMPARISONS for check in checks[:checks.index(numeric[0])]):
+            return None
+        if any(check not in NUMERIC_CHECKS and check not in COMPARISONS and check != "not_empty" for check in checks):
+            return None
+        for step in self.cleaning:
+            if field in step["fields"] and step["op"] == "replace" and (not step["old"] or set(step["old"]) & set("0123456789.")):
+                return None
+        return NUMERIC_CHECKS[numeric[0]]
+
+    def rule_names(self):
+        return [rule["name"] for rule in self.rules]
+
+    # b) Rows -> columns (split rows from the csv reader, or a block of raw bytes)---
+    def columns_from_rows(self, rows):
+        width= len(self.fields)
+        shaped= np.fromiter(map(len, rows), dtype= np.int64, count= len(rows)) == width
+        kept= rows if shaped.all() else [rows[i] for i in np.flatnonzero(shaped).tolist()]
+        matrix= np.array(kept, dtype= str).reshape(len(kept), width)
+        columns= {field: matrix[:, i] for i, field in enumerate(self.fields)}
+        # the csv reader has already dropped blank lines, the lengths are counted after the cleaning
+        return shaped, np.zeros(len(rows), dtype= bool), columns, {}, {}, lambda i: "|".join(rows[i])
+
+    def columns_from_bytes(self, block, file_encoder):
+        # block: whole lines of an ASCII compatible encoding without quoting
+        if block and not block.endswith(b"\n"):
+            block += b"\n"
+        data= np.frombuffer(block, dtype= np.uint8)
+        starts, ends, shaped, blank, field_starts, field_widths= self.field_bounds(block, data)
+        longest= int(field_widths.max()) if field_widths.size else 1
+        padded= np.concatenate([data, np.zeros(longest + 1, dtype= np.uint8)])
+        if self.trimmed:
+            field_starts, field_widths= trim_fields(padded, field_starts, field_widths, [self.position[field] for field in self.trimmed])
+        columns= {}
+        # byte length of every value (not with NUL bytes in the block, the S dtype drops trailing ones)
+        lengths= {} if b"\0" in block else {field: field_widths[:, i] for i, field in enumerate(self.fields)}
+        # numeric fields are parsed straight from the bytes, only the values that are not plain numbers
+        # are copied out as strings for the cleaning (-> field: (numbers, parsed, rows copied out))
+        early= {}
+        for i, field in enumerate(self.fields):
+            starts_i, widths= field_starts[:, i], field_widths[:, i]
+            if lengths and field in self.early_numbers:
+                parsed, ok= numbers_from_bytes(padded, starts_i, widths, self.early_numbers[field])
+                rest= np.flatnonzero(~ok)
+                early[field]= (parsed, ok, rest)
+                starts_i, widths= starts_i[rest], widths[rest]
+            columns[field]= cut_column(padded, starts_i, widths)
+        return shaped, blank, columns, lengths, early, lambda i: block[starts[i]:ends[i]].decode(file_encoder, errors= "replace")
+
+    # line and field boundaries of a block (ending with a newline) -> (line starts, line ends, well-shaped lines,
+    # blank lines, field starts and widths of the well-shaped lines as (rows, fields))
+    def field_bounds(self, block, data):
+        width= len(self.fields)
+        # pipes and newlines in one pass, a line is well-shaped when its newline is its `width`-th separator
+        separators= np.flatnonzero((data == 124) | (data == 10))
+        line_ends= np.flatnonzero(data[separators] == 10)
+        shaped= np.diff(line_ends, prepend= -1) == width
+        ends= separators[line_ends]
+        starts= np.concatenate([[0], ends[:-1] + 1])
+        # blank lines are skipped before any rule, like the csv reader does (only lines with the wrong field count need a look)
+        blank= np.zeros(len(starts), dtype= bool)
+        for i in np.flatnonzero(~shaped).tolist():
+            blank[i]= not block[starts[i]:ends[i]].replace(b"|", b"").strip()
+        bounds= separators[line_ends[shaped, None] + np.arange(1 - width, 1)]
+        field_starts= np.column_stack([starts[shaped], bounds[:, :-1] + 1])
+        return starts, ends, shaped, blank, field_starts, bounds - field_starts
+
+    # c) Cleaning + rules over the columns -> surviving columns---
+    def apply(self, rows, filter_summary, quarantine= None):
+        return self.check(*self.columns_from_rows(rows), filter_summary, quarantine)
+
+    def apply_bytes(self, block, filter_summary, quarantine= None, file_encoder= "utf-8"):
+        return self.check(*self.columns_from_bytes(block, file_encoder), filter_summary, quarantine, file_encoder)
+
+    def check(self, shaped, blank_lines, columns, lengths, early, line, filter_summary, quarantine= None, file_encoder= "utf-8"):
+        # the columns of the numeric fields parsed from the bytes only hold the rows to clean
+        full_lengths= {}
+        for field, (parsed, ok, rest) in early.items():
+            full_lengths[field], lengths[field]= lengths[field], lengths[field][rest]
+        from_bytes= bool(lengths)
+        for index, step in enumerate(self.cleaning):
+            for field in step["fields"]:
+                if from_bytes and self.trimmed.get(field) == index:
+                    continue    # stripped with the field boundaries
+                columns[field], lengths[field]= clean(columns[field], step, file_encoder, lengths.get(field))
+        numbers, parsed_ok= {}, {}
+        for field, (parsed, ok, rest) in early.items():
+            field_lengths= full_lengths[field]
+            if len(rest):
+                parsed[rest], ok[rest]= to_numbers(columns[field], self.early_numbers[field])
+                field_lengths= field_lengths.copy()
+                field_lengths[rest]= np.char.str_len(columns[field]) if lengths[field] is None else lengths[field]
+            numbers[field], parsed_ok[field], lengths[field]= parsed, ok, field_lengths
+            del columns[field]
+        for field, values in columns.items():
+            if lengths.get(field) is None:
+                lengths[field]= np.char.str_len(values)
+        # rows left empty by the cleaning are blank lines
+        blank= np.ones(int(shaped.sum()), dtype= bool)
+        for field_lengths in lengths.values():
+            blank &= field_lengths == 0
+        shaped_rows= np.flatnonzero(shaped)
+        reasons= np.full(len(shaped), -1, dtype= np.int32)     # index of the rule that rejected each line
+        alive= ~blank
+        counted= False
+        for number, rule in enumerate(self.rules):
+            if rule["stage"] == "validate" and not counted:
+                filter_summary["total_input"] += int(alive.sum())
+                counted= True
+            check= rule["check"]
+            if check == "field_count":
+                # charged on the whole block, the columns only hold well-shaped lines
+                failed_lines= np.flatnonzero(~shaped & ~blank_lines & (reasons == -1))
+                reasons[failed_lines]= number
+                filter_summary["rejected_by_rule"][rule["name"]] += len(failed_lines)
+                continue
+            failed= np.zeros(len(alive), dtype= bool)
+            for field in rule["fields"]:
+                failed |= self.failed(rule, field, columns, lengths, numbers, parsed_ok, file_encoder)
+            failed &= alive
+            count= int(failed.sum())
+            if count:
+                reasons[shaped_rows[failed]]= number
+                alive &= ~failed
+                if rule["stage"] == "validate":
+                    filter_summary["invalid"] += count
+            filter_summary["rejected_by_rule"][rule["name"]] += count
+        if not counted:
+            filter_summary["total_input"] += int(alive.sum())
+
+        if quarantine is not None:
+            for i in np.flatnonzero(reasons >= 0).tolist():
+                quarantine.write(line(i) + "|" + self.rules[reasons[i]]["name"] + "\n")
+
+        keep= {field: values[alive] for field, values in columns.items()}
+        for field in early:
+            keep[field]= numbers[field][alive]
+        for field, kind in (("Quantity", np.int64), ("UnitPrice", np.float64)):
+            keep[field]= numbers[field][alive] if field in numbers else to_numbers(keep[field], kind)[0]
+        return keep
+
+    def failed(self, rule, field, columns, lengths, numbers, parsed_ok, file_encoder= "utf-8"):
+        # rows that fail `rule` on `field`
+        check= rule["check"]
+        if field in parsed_ok:
+            if check in NUMERIC_CHECKS:
+                return ~parsed_ok[field]
+            if check in COMPARISONS:
+                return ~COMPARISONS[check](numbers[field], rule["value"])
+            return lengths[field] == 0      # not_empty
+        values= columns[field]
+        if check in NUMERIC_CHECKS:
+            parsed, ok= to_numbers(values, NUMERIC_CHECKS[check])
+            numbers[field]= parsed
+            return ~ok
+        if check in COMPARISONS:
+            if field not in numbers:
+                numbers[field]= to_numbers(values, np.float64)[0]
+            return ~COMPARISONS[check](numbers[field], rule["value"])
+        if check == "not_empty":
+            return lengths[field] == 0
+        if check == "prefix":
+            prefix= like(values, rule["value"], file_encoder)
+            if values.dtype.kind == "S" and 0 < len(prefix) <= values.dtype.itemsize and b"\0" not in prefix:
+                # raw bytes: compared one leading byte position at a time
+                raw= np.ascontiguousarray(values).view(np.uint8).reshape(len(values), values.dtype.itemsize)
+                matches= raw[:, 0] == prefix[0]
+                for j in range(1, len(prefix)):
+                    matches &= raw[:, j] == prefix[j]
+                return ~matches
+            return ~np.char.startswith(values, prefix)
+        if check == "one_of":
+            if rule.get("ignore_case"):
+                allowed= [like(values, str(v).lower(), file_encoder) for v in rule["values"]]
+                return ~np.isin(np.char.lower(values), allowed)
+            return ~np.isin(values, [like(values, v, file_encoder) for v in rule["values"]])
+        return lengths[field] > int(rule["value"])     # max_length
+
+# S column of the values at starts/widths, each copied as one fixed width row of a sliding window over
+# the bytes with the bytes past its end zeroed (the S dtype drops trailing zeros)
+def cut_column(padded, starts, widths):
+    size= max(int(widths.max()) if len(widths) else 1, 1)
+    gathered= sliding_window_view(padded, size)[starts]
+    if len(widths) and widths.min() < size:
+        gathered *= np.arange(size) < widths[:, None]
+    return gathered.view(f"S{size}").ravel()
+
+# whitespace stripped from both ends of the fields in columns `fields` (the bytes np.char.strip removes),
+# by moving their starts/widths; only the values with whitespace at either end are looked at again
+def trim_fields(padded, field_starts, field_widths, fields):
+    if len(fields) == field_starts.shape[1]:
+        starts, widths= field_starts, field_widths
+    else:
+        starts, widths= field_starts[:, fields], field_widths[:, fields]
+    # whitespace is <= 32, only those edge bytes get the exact test
+    edge= np.minimum(np.take(padded, starts), np.take(padded, starts + widths - 1))
+    cells= np.flatnonzero(edge <= 32)
+    if not len(cells):
+        return field_starts, field_widths
+    starts, widths= starts.ravel()[cells], widths.ravel()[cells]
+    cells= cells[(widths > 0) & (WHITESPACE[padded[starts]] | WHITESPACE[padded[starts + widths - 1]])]
+    if not len(cells):
+        return field_starts, field_widths
+    rows, columns= np.divmod(cells, len(fields))
+    columns= np.asarray(fields)[columns]
+    starts, widths= field_starts[rows, columns], field_widths[rows, columns]
+    while True:
+        leading= (widths > 0) & WHITESPACE[padded[starts]]
+        starts += leading
+        widths -= leading
+        trailing= (widths > 0) & WHITESPACE[padded[starts + widths - 1]]
+        widths -= trailing
+        if not (leading.any() or trailing.any()):
+            break
+    field_starts, field_widths= field_starts.copy(), field_widths.copy()
+    field_starts[rows, columns], field_widths[rows, columns]= starts, widths
+    return field_starts, field_widths
+
+# config strings as bytes when the column holds raw bytes
+def like(values, text, file_encoder):
+    return text.encode(file_encoder) if values.dtype.kind == "S" else text
+
+# -> (cleaned values, their lengths); with the byte lengths of an S column only the rows the step
+# changes are rewritten, without them the lengths come back as None
+def clean(values, step, file_encoder= "utf-8", lengths= None):
+    op= step["op"]
+    if not len(values):
+        return values, lengths
+    if op == "strip":
+        if lengths is None:
+            return np.char.strip(values), None
+        raw= np.ascontiguousarray(values).view(np.uint8).reshape(len(values), values.dtype.itemsize)
+        last= raw[np.arange(len(values)), np.maximum(lengths - 1, 0)]
+        rows= np.flatnonzero(WHITESPACE[raw[:, 0]] | WHITESPACE[last])
+        if not len(rows):
+            return values, lengths
+        values, lengths= values.copy(), lengths.copy()
+        values[rows]= np.char.strip(values[rows])
+        lengths[rows]= np.char.str_len(values[rows])
+        return values, lengths
+    if op == "replace":
+        old, new= like(values, step["old"], file_encoder), like(values, step["new"], file_encoder)
+        if len(old) == 1:
+            # only the rows that contain the (single character) pattern are rewritten
+            units= np.ascontiguousarray(values).view(np.uint8 if values.dtype.kind == "S" else np.uint32)
+            hits= np.flatnonzero(units == ord(old)) // (len(units) // len(values))
+            if not len(hits):
+                return values, lengths
+            rows= hits[np.concatenate([[True], hits[1:] != hits[:-1]])]    # each row once
+            replaced= np.char.replace(values[rows], old, new)
+            if replaced.dtype.itemsize <= values.dtype.itemsize:
+                values= values.copy()
+                values[rows]= replaced
+                if lengths is not None:
+                    lengths= lengths.copy()
+                    lengths[rows]= np.char.str_len(replaced)
+                return values, lengths
+        return np.char.replace(values, old, new), None
+    # ASCII case changes keep the byte lengths
+    if op == "upper":
+        return np.char.upper(values), lengths
+    return np.char.lower(values), lengths
+
+# numeric column from strings--- plain digit strings are parsed straight from the bytes,
+# the rest with one astype for the column (per value only when it has bad entries)
+def to_numbers(values, kind):
+    if values.dtype.kind == "S" and len(values):
+        parsed, plain= plain_numbers(values, kind)
+        if plain.all():
+            return parsed, plain
+        rest= np.flatnonzero(~plain)
+        parsed[rest], ok= python_numbers(values[rest], kind)
+        plain[rest]= ok
+        return parsed, plain
+    return python_numbers(values, kind)
+
+def python_numbers(values, kind):
+    try:
+        return values.astype(kind), np.ones(len(values), dtype= bool)
+    except (ValueError, OverflowError):
+        convert= int if kind is np.int64 else float
+        parsed= np.zeros(len(values), dtype= kind)
+        ok= np.zeros(len(values), dtype= bool)
+        for i, value in enumerate(values.tolist()):
+            try:
+                parsed[i]= convert(value)
+                ok[i]= True
+            except (ValueError, OverflowError):
+                pass
+        return parsed, ok
+
+POWERS= 10.0 ** np.arange(16)
+SHIFT= np.array([1, 10], dtype= np.int64)
+
+# "1916" / "1916.5" style values (digits, for floats at most one point, up to 15 digits) -> exact
+# int()/float() results, read one character position at a time over the whole column (Horner);
+# the digits as one integer divided by a power of ten is correctly rounded, like float()
+def plain_numbers(values, kind):
+    n, width= len(values), values.dtype.itemsize
+    # one contiguous row of bytes per character position
+    return parse_positions(np.ascontiguousarray(values).view(np.uint8).reshape(n, width).T.copy(), kind)
+
+# same for the values at starts/widths of a byte buffer, without copying them out as strings
+def numbers_from_bytes(padded, starts, widths, kind):
+    positions= np.empty((int(widths.max()) if len(widths) else 0, len(starts)), dtype= np.uint8)
+    for j, byte in enumerate(positions):
+        np.take(padded, starts + j, out= byte)
+        byte *= widths > j
+    return parse_positions(positions, kind)
+
+def parse_positions(positions, kind):
+    n= positions.shape[1]
+    floats= kind is np.float64
+    whole= np.zeros(n, dtype= np.int64)
+    digits= np.zeros(n, dtype= np.int64)
+    scale= np.zeros(n, dtype= np.int64)
+    seen_point= np.zeros(n, dtype= bool)
+    ended= np.zeros(n, dtype= bool)
+    bad= np.zeros(n, dtype= bool)
+    for byte in positions:
+        digit= byte - np.uint8(48)
+        is_digit= digit < 10
+        is_end= byte == 0
+        bad |= ended > is_end       # a character after the end
+        ended |= is_end
+        allowed= is_digit | ended
+        if floats:
+            is_point= byte == 46
+            bad |= is_point & seen_point
+            allowed |= is_point
+            scale += is_digit & seen_point
+            seen_point |= is_point
+        bad |= ~allowed
+        whole *= SHIFT[is_digit.view(np.uint8)]
+        whole += digit * is_digit
+        digits += is_digit
+    plain= ~bad & (digits > 0) & (digits <= (15 if floats else 18))
+    if floats:
+        return whole / POWERS[np.minimum(scale, 15)], plain
+    return whole, plain
+
+def new_rule_summary(rules):
+    filter_summary= file_handler.new_filter_summary()
+    filter_summary["rejected_by_rule"]= {name: 0 for name in rules.rule_names()}
+    return filter_summary
+
+# d) Files -> blocks of whole lines---
+def ascii_compatible(file_encoder):
+    try:
+        return "|\n".encode(file_encoder) == b"|\n"
+    except LookupError:
+        return False
+
+def iter_blocks(filename, block_size= BLOCK_SIZE):
+    # raw blocks ending on a newline, header skipped
+    with open(filename, mode= "rb") as file:
+        file.readline()
+        rest= b""
+        while True:
+            data= file.read(block_size)
+            if not data:
+                break
+            data= rest + data
+            cut= data.rfind(b"\n")
+            if cut == -1:
+                rest= data
+                continue
+            rest= data[cut + 1:]
+            yield data[:cut + 1]
+        if rest:
+            yield rest
+
+def iter_chunks(rows, size):
+    chunk= []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk= []
+    if chunk:
+        yield chunk
+
+def check_file(filename, rules, filter_summary, file_encoder= "utf-8", quarantine= None):
+    # -> list of surviving column dicts, one per block/chunk
+    parts= []
+    if not ascii_compatible(file_encoder):
+        for chunk in iter_chunks(file_handler.iter_sales_data(filename, file_encoder), rules.chunk_size):
+            parts.append(rules.apply(chunk, filter_summary, quarantine))
+        return parts
+    for block in iter_blocks(filename):
+        if b'"' in block:
+            # quoted fields need the csv reader
+            rows= list(file_handler.iter_text_rows(block.decode(file_encoder)))
+            for chunk in iter_chunks(rows, rules.chunk_size):
+                parts.append(rules.apply(chunk, filter_summary, quarantine))
+        else:
+            parts.append(rules.apply_bytes(block, filter_summary, quarantine, file_encoder))
+    return parts
+
+# e) Files -> TransactionTable + filter_summary (same contract as mmap_reader.read_sales_table)---
+def read_sales_tables(filenames, file_encoder= "utf-8", rules= None, quarantine_file= None):
+    rules= rules or load_rules()
+    if isinstance(filenames, str):
+        filenames= [filenames]
+    filter_summary= new_rule_summary(rules)
+    parts= []
+    quarantine= None
+    if quarantine_file:
+        directory= os.path.dirname(quarantine_file)
+        if directory:
+            os.makedirs(directory, exist_ok= True)
+        quarantine= open(quarantine_file, mode= "w", encoding= "utf-8")
+        quarantine.write("|".join(rules.fields) + "|RejectedBy\n")
+    try:
+        for filename in filenames:
+            parts.extend(check_file(filename, rules, filter_summary, file_encoder, quarantine))
+    except FileNotFoundError:
+        print (f"File not found")
+        return columnar.empty_table(), new_rule_summary(rules)
+    except UnicodeDecodeError:
+        print(f"File cannot be decoded using {file_encoder}")
+        return columnar.empty_table(), new_rule_summary(rules)
+    finally:
+        if quarantine is not None:
+            quarantine.close()
+    try:
+        table= table_from_parts(parts, file_encoder)
+    except UnicodeDecodeError:
+        print(f"File cannot be decoded using {file_encoder}")
+        return columnar.empty_table(), new_rule_summary(rules)
+    filter_summary["final_count"]= len(table)
+    return table, filter_summary
+
+def table_from_parts(parts, file_encoder= "utf-8"):
+    parts= [part for part in parts if len(part["Quantity"])]
+    if not parts:
+        return columnar.empty_table()
+    merged= {}
+    for field in parts[0]:
+        pieces= [part[field] for part in parts]
+        if any(piece.dtype.kind == "U" for piece in pieces) and any(piece.dtype.kind == "S" for piece in pieces):
+            pieces= [np.char.decode(piece, file_encoder) if piece.dtype.kind == "S" else piece for piece in pieces]
+        merged[field]= np.concatenate(pieces)
+    codes, categories= {}, {}
+    for col in columnar.CATEGORICAL_COLUMNS:
+        codes[col], categories[col]= columnar.encode_array(merged[col])
+        # only the distinct values are decoded
+        categories[col]= [v.decode(file_encoder) if isinstance(v, bytes) else v for v in categories[col]]
+    ids= merged["TransactionID"]
+    if ids.dtype.kind == "S":
+        raw= np.ascontiguousarray(ids).view(np.uint8).reshape(len(ids), ids.dtype.itemsize)
+        # ASCII ids: every byte widened to one code point (same as astype(str), without a call per value)
+        ids= raw.astype(np.uint32).view(f"U{ids.dtype.itemsize}").ravel() if (raw < 128).all() else np.char.decode(ids, file_encoder)
+    return columnar.TransactionTable(ids, merged["Quantity"], merged["UnitPrice"], codes, categories, first_seen_order= True)
+
+# f) Throughput--- read_sales_data + parse_transactions + validate_transaction vs the rules engine
+def measure_throughput(filename, file_encoder= "utf-8", rules= None):
+    rules= rules or load_rules()
+    results= {}
+
+    start= time.perf_counter()
+    parsed= file_handler.parse_transactions(file_handler.read_sales_data(filename, file_encoder))
+    valid= [t for t in parsed if file_handler.validate_transaction(t)]
+    elapsed= time.perf_counter() - start
+    results["per_row"]= {"seconds": elapsed, "rows": len(valid)}
+
+    start= time.perf_counter()
+    table, filter_summary= read_sales_tables(filename, file_encoder, rules)
+    elapsed= time.perf_counter() - start
+    results["rules_engine"]= {"seconds": elapsed, "rows": len(table)}
+
+    print(f"Read + parse + validate throughput for {filename} ({filter_summary['total_input']} rows):")
+    for name, data in results.items():
+        rate= filter_summary["total_input"] / data["seconds"] if data["seconds"] > 0 else 0.0
+        print(f" {name:<13} {data['rows']} valid rows in {data['seconds']:.3f}s -> {rate:,.0f} rows/s")
+    print(f" Rejected by rule: {filter_summary['rejected_by_rule']}")
+    return results
+
+if __name__ == "__main__":
+    parser= argparse.ArgumentParser(description= "Run the validation rules over sales files.")
+    parser.add_argument("inputs", nargs= "*", default= ["data/sales_data.txt"])
+    parser.add_argument("--rules", default= DEFAULT_RULES_FILE, help= "JSON rules file")
+    parser.add_argument("--encoding", default= "utf-8")
+    parser.add_argument("--quarantine", default= None, help= "write rejected rows (with the rule name) to this file")
+    parser.add_argument("--benchmark", action= "store_true", help= "compare with the per-row read/parse/validate loop")
+    args= parser.parse_args()
+    rule_set= load_rules(args.rules)
+    if args.benchmark:
+        for filename in args.inputs:
+            measure_throughput(filename, args.encoding, rule_set)
+    else:
+        table, summary= read_sales_tables(args.inputs, args.encoding, rule_set, args.quarantine)
+        print(f"Filter Summary: {summary}")
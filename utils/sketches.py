@@ -0,0 +1,156 @@
+# PROBABILISTIC SKETCHES-----
+# Fixed-size summaries used by the approximate analytics mode
+# (utils/approx_aggregator.py). Memory depends only on the configured error,
+# never on how many distinct customers/products/days the data has.
+#   HyperLogLog     - distinct counts, relative standard error ~ 1.04 / sqrt(registers)
+#   CountMinSketch  - frequency/weight per key, overestimates by at most
+#                     epsilon * total weight with probability 1 - delta
+#   TopK            - the k keys with the largest Count-Min estimate (heavy hitters)
+# Hashes are blake2b based (not hash()), so sketches built in different
+# processes can be merged. Callers that feed one key into several sketches
+# hash it once with hash_key() and use the *_hash methods.
+
+import hashlib
+import heapq
+import math
+from array import array
+
+# one 128 bit hash per key, split in two 64 bit halves; every sketch below takes
+# these, so a key is hashed once even when it goes into several sketches
+def hash_key(value):
+    digest= hashlib.blake2b(str(value).encode("utf-8"), digest_size= 16).digest()
+    return int.from_bytes(digest[:8], "little"), int.from_bytes(digest[8:], "little") | 1
+
+class HyperLogLog:
+    def __init__(self, error= 0.01):
+        # registers m = 2^p chosen so that 1.04 / sqrt(m) <= error
+        self.p= min(16, max(4, math.ceil(math.log2((1.04 / error) ** 2))))
+        self.m= 1 << self.p
+        self.registers= bytearray(self.m)
+
+    @property
+    def relative_error(self):
+        return 1.04 / math.sqrt(self.m)
+
+    def add(self, value):
+        self.add_hash(hash_key(value))
+
+    def add_hash(self, hashes):
+        h= hashes[0]
+        index= h & (self.m - 1)
+        rest= h >> self.p
+        # position of the first 1 bit in the remaining 64 - p bits
+        rank= (64 - self.p) - rest.bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index]= rank
+
+    def merge(self, other):
+        if other.m != self.m:
+            raise ValueError("Cannot merge HyperLogLogs with different precision")
+        self.registers= bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        m= self.m
+        alpha= 0.673 if m == 16 else 0.697 if m == 32 else 0.709 if m == 64 else 0.7213 / (1 + 1.079 / m)
+        estimate= alpha * m * m / sum(2.0 ** -r for r in self.registers)
+        zeros= self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            # small range correction (linear counting)
+            estimate= m * math.log(m / zeros)
+        return int(round(estimate))
+
+    # len() makes a sketch usable wherever a set of distinct values was (aggregator.distinct_count)
+    def __len__(self):
+        return self.count()
+
+class CountMinSketch:
+    def __init__(self, epsilon= 0.001, delta= 0.01):
+        self.epsilon= epsilon
+        self.delta= delta
+        self.width= math.ceil(math.e / epsilon)
+        self.depth= math.ceil(math.log(1 / delta))
+        self.table= [array("d", bytes(8 * self.width)) for _ in range(self.depth)]
+        self.total= 0.0
+
+    def columns(self, hashes):
+        # depth hash functions from the two 64 bit halves (Kirsch-Mitzenmacher)
+        h1, h2= hashes
+        width= self.width
+        return [(h1 + i * h2) % width for i in range(self.depth)]
+
+    def add(self, key, weight= 1):
+        self.add_hash(hash_key(key), weight)
+
+    # returns the key's new estimate, so heavy hitter tracking needs no second lookup
+    def add_hash(self, hashes, weight= 1):
+        estimate= None
+        for row, column in zip(self.table, self.columns(hashes)):
+            row[column] += weight
+            if estimate is None or row[column] < estimate:
+                estimate= row[column]
+        self.total += weight
+        return estimate
+
+    def estimate(self, key):
+        return self.estimate_hash(hash_key(key))
+
+    def estimate_hash(self, hashes):
+        return min(row[column] for row, column in zip(self.table, self.columns(hashes)))
+
+    @property
+    def error_bound(self):
+        # absolute overestimate bound, holds with probability 1 - delta
+        return self.epsilon * self.total
+
+    def merge(self, other):
+        if (self.width, self.depth) != (other.width, other.depth):
+            raise ValueError("Cannot merge Count-Min sketches of different size")
+        for row, other_row in zip(self.table, other.table):
+            for i, value in enumerate(other_row):
+                if value:
+                    row[i] += value
+        self.total += other.total
+        return self
+
+class TopK:
+    def __init__(self, k= 100):
+        self.k= k
+        self.counters= {}    # key -> record {"count", ...}
+        self.heap= []        # (count, sequence, key), stale entries skipped lazily
+        self.sequence= 0
+
+    def push(self, key, count):
+        self.sequence += 1
+        heapq.heappush(self.heap, (count, self.sequence, key))
+        if len(self.heap) > 4 * self.k:
+            self.heap= [(record["count"], i, key) for i, (key, record) in enumerate(self.counters.items())]
+            heapq.heapify(self.heap)
+            self.sequence= len(self.heap)
+
+    def min_entry(self):
+        while True:
+            count, _, key= self.heap[0]
+            record= self.counters.get(key)
+            if record is not None and record["count"] == count:
+                return key, record
+            heapq.heappop(self.heap)
+
+    # `count` is the key's current estimate; returns the key's record while it is
+    # tracked (callers may keep extra fields in it) or None when it is not in the top k
+    def offer(self, key, count):
+        record= self.counters.get(key)
+        if record is None:
+            if len(self.counters) >= self.k:
+                min_key, min_record= self.min_entry()
+                if count <= min_record["count"]:
+                    return None
+                del self.counters[min_key]
+            record= self.counters[key]= {}
+        record["count"]= count
+        self.push(key, count)
+        return record
+
+    def top(self, n= None):
+        ranked= sorted(self.counters.items(), key= lambda item: item[1]["count"], reverse= True)
+        return ranked if n is None else ranked[:n]
@@ -0,0 +1,204 @@
+# TIME SERIES ROLLUPS-----
+# Day x region and day x product cubes of revenue / quantity / transaction
+# count, built in one pass. Dates are parsed once per distinct value into day
+# numbers (date ordinals) and the day axis is dense, so week/month rollups,
+# rolling sums, moving averages and "region X over the last 7 days" style range
+# queries are array operations on prefix sums instead of rescans.
+# Rows whose Date does not parse as YYYY-MM-DD are left out (counted in `unparsed`).
+
+from datetime import date, datetime
+
+import numpy as np
+
+MEASURES= ("revenue", "quantity", "transactions")
+
+def parse_day(value):
+    try:
+        return datetime.strptime(str(value).strip(), "%Y-%m-%d").toordinal()
+    except (ValueError, TypeError):
+        return None
+
+class TimeSeriesCube:
+    def __init__(self, days, region_codes, product_codes, regions, products, quantity, amount, unparsed= 0, transactions= None):
+        # days/region_codes/product_codes/quantity/amount: one entry per (parsed) transaction, or per
+        # day with `transactions` holding the count of each entry (quantity None: no quantity measure)
+        self.regions= regions
+        self.products= products
+        self.unparsed= unparsed
+        self.start_day= int(days.min()) if len(days) else date.today().toordinal()
+        self.n_days= int(days.max()) - self.start_day + 1 if len(days) else 0
+        offset= days - self.start_day
+        weights= {"revenue": amount, "quantity": quantity, "transactions": transactions}
+        if quantity is None:
+            del weights["quantity"]
+        self.by_region= {m: self.cube(offset, region_codes, len(regions), w) for m, w in weights.items()}
+        self.by_product= {m: self.cube(offset, product_codes, len(products), w) for m, w in weights.items()}
+        # prefix sums along the day axis, one leading zero row--- range sums in O(1)
+        self.region_prefix= {m: self.prefix(c) for m, c in self.by_region.items()}
+        self.product_prefix= {m: self.prefix(c) for m, c in self.by_product.items()}
+        self.region_index= {r: i for i, r in enumerate(regions)}
+        self.product_index= {p: i for i, p in enumerate(products)}
+
+    def cube(self, offset, codes, size, weights):
+        flat= offset.astype(np.int64) * max(size, 1) + codes
+        counts= np.bincount(flat, weights= weights, minlength= self.n_days * max(size, 1))
+        return counts.reshape(self.n_days, max(size, 1))
+
+    @staticmethod
+    def prefix(cube):
+        return np.vstack([np.zeros((1, cube.shape[1])), np.cumsum(cube, axis= 0)])
+
+    # a) Day axis helpers---
+    def day_number(self, day):
+        # accepts a day ordinal, a date or a YYYY-MM-DD string
+        if isinstance(day, date):
+            return day.toordinal()
+        if isinstance(day, str):
+            return parse_day(day)
+        return int(day)
+
+    def day_labels(self):
+        return [date.fromordinal(self.start_day + i).isoformat() for i in range(self.n_days)]
+
+    def last_day(self):
+        return self.start_day + self.n_days - 1
+
+    # b) One series (per day) for the whole data, one region or one product---
+    def series(self, measure= "revenue", region= None, product= None):
+        if region is not None and product is not None:
+            raise ValueError("Cubes are per region or per product, not both")
+        if product is not None:
+            index= self.product_index.get(product)
+            return self.by_product[measure][:, index] if index is not None else np.zeros(self.n_days)
+        if region is not None:
+            index= self.region_index.get(region)
+            return self.by_region[measure][:, index] if index is not None else np.zeros(self.n_days)
+        return self.by_region[measure].sum(axis= 1)
+
+    # c) Range queries--- inclusive start/end, clipped to the data
+    def range_sum(self, measure= "revenue", start= None, end= None, region= None, product= None):
+        first= 0 if start is None else max(0, self.day_number(start) - self.start_day)
+        last= self.n_days - 1 if end is None else min(self.n_days - 1, self.day_number(end) - self.start_day)
+        if last < first:
+            return 0.0
+        if product is not None:
+            prefix, index= self.product_prefix[measure], self.product_index.get(product)
+        elif region is not None:
+            prefix, index= self.region_prefix[measure], self.region_index.get(region)
+        else:
+            prefix= self.region_prefix[measure]
+            return float((prefix[last + 1] - prefix[first]).sum())
+        if index is None:
+            return 0.0
+        return float(prefix[last + 1, index] - prefix[first, index])
+
+    def last_days(self, n, measure= "revenue", region= None, product= None):
+        # e.g. revenue of one region over the last 7 days of data
+        end= self.last_day()
+        return self.range_sum(measure, end - n + 1, end, region= region, product= product)
+
+    # d) Windows---
+    def rolling_sum(self, window, measure= "revenue", region= None, product= None):
+        # value at day i covers days i-window+1 .. i (shorter at the start)
+        cumulative= np.concatenate([[0.0], np.cumsum(self.series(measure, region, product))])
+        ends= np.arange(1, self.n_days + 1)
+        return cumulative[ends] - cumulative[np.maximum(ends - window, 0)]
+
+    def moving_average(self, window, measure= "revenue", region= None, product= None):
+        sums= self.rolling_sum(window, measure, region, product)
+        return sums / np.minimum(np.arange(1, self.n_days + 1), window)
+
+    # e) Calendar rollups--- [(label, value)] for "day", "week" (ISO, Monday start) or "month"
+    def rollup(self, period= "week", measure= "revenue", region= None, product= None):
+        values= self.series(measure, region, product)
+        if period == "day":
+            return list(zip(self.day_labels(), values.tolist()))
+        labels= []
+        for i in range(self.n_days):
+            day= date.fromordinal(self.start_day + i)
+            if period == "week":
+                year, week, _= day.isocalendar()
+                labels.append(f"{year}-W{week:02d}")
+            elif period == "month":
+                labels.append(f"{day.year}-{day.month:02d}")
+            else:
+                raise ValueError(f"Unknown period: {period}")
+        totals= {}
+        for label, value in zip(labels, values.tolist()):
+            totals[label]= totals.get(label, 0.0) + value
+        return list(totals.items())
+
+    def peak_day(self, measure= "revenue", region= None, product= None):
+        if self.n_days == 0:
+            return None, 0.0
+        values= self.series(measure, region, product)
+        i= int(np.argmax(values))
+        return date.fromordinal(self.start_day + i).isoformat(), float(values[i])
+
+# f) Builders---
+def cube_from_transactions(transactions):
+    day_of= {}      # date string -> day number, so each distinct date is parsed once
+    region_of, product_of= {}, {}
+    days, region_codes, product_codes, quantity, amount= [], [], [], [], []
+    unparsed= 0
+    for txn in transactions:
+        try:
+            qty= int(txn.get("Quantity", 0))
+            price= float(txn.get("UnitPrice", 0.0))
+        except (ValueError, TypeError):
+            continue
+        dt= txn.get("Date")
+        day= day_of.get(dt)
+        if day is None:
+            day= day_of[dt]= parse_day(dt)
+        if day is None:
+            unparsed += 1
+            continue
+        region= str(txn.get("Region", "Unknown")).strip()
+        p_name= str(txn.get("ProductName", "Unknown")).strip()
+        days.append(day)
+        region_codes.append(region_of.setdefault(region, len(region_of)))
+        product_codes.append(product_of.setdefault(p_name, len(product_of)))
+        quantity.append(qty)
+        amount.append(qty * price)
+    return TimeSeriesCube(
+        np.asarray(days, dtype= np.int64),
+        np.asarray(region_codes, dtype= np.int64),
+        np.asarray(product_codes, dtype= np.int64),
+        list(region_of), list(product_of),
+        np.asarray(quantity, dtype= np.float64),
+        np.asarray(amount, dtype= np.float64),
+        unparsed)
+
+def cube_from_table(table):
+    # columnar TransactionTable--- dates are already dictionary encoded, parse the distinct values only
+    date_days= np.array([parse_day(dt) or -1 for dt in table.categories["Date"]], dtype= np.int64)
+    days= date_days[table.codes["Date"]] if len(date_days) else np.zeros(0, dtype= np.int64)
+    keep= days >= 0
+    return TimeSeriesCube(
+        days[keep],
+        table.codes["Region"][keep].astype(np.int64),
+        table.codes["ProductName"][keep].astype(np.int64),
+        list(table.categories["Region"]), list(table.categories["ProductName"]),
+        table.quantity[keep].astype(np.float64),
+        table.amount[keep],
+        int(len(table) - keep.sum()))
+
+def cube_from_daily(daily):
+    # aggregates["daily"] (date -> total_revenue, transaction_count): revenue/transactions per day
+    # without a region or product axis. Every engine (row, columnar, approx, partial, incremental)
+    # fills that rollup, so main.py builds the trend lines from it in the in-memory and streaming flows.
+    days, amount, transactions= [], [], []
+    unparsed= 0
+    for dt, data in daily.items():
+        day= parse_day(dt)
+        if day is None:
+            unparsed += data["transaction_count"]
+            continue
+        days.append(day)
+        amount.append(data["total_revenue"])
+        transactions.append(data["transaction_count"])
+    days= np.asarray(days, dtype= np.int64)
+    return TimeSeriesCube(
+        days, np.zeros(len(days), dtype= np.int64), np.zeros(len(days), dtype= np.int64), [], [],
+        None, np.asarray(amount, dtype= np.float64), unparsed, np.asarray(transactions, dtype= np.float64))